@@ -2,6 +2,14 @@ from flask import Flask
 from flask_login import LoginManager
 from app.config import Config
 from app.models import db, bcrypt, User
+from app.jobs import job_queue
+from app.scheduler import scheduler
+from app.assets import assets
+from app.fragment_cache import fragment_cache
+from app.cache import cache
+from app.json_provider import FastJSONProvider
+from app.leaderboard_stream import leaderboard_hub
+from app.notifications import notification_hub
 
 login_manager = LoginManager()
 
@@ -13,6 +21,7 @@ def create_app():
     # Creează aplicația Flask
     app = Flask(__name__)
     app.config.from_object(Config)
+    app.json = FastJSONProvider(app)
     
     # Inițializează extensiile
     db.init_app(app)
@@ -20,14 +29,40 @@ def create_app():
     login_manager.init_app(app)
     login_manager.login_view = 'main.login_page'
     login_manager.login_message = 'Te rugăm să te autentifici pentru a accesa această pagină.'
+    job_queue.init_app(app)
+    scheduler.init_app(app)
+    assets.init_app(app)
+    fragment_cache.init_app(app)
+    cache.init_app(app)
+    leaderboard_hub.init_app(app)
+    notification_hub.init_app(app)
     
     # Creează tabelele în baza de date
     with app.app_context():
         db.create_all()
+        # create_all nu modifică tabelele existente: coloanele noi se adaugă cu `flask db upgrade-columns`
+        from app.schema_upgrade import missing_columns
+        with db.engine.connect() as connection:
+            missing = missing_columns(connection)
+        if missing:
+            # Doar avertisment: aplicația trebuie să pornească pentru a rula comanda
+            print("⚠️  Lipsesc coloane din baza de date ("
+                  + ', '.join(f'{c.table.name}.{c.name}' for c in missing)
+                  + "). Rulează: flask db upgrade-columns")
+        # Înregistrează (o singură dată) de când se aplică procesarea asincronă a quiz-urilor
+        from app.quiz_pipeline import requeue_since
+        requeue_since()
+        # Pe o bază nouă, recapitularea se actualizează direct (nu există istoric de preluat)
+        from app.review import init_live_updates
+        init_live_updates()
         print("✅ Baza de date inițializată cu succes!")
     
     # Înregistrează rutele
     from app.routes import main
     app.register_blueprint(main)
     
+    # Înregistrează comenzile CLI
+    from app.commands import register_commands
+    register_commands(app)
+    
     return app
\ No newline at end of file
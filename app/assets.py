@@ -0,0 +1,337 @@
+"""Pipeline pentru fișierele statice: minificare, amprentă în nume, precompresie.
+
+`flask assets build` produce în app/static/dist:
+  - câte o copie minificată pentru fiecare fișier din static/css și static/js,
+    cu hash-ul conținutului în nume (css/style.3f2a1b9c.css);
+  - pachetele per pagină cu CSS / JS-ul inline din șabloane (blocurile
+    <style> / <script> fără atribute și fără sintaxă Jinja; blocurile
+    consecutive dintr-o pagină sunt concatenate într-un singur fișier);
+  - variantele .gz (și .br, dacă modulul brotli e instalat);
+  - manifest.json cu asocierile și raportul de dimensiuni.
+
+La rulare, dacă manifestul există:
+  - url_for('static', filename=...) din șabloane întoarce fișierul cu amprentă;
+  - loader-ul de șabloane înlocuiește blocurile inline cu <link> / <script src>
+    către pachet, doar dacă hash-ul conținutului se regăsește în manifest
+    (un șablon modificat după build rămâne inline, deci corect);
+  - /assets/<fișier> servește varianta precomprimată acceptată de browser, cu
+    Cache-Control: immutable (numele se schimbă odată cu conținutul).
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+from flask import Blueprint, current_app, request, send_from_directory, url_for as flask_url_for
+from jinja2 import BaseLoader
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CACHE_MAX_AGE = 365 * 24 * 3600
+MANIFEST_NAME = 'manifest.json'
+HASH_LENGTH = 10
+
+_INLINE_RE = re.compile(r'<(style|script)(\s[^>]*)?>(.*?)</\1\s*>', re.S | re.I)
+_JINJA_MARKERS = ('{{', '{%', '{#')
+# Ce nu are voie să apară între două blocuri ca să fie concatenate în același pachet
+_RUN_BREAKERS = {
+    'style': re.compile(r'{%|<style|<link', re.I),
+    'script': re.compile(r'{%|<script', re.I),
+}
+_EXTENSIONS = {'style': 'css', 'script': 'js'}
+
+
+# ==================== MINIFICARE ====================
+
+_CSS_TOKEN_RE = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|(/\*.*?\*/)|(\s+)|([^"\'/\s]+|/)', re.S)
+_CSS_TIGHT = set('{};,>')
+
+
+def minify_css(source):
+    """Elimină comentariile și spațiile inutile (șirurile de caractere rămân neatinse)"""
+    tokens = []
+    pending_space = False
+    for string, comment, space, other in _CSS_TOKEN_RE.findall(source):
+        if comment or space:
+            pending_space = bool(tokens)
+            continue
+        token = string or other
+        if pending_space and token[0] not in _CSS_TIGHT and tokens[-1][-1] not in _CSS_TIGHT \
+                and tokens[-1][-1] != ':':
+            tokens.append(' ')
+        if not string and token[0] == '}' and tokens and tokens[-1].endswith(';') \
+                and tokens[-1][0] not in '"\'':
+            tokens[-1] = tokens[-1][:-1]
+        pending_space = False
+        tokens.append(token)
+    return ''.join(tokens)
+
+
+def _count_backticks(line):
+    return len(re.findall(r'(?<!\\)`', line))
+
+
+def minify_js(source):
+    """Minificare conservatoare: indentare, linii goale și comentarii pe linie proprie.
+
+    Nu rescrie expresii (fără riscuri cu ASI sau literali regex); liniile din
+    interiorul template literal-urilor rămân neschimbate.
+    """
+    lines = []
+    in_template = False
+    in_comment = False
+    for line in source.splitlines():
+        if in_template:
+            lines.append(line)
+        else:
+            stripped = line.strip()
+            if in_comment:
+                in_comment = '*/' not in stripped
+                continue
+            if not stripped or stripped.startswith('//'):
+                continue
+            if stripped.startswith('/*'):
+                in_comment = '*/' not in stripped
+                if not in_comment and stripped.endswith('*/'):
+                    continue
+                if in_comment:
+                    continue
+            lines.append(stripped)
+        if _count_backticks(line) % 2:
+            in_template = not in_template
+    return '\n'.join(lines)
+
+
+_MINIFIERS = {'css': minify_css, 'js': minify_js}
+
+
+# ==================== EXTRAGEREA BLOCURILOR INLINE ====================
+
+def _extractable(match):
+    return not (match.group(2) or '').strip() and not any(m in match.group(3) for m in _JINJA_MARKERS)
+
+
+def inline_runs(source):
+    """Grupurile de blocuri inline care pot fi mutate într-un pachet.
+
+    Returnează o listă de (tip, [match-uri]); un grup se întrerupe la orice
+    tag Jinja sau la un alt bloc de același tip care rămâne inline, pentru a
+    păstra ordinea de execuție și condițiile din șablon.
+    """
+    runs = []
+    open_runs = {}
+    for match in _INLINE_RE.finditer(source):
+        kind = match.group(1).lower()
+        current = open_runs.get(kind)
+        if not _extractable(match):
+            open_runs.pop(kind, None)
+            continue
+        if current and not _RUN_BREAKERS[kind].search(source, current[-1].end(), match.start()):
+            current.append(match)
+        else:
+            current = [match]
+            open_runs[kind] = current
+            runs.append((kind, current))
+    return runs
+
+
+def bundle_key(matches):
+    raw = '\n'.join(match.group(3) for match in matches)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest(), raw
+
+
+def _reference_tag(kind, filename):
+    url = "{{ asset_url('%s') }}" % filename
+    if kind == 'style':
+        return f'<link rel="stylesheet" href="{url}">'
+    return f'<script src="{url}"></script>'
+
+
+# ==================== PIPELINE ====================
+
+class AssetPipeline:
+    """Manifestul construit + integrarea cu Flask (url_for, loader de șabloane, ruta /assets)"""
+
+    def __init__(self):
+        self.app = None
+        self.directory = None
+        self.manifest = None
+
+    def init_app(self, app):
+        self.app = app
+        self.directory = app.config.get('ASSETS_DIST') or os.path.join(app.static_folder, 'dist')
+        app.extensions['assets'] = self
+        app.register_blueprint(assets_bp)
+
+        if app.config.get('ASSETS_ENABLED', True):
+            self.load()
+        app.jinja_env.loader = _AssetTemplateLoader(app.jinja_env.loader, self)
+        app.jinja_env.globals['url_for'] = self.url_for
+        app.jinja_env.globals['asset_url'] = self.asset_url
+
+    def load(self):
+        path = os.path.join(self.directory, MANIFEST_NAME)
+        if os.path.isfile(path):
+            with open(path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = None
+
+    def asset_url(self, filename):
+        return flask_url_for('assets.serve', filename=filename)
+
+    def url_for(self, endpoint, **values):
+        """url_for pentru șabloane: fișierele statice construite primesc numele cu amprentă"""
+        if endpoint == 'static' and self.manifest:
+            built = self.manifest['files'].get(values.get('filename'))
+            if built:
+                values.pop('filename')
+                return flask_url_for('assets.serve', filename=built, **values)
+        return flask_url_for(endpoint, **values)
+
+    def rewrite(self, source):
+        """Înlocuiește blocurile inline construite cu referințe către pachete"""
+        if not self.manifest:
+            return source
+        bundles = self.manifest['bundles']
+        replacements = []
+        for kind, matches in inline_runs(source):
+            built = bundles.get(bundle_key(matches)[0])
+            if built:
+                # Primul bloc devine referința către pachet, celelalte dispar
+                replacements.append((matches[0], _reference_tag(kind, built)))
+                replacements.extend((match, '') for match in matches[1:])
+        if not replacements:
+            return source
+
+        pieces = []
+        position = 0
+        for match, replacement in sorted(replacements, key=lambda item: item[0].start()):
+            pieces.append(source[position:match.start()])
+            pieces.append(replacement)
+            position = match.end()
+        pieces.append(source[position:])
+        return ''.join(pieces)
+
+    # ---------- build ----------
+
+    def _write(self, relative_name, content, ext):
+        """Scrie varianta minificată + precomprimatele; întoarce (nume, dimensiuni)"""
+        data = _MINIFIERS[ext](content).encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        stem, _ = os.path.splitext(relative_name)
+        name = f'{stem}.{digest}.{ext}'
+        path = os.path.join(self.directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        sizes = {'source': len(content.encode('utf-8')), 'minified': len(data)}
+        with open(path, 'wb') as f:
+            f.write(data)
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        with open(path + '.gz', 'wb') as f:
+            f.write(compressed)
+        sizes['gzip'] = len(compressed)
+        if brotli is not None:
+            compressed = brotli.compress(data, quality=11)
+            with open(path + '.br', 'wb') as f:
+                f.write(compressed)
+            sizes['brotli'] = len(compressed)
+        return name, sizes
+
+    def build(self):
+        """Construiește fișierele și manifestul; întoarce manifestul (cu raportul)"""
+        app = self.app
+        manifest = {'files': {}, 'bundles': {}, 'report': {'files': {}, 'pages': {}}}
+
+        for folder, ext in (('css', 'css'), ('js', 'js')):
+            source_dir = os.path.join(app.static_folder, folder)
+            if not os.path.isdir(source_dir):
+                continue
+            for filename in sorted(os.listdir(source_dir)):
+                if not filename.endswith('.' + ext):
+                    continue
+                with open(os.path.join(source_dir, filename), encoding='utf-8') as f:
+                    content = f.read()
+                relative = f'{folder}/{filename}'
+                name, sizes = self._write(relative, content, ext)
+                manifest['files'][relative] = name
+                manifest['report']['files'][relative] = dict(sizes, output=name)
+
+        template_dir = os.path.join(app.root_path, app.template_folder)
+        for template in sorted(os.listdir(template_dir)):
+            if not template.endswith('.html'):
+                continue
+            with open(os.path.join(template_dir, template), encoding='utf-8') as f:
+                source = f.read()
+            page = os.path.splitext(template)[0]
+            outputs = []
+            for number, (kind, matches) in enumerate(inline_runs(source), start=1):
+                key, raw = bundle_key(matches)
+                ext = _EXTENSIONS[kind]
+                name, sizes = self._write(f'pages/{page}-{number}.{ext}', raw, ext)
+                manifest['bundles'][key] = name
+                outputs.append(dict(sizes, output=name))
+            if outputs:
+                self.manifest = manifest
+                before = len(source.encode('utf-8'))
+                after = len(self.rewrite(source).encode('utf-8'))
+                manifest['report']['pages'][template] = {
+                    'html_before': before, 'html_after': after, 'saved': before - after, 'bundles': outputs
+                }
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        self.manifest = manifest
+        # Șabloanele deja compilate conțin încă varianta veche
+        if app.jinja_env.cache is not None:
+            app.jinja_env.cache.clear()
+        return manifest
+
+
+class _AssetTemplateLoader(BaseLoader):
+    """Loader care aplică AssetPipeline.rewrite pe sursa fiecărui șablon"""
+
+    def __init__(self, wrapped, pipeline):
+        self.wrapped = wrapped
+        self.pipeline = pipeline
+
+    def get_source(self, environment, template):
+        source, filename, uptodate = self.wrapped.get_source(environment, template)
+        return self.pipeline.rewrite(source), filename, uptodate
+
+    def list_templates(self):
+        return self.wrapped.list_templates()
+
+
+assets_bp = Blueprint('assets', __name__)
+
+
+@assets_bp.route('/assets/<path:filename>')
+def serve(filename):
+    """Fișier construit, în varianta precomprimată acceptată de client"""
+    directory = current_app.extensions['assets'].directory
+    mimetype = mimetypes.guess_type(filename)[0]
+    encoding = None
+    served = filename
+    for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+        path = safe_join(directory, filename + suffix)
+        if request.accept_encodings[candidate] and path and os.path.isfile(path):
+            encoding, served = candidate, filename + suffix
+            break
+
+    response = send_from_directory(directory, served, mimetype=mimetype, max_age=CACHE_MAX_AGE)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Cache-Control'] = f'public, max-age={CACHE_MAX_AGE}, immutable'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+assets = AssetPipeline()
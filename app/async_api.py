@@ -0,0 +1,369 @@
+"""Aplicația ASGI: endpoint-urile de citire cele mai solicitate, pe un engine async.
+
+AsyncAPI servește direct, fără thread blocat pe conexiunea la baza de date:
+  GET /api/lessons            - lecțiile publicate (filtre level / category),
+                                din catalog.published_lessons (cache-ul rutei Flask);
+  GET /api/leaderboard/global - clasamentul studenților, paginat;
+  GET /api/progress/summary   - rândul user_stats al utilizatorului;
+  GET /api/meetings           - întâlnirile utilizatorului;
+  GET /api/leaderboard/stream - clasamentul în timp real (SSE);
+  GET /api/notifications/poll - long-poll-ul notificărilor.
+
+Conexiunile SSE și long-poll-urile stau deschise mult: sub serve.py
+(gthread) fiecare ține un thread de worker, aici doar o corutină care
+așteaptă hub-ul procesului (app/leaderboard_stream.py, app/notifications.py).
+Conexiunea la baza de date se eliberează cât timp se așteaptă; doar prima
+conexiune SSE din proces încarcă clasamentul, într-un thread din pool.
+
+Răspunsurile au același JSON ca rutele Flask echivalente, iar modelele sunt
+aceleași (select() pe clasele din app.models, printr-un AsyncSession).
+Engine-ul async folosește aiomysql în locul PyMySQL (sau aiosqlite, pentru
+DATABASE_URL sqlite:// din teste); ASYNC_DATABASE_URL îl poate suprascrie.
+
+Autentificarea citește cookie-ul de sesiune Flask (semnat cu SECRET_KEY) și
+id-ul pus de Flask-Login. Orice altceva - alte rute, POST-uri, cereri fără
+sesiune validă (cookie "remember me", redirect la login) sau un rând
+user_stats încă necreat - trece neschimbat la aplicația Flask, rulată prin
+WsgiToAsgi în thread-urile asgiref.
+
+    uvicorn asgi:app --workers 4 --port 5000
+"""
+import asyncio
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qsl
+
+from asgiref.wsgi import WsgiToAsgi
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+
+from app import catalog
+from app.leaderboard_stream import leaderboard_hub, format_event, RETRY_MS
+from app.models import User, Meeting, UserProgress, UserStats, Notification, NotificationCounter
+from app.notifications import notification_hub, POLL_LIMIT
+
+ASYNC_DRIVERS = {'mysql': 'mysql+aiomysql', 'sqlite': 'sqlite+aiosqlite'}
+
+_routes = {}
+_streams = {}
+
+
+def async_database_url(url):
+    """URL-ul engine-ului sincron, cu driverul async corespunzător"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'Nu există driver async pentru {backend}')
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+def route(path):
+    """Înregistrează un handler async pentru GET `path`"""
+    def decorator(handler):
+        _routes[path] = handler
+        return handler
+    return decorator
+
+
+def stream_route(path):
+    """Înregistrează un handler async care trimite singur răspunsul (conexiuni de durată)"""
+    def decorator(handler):
+        _streams[path] = handler
+        return handler
+    return decorator
+
+
+class Args(dict):
+    """Parametrii din query string, cu același get(name, default, type) ca request.args"""
+
+    def get(self, name, default=None, type=None):
+        if name not in self:
+            return default
+        if type is None:
+            return self[name]
+        try:
+            return type(self[name])
+        except ValueError:
+            return default
+
+
+# ==================== HANDLERE ====================
+# Fiecare primește (api, session, user, args) și întoarce (status, payload) sau
+# None pentru a lăsa cererea aplicației Flask.
+
+@route('/api/lessons')
+async def lessons(api, session, user, args):
+    # Aceeași listă (și aceeași ordine) ca ruta Flask, din cache-ul comun; doar un miss citește baza
+    rows = await api.run_sync(catalog.published_lessons, args.get('level', 'all'), args.get('category', 'all'))
+    return 200, {'success': True, 'lessons': rows, 'count': len(rows)}
+
+
+@route('/api/leaderboard/global')
+async def global_leaderboard(api, session, user, args):
+    page = args.get('page', 1, type=int)
+    per_page = args.get('per_page', 100, type=int)
+
+    total = await session.scalar(select(func.count(User.id)).filter_by(role='user'))
+    users = (await session.scalars(
+        select(User).filter_by(role='user').order_by(User.points.desc())
+        .limit(per_page).offset((page - 1) * per_page)
+    )).all()
+
+    current_user_rank = None
+    if user.role == 'user':
+        users_above = await session.scalar(
+            select(func.count(User.id)).where(User.role == 'user', User.points > user.points)
+        )
+        current_user_rank = users_above + 1
+
+    # Lecțiile terminate ale întregii pagini, într-o singură interogare
+    completed = dict((await session.execute(
+        select(UserProgress.user_id, func.count(UserProgress.id))
+        .where(UserProgress.user_id.in_([u.id for u in users]), UserProgress.status == 'completed')
+        .group_by(UserProgress.user_id)
+    )).all()) if users else {}
+
+    leaderboard = [{
+        'rank': idx,
+        'user_id': u.id,
+        'name': u.get_full_name(),
+        'points': u.points,
+        'lessons_completed': completed.get(u.id, 0),
+        'is_current_user': u.id == user.id
+    } for idx, u in enumerate(users, start=(page - 1) * per_page + 1)]
+
+    return 200, {
+        'success': True,
+        'leaderboard': leaderboard,
+        'current_user_rank': current_user_rank,
+        'total_users': total,
+        'page': page,
+        'per_page': per_page
+    }
+
+
+@route('/api/progress/summary')
+async def progress_summary(api, session, user, args):
+    stats = await session.get(UserStats, user.id)
+    if stats is None:
+        # Rândul se creează la prima citire, în codul sincron (user_stats.get_stats)
+        return None
+    return 200, {'success': True, 'stats': dict(stats.to_dict(), total_points=user.points)}
+
+
+@route('/api/meetings')
+async def meetings(api, session, user, args):
+    statement = select(Meeting).options(selectinload(Meeting.student), selectinload(Meeting.professor))
+    if user.role == 'professor':
+        statement = statement.filter_by(professor_id=user.id)
+    else:
+        statement = statement.filter_by(student_id=user.id)
+
+    rows = (await session.scalars(statement.order_by(Meeting.meeting_date.desc()))).all()
+    return 200, {'success': True, 'meetings': [meeting.to_dict() for meeting in rows]}
+
+
+@route('/api/notifications/poll')
+async def poll_notifications(api, session, user, args):
+    since = args.get('since', 0, type=int)
+    timeout = args.get('timeout', notification_hub.poll_timeout, type=float)
+    timeout = min(max(timeout, 0), notification_hub.poll_timeout)
+
+    latest = notification_hub.cached_latest(user.id)
+    if latest is None:
+        latest = notification_hub.remember_latest(user.id, await session.scalar(
+            select(func.max(Notification.id)).where(Notification.user_id == user.id)
+        ))
+    if latest <= since and timeout > 0:
+        # Conexiunea la baza de date se eliberează cât timp cererea așteaptă
+        await session.close()
+        latest = await notification_hub.wait_async(user.id, since, timeout)
+
+    items = (await session.scalars(
+        select(Notification).where(Notification.user_id == user.id, Notification.id > since)
+        .order_by(Notification.id).limit(POLL_LIMIT)
+    )).all() if latest > since else []
+
+    unread = notification_hub.cached_unread(user.id)
+    if unread is None:
+        unread = notification_hub.remember_unread(user.id, await session.get(NotificationCounter, user.id))
+
+    return 200, {
+        'success': True,
+        'notifications': [n.to_dict() for n in items],
+        'unread': unread,
+        'last_id': max(latest, since)
+    }
+
+
+# ==================== STREAM-URI ====================
+# Primesc (api, user, args, send) și trimit singure răspunsul; sunt anulate
+# când clientul închide conexiunea.
+
+@stream_route('/api/leaderboard/stream')
+async def leaderboard_stream(api, user, args, send):
+    top = args.get('top', 25, type=int)
+    subscription = await api.run_sync(leaderboard_hub.subscribe, user.id, top)
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ]
+        })
+        await api.send_chunk(send, f'retry: {RETRY_MS}\n\n')
+        while True:
+            item = await subscription.wait_async(leaderboard_hub.heartbeat)
+            # Comentariul SSE ține conexiunea deschisă prin proxy-uri
+            await api.send_chunk(send, format_event(*item) if item else ': ping\n\n')
+    finally:
+        leaderboard_hub.unsubscribe(subscription)
+
+
+# ==================== APLICAȚIA ASGI ====================
+
+class AsyncAPI:
+    """Aplicație ASGI: handlerele de mai sus + aplicația Flask pentru restul cererilor"""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.fallback = WsgiToAsgi(flask_app)
+        config = flask_app.config
+        self.engine = create_async_engine(
+            config.get('ASYNC_DATABASE_URL') or async_database_url(config['SQLALCHEMY_DATABASE_URI']),
+            pool_size=config.get('ASYNC_POOL_SIZE', 20),
+            max_overflow=config.get('ASYNC_MAX_OVERFLOW', 10),
+            pool_recycle=3600
+        )
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+        self.cookie_name = flask_app.config['SESSION_COOKIE_NAME']
+        self.stats = {'async': 0, 'fallback': 0, 'errors': 0}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            stream = _streams.get(scope['path'])
+            user = await self._stream_user(scope) if stream else None
+            if user is not None:
+                self.stats['async'] += 1
+                return await self._stream(stream, user, scope, receive, send)
+
+            handler = _routes.get(scope['path'])
+            user_id = self._session_user_id(scope) if handler else None
+            if user_id is not None:
+                response = await self._handle(handler, user_id, scope)
+                if response is not None:
+                    self.stats['async'] += 1
+                    return await self._send_json(send, *response)
+
+        self.stats['fallback'] += 1
+        await self.fallback(scope, receive, send)
+
+    def _session_user_id(self, scope):
+        """Id-ul utilizatorului din cookie-ul de sesiune Flask (None dacă lipsește / e invalid)"""
+        header = b'; '.join(value for name, value in scope['headers'] if name == b'cookie')
+        if not header or self.serializer is None:
+            return None
+        cookie = SimpleCookie()
+        cookie.load(header.decode('latin-1'))
+        morsel = cookie.get(self.cookie_name)
+        if morsel is None:
+            return None
+        try:
+            data = self.serializer.loads(
+                morsel.value,
+                max_age=int(self.flask_app.permanent_session_lifetime.total_seconds())
+            )
+            return int(data['_user_id'])
+        except Exception:
+            return None
+
+    async def _handle(self, handler, user_id, scope):
+        args = Args(parse_qsl(scope['query_string'].decode('latin-1')))
+        async with self.sessions() as session:
+            try:
+                user = await session.get(User, user_id)
+                if user is None:
+                    return None
+                return await handler(self, session, user, args)
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"Eroare la {scope['path']} (async): {str(e)}")
+                return 500, {'success': False, 'error': 'A apărut o eroare.'}
+
+    async def _stream_user(self, scope):
+        """Utilizatorul sesiunii, citit cu o sesiune închisă imediat (stream-ul nu ține conexiunea)"""
+        user_id = self._session_user_id(scope)
+        if user_id is None:
+            return None
+        async with self.sessions() as session:
+            return await session.get(User, user_id)
+
+    async def _stream(self, handler, user, scope, receive, send):
+        args = Args(parse_qsl(scope['query_string'].decode('latin-1')))
+        started = []
+
+        async def tracked_send(message):
+            if message['type'] == 'http.response.start':
+                started.append(True)
+            await send(message)
+
+        task = asyncio.ensure_future(handler(self, user, args, tracked_send))
+        disconnected = asyncio.ensure_future(self._wait_disconnect(receive))
+        try:
+            await asyncio.wait({task, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for future in (task, disconnected):
+                future.cancel()
+            await asyncio.gather(task, disconnected, return_exceptions=True)
+        if task.done() and not task.cancelled() and task.exception() is not None:
+            self.stats['errors'] += 1
+            print(f"Eroare la {scope['path']} (async): {str(task.exception())}")
+            if not started:
+                await self._send_json(send, 500, {'success': False, 'error': 'A apărut o eroare.'})
+
+    @staticmethod
+    async def _wait_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    async def run_sync(self, function, *args):
+        """Rulează cod sincron (db.session) într-un thread din pool, în contextul aplicației Flask"""
+        def call():
+            with self.flask_app.app_context():
+                return function(*args)
+        return await asyncio.to_thread(call)
+
+    @staticmethod
+    async def send_chunk(send, text):
+        await send({'type': 'http.response.body', 'body': text.encode('utf-8'), 'more_body': True})
+
+    async def _send_json(self, send, status, payload):
+        body = self.flask_app.json.encode(payload)
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode()),
+                (b'vary', b'Cookie'),
+            ]
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
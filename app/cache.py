@@ -0,0 +1,427 @@
+"""Cache pentru rezultatele interogărilor și răspunsurile rutelor, cu tag-uri.
+
+Fiecare intrare poartă tag-uri (ex. 'lessons', 'plans', 'quiz:12'). Un
+commit care modifică modelul asociat unui tag (vezi INVALIDARE, la final)
+incrementează versiunea tag-ului; intrările salvate cu o versiune mai veche
+sunt tratate ca lipsă la următoarea citire. Modificările făcute prin
+UPDATE-uri Core (fără ORM) nu trec prin on_commit - acolo limita este TTL-ul.
+
+Backend-uri (CACHE_BACKEND):
+  - 'memory' - în proces, TTL + LRU (CACHE_MAX_ENTRIES). Invalidarea prin
+    tag-uri e locală procesului: ceilalți worker-i văd modificarea după TTL;
+  - 'redis'  - CACHE_URL; valorile sunt serializate cu pickle, iar
+    versiunile tag-urilor sunt comune tuturor proceselor. RedisBackend
+    primește orice client cu API-ul redis-py (get / set / mget / delete /
+    incr), deci și un înlocuitor local precum fakeredis.FakeRedis().
+
+La un miss, o singură cerere (per proces și, pe Redis, per cluster - printr-un
+lock SET NX) recalculează valoarea; celelalte o așteaptă, cel mult
+CACHE_LOCK_TIMEOUT secunde, în loc să ruleze aceeași interogare simultan.
+
+    @cache.memoize(ttl=300, tags=('badges',))
+    def badges(): ...
+
+    @main.route('/api/professors')
+    @cache.cached_route(ttl=60, tags=('professors',))
+    def api_get_professors(): ...
+"""
+import functools
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, request
+from flask_login import current_user
+from sqlalchemy import inspect
+
+from app.events import on_commit
+from app.models import Lesson, User, SubscriptionPlan, Badge, Quiz, Question
+
+MISS = object()
+
+_TAG_PREFIX = 'tag:'
+_LOCK_PREFIX = 'lock:'
+
+
+class _Uncacheable(Exception):
+    """Răspuns care nu se salvează în cache (status diferit de 200)"""
+
+    def __init__(self, response):
+        self.response = response
+
+
+# ==================== BACKEND-URI ====================
+
+class MemoryBackend:
+    """Dicționar în proces, cu expirare și evacuare LRU"""
+
+    name = 'memory'
+    shared = False
+
+    def __init__(self, max_entries=5000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()  # cheie -> (valoare, expiră la)
+        # Versiunile tag-urilor nu intră în LRU: evacuarea lor ar reînvia intrări invalidate
+        self._counters = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        values = []
+        with self._lock:
+            for key in keys:
+                item = self._data.get(key)
+                if item is None:
+                    values.append(MISS)
+                elif item[1] <= now:
+                    del self._data[key]
+                    values.append(MISS)
+                else:
+                    self._data.move_to_end(key)
+                    values.append(item[0])
+        return values
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def add(self, key, value, ttl):
+        """Scrie doar dacă cheia lipsește (sau a expirat); True dacă a scris"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[1] > time.monotonic():
+                return False
+        self.set(key, value, ttl)
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def counters(self, names):
+        with self._lock:
+            return [self._counters.get(name, 0) for name in names]
+
+    def incr(self, names):
+        with self._lock:
+            for name in names:
+                self._counters[name] = self._counters.get(name, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def get_stats(self):
+        return {'entries': len(self._data), 'evictions': self.evictions, 'tags': len(self._counters)}
+
+
+class RedisBackend:
+    """Redis (sau orice client cu API-ul redis-py); valorile sunt serializate cu pickle"""
+
+    name = 'redis'
+    shared = True
+
+    def __init__(self, client, prefix='em:'):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url, prefix='em:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('CACHE_BACKEND=redis necesită pachetul redis (pip install redis)')
+        return cls(redis.Redis.from_url(url), prefix)
+
+    def get_many(self, keys):
+        raw = self.client.mget([self.prefix + key for key in keys])
+        return [MISS if value is None else pickle.loads(value) for value in raw]
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), ex=max(int(ttl), 1))
+
+    def add(self, key, value, ttl):
+        return bool(self.client.set(self.prefix + key, pickle.dumps(value), ex=max(int(ttl), 1), nx=True))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def counters(self, names):
+        raw = self.client.mget([self.prefix + _TAG_PREFIX + name for name in names])
+        return [int(value) if value is not None else 0 for value in raw]
+
+    def incr(self, names):
+        for name in names:
+            self.client.incr(self.prefix + _TAG_PREFIX + name)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            if not key.decode().startswith(self.prefix + _TAG_PREFIX):
+                self.client.delete(key)
+
+    def get_stats(self):
+        try:
+            return {'evictions': self.client.info('stats').get('evicted_keys')}
+        except Exception:
+            return {}
+
+
+# ==================== CACHE ====================
+
+class Cache:
+    """Fațada folosită de aplicație: get / set / get_or_set, decoratori, invalidare pe tag-uri"""
+
+    def __init__(self):
+        self.app = None
+        self.backend = MemoryBackend()
+        self.enabled = True
+        self.default_ttl = 60
+        self.lock_timeout = 10
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'stale': 0, 'sets': 0, 'invalidations': 0,
+                      'waits': 0, 'errors': 0}
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('CACHE_ENABLED', True)
+        self.default_ttl = app.config.get('CACHE_DEFAULT_TTL', 60)
+        self.lock_timeout = app.config.get('CACHE_LOCK_TIMEOUT', 10)
+        if app.config.get('CACHE_BACKEND', 'memory') == 'redis':
+            self.backend = RedisBackend.from_url(app.config['CACHE_URL'], app.config.get('CACHE_KEY_PREFIX', 'em:'))
+        else:
+            self.backend = MemoryBackend(app.config.get('CACHE_MAX_ENTRIES', 5000))
+        app.extensions['cache'] = self
+
+    # ---------- citire / scriere ----------
+
+    def get(self, key):
+        """Valoarea salvată sau MISS (lipsă, expirată ori cu un tag invalidat între timp)"""
+        if not self.enabled:
+            return MISS
+        try:
+            entry = self.backend.get_many([key])[0]
+            if entry is not MISS:
+                value, tags, versions = entry
+                if not tags or self.backend.counters(tags) == versions:
+                    self.stats['hits'] += 1
+                    return value
+                self.stats['stale'] += 1
+        except Exception as e:
+            # Cache-ul indisponibil nu trebuie să strice cererea: se recalculează
+            self.stats['errors'] += 1
+            print(f"Eroare la citirea din cache ({key}): {str(e)}")
+        self.stats['misses'] += 1
+        return MISS
+
+    def set(self, key, value, ttl=None, tags=(), versions=None):
+        """Salvează valoarea; `versions` - versiunile tag-urilor citite înainte de calcul"""
+        if not self.enabled:
+            return
+        tags = tuple(tags)
+        try:
+            if versions is None:
+                versions = self.backend.counters(tags) if tags else []
+            self.backend.set(key, (value, tags, versions), ttl or self.default_ttl)
+            self.stats['sets'] += 1
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"Eroare la scrierea în cache ({key}): {str(e)}")
+
+    def delete(self, key):
+        self.backend.delete(key)
+
+    def invalidate(self, *tags):
+        """Invalidează toate intrările care poartă unul din tag-uri"""
+        if not tags:
+            return
+        try:
+            self.backend.incr(tags)
+            self.stats['invalidations'] += len(tags)
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"Eroare la invalidarea cache-ului ({', '.join(tags)}): {str(e)}")
+
+    def clear(self):
+        self.backend.clear()
+
+    def get_or_set(self, key, producer, ttl=None, tags=()):
+        """Valoarea din cache sau producer(), calculată o singură dată pentru cererile simultane"""
+        value = self.get(key)
+        if value is not MISS or not self.enabled:
+            return value if value is not MISS else producer()
+
+        with self._lock:
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self._inflight[key] = threading.Event()
+
+        if not leader:
+            # Altă cerere din proces calculează deja valoarea
+            self.stats['waits'] += 1
+            event.wait(self.lock_timeout)
+            value = self.get(key)
+            return value if value is not MISS else producer()
+
+        locked = False
+        try:
+            if self.backend.shared:
+                locked = self._acquire(key)
+                if not locked:
+                    value = self._wait_for(key)
+                    if value is not MISS:
+                        return value
+            tags = tuple(tags)
+            # Versiunile se citesc înainte de calcul: o invalidare din timpul lui nu se pierde
+            versions = self.backend.counters(tags) if tags else []
+            value = producer()
+            self.set(key, value, ttl, tags, versions)
+            return value
+        finally:
+            if locked:
+                self.backend.delete(_LOCK_PREFIX + key)
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def _acquire(self, key):
+        try:
+            return self.backend.add(_LOCK_PREFIX + key, 1, self.lock_timeout)
+        except Exception:
+            return False
+
+    def _wait_for(self, key):
+        """Așteaptă valoarea calculată de alt proces (cel mult lock_timeout secunde)"""
+        self.stats['waits'] += 1
+        deadline = time.monotonic() + self.lock_timeout
+        delay = 0.01
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            delay = min(delay * 2, 0.2)
+            value = self.get(key)
+            if value is not MISS:
+                return value
+        return MISS
+
+    # ---------- decoratori ----------
+
+    def memoize(self, ttl=None, tags=(), key=None):
+        """Cache pentru rezultatul unei funcții, după argumente.
+
+        tags - tuplu sau funcție (*args, **kwargs) -> tag-uri
+        key  - funcție (*args, **kwargs) -> cheie (implicit modul.funcție:argumente)
+        """
+        def decorator(func):
+            prefix = f'{func.__module__}.{func.__qualname__}'
+
+            def make_key(*args, **kwargs):
+                if key is not None:
+                    return key(*args, **kwargs)
+                parts = [repr(arg) for arg in args] + [f'{k}={v!r}' for k, v in sorted(kwargs.items())]
+                return f"{prefix}:{':'.join(parts)}"
+
+            def make_tags(*args, **kwargs):
+                return tags(*args, **kwargs) if callable(tags) else tags
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                return self.get_or_set(make_key(*args, **kwargs), lambda: func(*args, **kwargs),
+                                       ttl, make_tags(*args, **kwargs))
+
+            wrapper.make_key = make_key
+            wrapper.make_tags = make_tags
+            wrapper.uncached = func
+            return wrapper
+        return decorator
+
+    def cached_route(self, ttl=None, tags=(), per_user=False):
+        """Cache pentru răspunsurile GET 200 ale unei rute (cheia: endpoint + parametri).
+
+        Răspunsurile în flux nu se pun în cache: ar trebui citite complet aici,
+        iar un flux întrerupt de o eroare (200 cu corp trunchiat) ar rămâne în
+        cache până la TTL. Pentru astfel de rute se memoizează lista de rânduri.
+        """
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method != 'GET':
+                    return view(*args, **kwargs)
+
+                params = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+                key = f'route:{request.endpoint}:{params}'
+                if per_user:
+                    key += f':user={current_user.get_id()}'
+
+                def produce():
+                    response = current_app.make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.is_streamed:
+                        raise _Uncacheable(response)
+                    return response.get_data(), response.mimetype
+
+                try:
+                    body, mimetype = self.get_or_set(key, produce, ttl, tags)
+                except _Uncacheable as e:
+                    return e.response
+                return current_app.response_class(body, status=200, mimetype=mimetype)
+            return wrapper
+        return decorator
+
+    def get_stats(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        return dict(
+            self.stats,
+            backend=self.backend.name,
+            hit_rate=round(self.stats['hits'] / lookups, 3) if lookups else None,
+            **self.backend.get_stats()
+        )
+
+
+cache = Cache()
+
+
+def invalidate_on_commit(*models, tags, fields=None, snapshot=None):
+    """Invalidează tag-urile după commit-urile care modifică modelele date.
+
+    tags - tuplu sau funcție (change) -> tag-uri (change.data = snapshot(obj))
+    """
+    @on_commit(*models, fields=fields, snapshot=snapshot)
+    def _invalidate(changes):
+        names = set()
+        for change in changes:
+            names.update(tags(change) if callable(tags) else tags)
+        cache.invalidate(*sorted(names))
+    return _invalidate
+
+
+# ==================== INVALIDARE ====================
+
+# Vizualizările (views / completions) nu invalidează listele: apar cu întârziere de cel mult TTL
+invalidate_on_commit(Lesson, tags=('lessons',),
+                     fields=('title', 'description', 'content', 'level', 'category', 'status', 'image_url',
+                             'duration_minutes', 'difficulty', 'rating', 'total_ratings', 'professor_id'))
+
+def _is_or_was_professor(user):
+    return user.role == 'professor' or 'professor' in inspect(user).attrs.role.history.deleted
+
+
+# Numele profesorului apare și în listele de lecții
+invalidate_on_commit(User, tags=lambda change: ('professors', 'lessons') if change.data else (),
+                     fields=('first_name', 'last_name', 'role', 'bio', 'specialization', 'email',
+                             'rating', 'total_reviews', 'is_available'),
+                     snapshot=_is_or_was_professor)
+
+invalidate_on_commit(SubscriptionPlan, tags=('plans',))
+
+invalidate_on_commit(Badge, tags=('badges',))
+
+invalidate_on_commit(Question, tags=lambda change: (f'quiz:{change.data}',),
+                     snapshot=lambda question: question.quiz_id)
+
+invalidate_on_commit(Quiz, tags=lambda change: (f'quiz:{change.id}',))
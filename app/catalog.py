@@ -0,0 +1,74 @@
+"""Cataloage citite la aproape fiecare cerere și modificate rar.
+
+  - badges()            - toate badge-urile (check_and_award_badges);
+  - active_plans()      - planurile de abonament active, după preț;
+  - answer_key(quiz_id) - baremul unui quiz: {question_id: (răspuns, puncte)};
+  - answer_keys(ids)    - baremele mai multor quiz-uri, într-o singură interogare;
+  - published_lessons() - lecțiile publicate (filtre level / category), ca dicționare.
+
+Badge-urile și planurile stau în cache (app/cache.py) sub tag-urile 'badges'
+și 'plans', invalidate la commit-urile pe Badge / SubscriptionPlan, și sunt
+încălzite înainte de fork de warmup.py; sunt obiecte detașate de sesiune,
+partajate de toate cererile. Lista de lecții stă sub tag-ul 'lessons', deja
+serializată (to_dict), ca /api/lessons să o trimită fără interogări.
+
+Baremul NU stă în cache: cu backend-ul 'memory', invalidarea e locală
+procesului, deci o corectură la correct_answer / points ar fi ignorată de
+ceilalți worker-i până la expirarea TTL-ului - iar notele s-ar calcula după
+baremul vechi. Citirea lui este o singură interogare pe ix_questions_quiz_id.
+"""
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+
+from app.cache import cache
+from app.models import db, Badge, SubscriptionPlan, Question, Lesson
+
+
+def _detached(statement):
+    # Sesiune separată: obiectele din sesiunea cererii curente rămân neatinse
+    with Session(db.engine) as session:
+        rows = tuple(session.scalars(statement))
+        session.expunge_all()
+    return rows
+
+
+@cache.memoize(tags=('badges',), key=lambda: 'catalog:badges')
+def badges():
+    return _detached(select(Badge).order_by(Badge.id))
+
+
+@cache.memoize(tags=('plans',), key=lambda: 'catalog:plans')
+def active_plans():
+    return _detached(select(SubscriptionPlan).filter_by(is_active=True).order_by(SubscriptionPlan.price))
+
+
+def answer_key(quiz_id):
+    """Baremul curent, citit din baza de date la fiecare apel (vezi mai sus)"""
+    rows = db.session.query(Question.id, Question.correct_answer, Question.points)\
+        .filter(Question.quiz_id == quiz_id)
+    return {question_id: (correct.upper(), points) for question_id, correct, points in rows}
+
+
+def answer_keys(quiz_ids):
+    """Baremele curente ale quiz-urilor `quiz_ids`: {quiz_id: barem}; quiz-urile fără întrebări au {}"""
+    keys = {quiz_id: {} for quiz_id in quiz_ids}
+    if not keys:
+        return keys
+    rows = db.session.query(Question.quiz_id, Question.id, Question.correct_answer, Question.points)\
+        .filter(Question.quiz_id.in_(keys))
+    for quiz_id, question_id, correct, points in rows:
+        keys[quiz_id][question_id] = (correct.upper(), points)
+    return keys
+
+
+@cache.memoize(tags=('lessons',), key=lambda level, category: f'catalog:lessons:{level}:{category}')
+def published_lessons(level, category):
+    """Lecțiile publicate, cele mai noi întâi; 'all' înseamnă fără filtru"""
+    query = Lesson.query.filter_by(status='published')
+    if level != 'all':
+        query = query.filter_by(level=level)
+    if category != 'all':
+        query = query.filter_by(category=category)
+    lessons = query.options(selectinload(Lesson.professor))\
+        .order_by(Lesson.created_at.desc(), Lesson.id.desc()).all()
+    return [lesson.to_dict() for lesson in lessons]
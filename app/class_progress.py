@@ -0,0 +1,291 @@
+"""Progresul elevilor în clase și statisticile pe clasă.
+
+O clasă nu are o listă proprie de lecții: progresul unui elev într-o clasă
+se raportează la lecțiile publicate ale profesorului clasei. Fiecare rând
+class_students ține contoarele elevului pentru lecțiile acestui profesor
+(lecții începute / terminate, quiz-uri trimise / promovate, suma scorurilor,
+ultima activitate). Rândurile sunt actualizate în aceeași tranzacție cu
+datele din care provin:
+  - lesson_detail          - lecție începută sau revizitată;
+  - quiz.apply_submission  - quiz trimis, eventual lecție terminată;
+  - înscrierea în clasă    - rândul nou este calculat din activitatea existentă;
+  - lecții publicate noi   - procentul se recalculează în clasele profesorului.
+
+Fiecare eveniment face un UPDATE atomic (col = col + delta) doar pe
+înscrierile elevului în clasele profesorului lecției (indexul
+ix_class_students_student). class_stats() citește numai rândurile
+class_students ale clasei, fără join pe quiz-uri sau progres.
+`flask classes rebuild` recalculează rândurile din datele existente.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, case, func, or_, select, update
+
+from app.models import db, Class, ClassStudent, Lesson, QuizSubmission, User, UserProgress
+
+CHUNK_SIZE = 1000
+
+# Vizitele repetate actualizează last_activity_at cel mult o dată pe oră
+ACTIVITY_RESOLUTION = timedelta(hours=1)
+
+# Criteriile pentru elevii "în risc"
+INACTIVE_DAYS = 14
+LOW_SCORE = 50
+BEHIND_MARGIN = 25
+AT_RISK_LIMIT = 50
+
+# Limitele intervalelor pentru distribuții (procente)
+BUCKETS = (20, 40, 60, 80)
+
+
+def _professor_classes(professor_id):
+    return ClassStudent.class_id.in_(select(Class.id).where(Class.professor_id == professor_id))
+
+
+def _update(*conditions, **values):
+    db.session.execute(
+        update(ClassStudent).where(*conditions).values(**values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def published_lessons(professor_id):
+    return db.session.query(func.count(Lesson.id))\
+        .filter(Lesson.professor_id == professor_id, Lesson.status == 'published').scalar()
+
+
+def _refresh_percentage(condition, published):
+    # UPDATE separat: MySQL evaluează SET de la stânga la dreapta, cu valorile deja modificate
+    if not published:
+        value = 0.0
+    else:
+        value = case((ClassStudent.lessons_completed >= published, 100.0),
+                     else_=ClassStudent.lessons_completed * 100.0 / published)
+    _update(condition, progress_percentage=value)
+
+
+# ==================== RECONSTRUIRE ====================
+
+def compute(student_id, professor_id):
+    """Valorile rândului unei înscrieri, calculate din UserProgress și QuizSubmission"""
+    published = select(Lesson.id).where(Lesson.professor_id == professor_id, Lesson.status == 'published')
+    started, completed, last_accessed = db.session.query(
+        func.count(UserProgress.id),
+        func.coalesce(func.sum(case((UserProgress.status == 'completed', 1), else_=0)), 0),
+        func.max(UserProgress.last_accessed)
+    ).filter(UserProgress.user_id == student_id, UserProgress.lesson_id.in_(published),
+             UserProgress.status.in_(('in_progress', 'completed'))).one()
+
+    taken, passed, score_sum, last_submitted = db.session.query(
+        func.count(QuizSubmission.id),
+        func.coalesce(func.sum(case((QuizSubmission.passed.is_(True), 1), else_=0)), 0),
+        func.coalesce(func.sum(QuizSubmission.score), 0),
+        func.max(QuizSubmission.submitted_at)
+    ).filter(QuizSubmission.user_id == student_id,
+             QuizSubmission.lesson_id.in_(select(Lesson.id).where(Lesson.professor_id == professor_id))).one()
+
+    total = published_lessons(professor_id)
+    activity = [moment for moment in (last_accessed, last_submitted) if moment is not None]
+    return {
+        'lessons_started': started,
+        'lessons_completed': completed,
+        'progress_percentage': min(100.0, completed * 100.0 / total) if total else 0.0,
+        'quizzes_taken': taken,
+        'quizzes_passed': passed,
+        'score_sum': float(score_sum),
+        'last_activity_at': max(activity) if activity else None,
+    }
+
+
+def rebuild_all(class_id=None):
+    """Recalculează toate înscrierile (sau ale unei clase), pe bucăți; întoarce numărul lor"""
+    count = 0
+    last_id = 0
+    while True:
+        query = db.session.query(ClassStudent, Class.professor_id)\
+            .join(Class, Class.id == ClassStudent.class_id)\
+            .filter(ClassStudent.id > last_id)
+        if class_id is not None:
+            query = query.filter(ClassStudent.class_id == class_id)
+        rows = query.order_by(ClassStudent.id).limit(CHUNK_SIZE).all()
+        if not rows:
+            return count
+        for enrollment, professor_id in rows:
+            for name, value in compute(enrollment.student_id, professor_id).items():
+                setattr(enrollment, name, value)
+        last_id = rows[-1][0].id
+        db.session.commit()
+        count += len(rows)
+
+
+# ==================== EVENIMENTE ====================
+
+def enrolled(enrollment, professor_id):
+    """Înscriere nouă: pornește de la activitatea existentă a elevului la lecțiile profesorului"""
+    for name, value in compute(enrollment.student_id, professor_id).items():
+        setattr(enrollment, name, value)
+
+
+def lesson_visited(student_id, lesson, started=False):
+    """Elevul a deschis o lecție; started - primul acces (lecția devine începută)"""
+    now = datetime.utcnow()
+    enrollments = and_(ClassStudent.student_id == student_id, _professor_classes(lesson.professor_id))
+    if started and lesson.status == 'published':
+        _update(enrollments, lessons_started=ClassStudent.lessons_started + 1, last_activity_at=now)
+        return
+    _update(enrollments,
+            or_(ClassStudent.last_activity_at.is_(None),
+                ClassStudent.last_activity_at < now - ACTIVITY_RESOLUTION),
+            last_activity_at=now)
+
+
+def quiz_submitted(submission, lesson, completed=False):
+    """Quiz trimis la o lecție a profesorului; completed - lecția a devenit terminată"""
+    enrollments = and_(ClassStudent.student_id == submission.user_id, _professor_classes(lesson.professor_id))
+    moment = submission.submitted_at
+    _update(
+        enrollments,
+        quizzes_taken=ClassStudent.quizzes_taken + 1,
+        quizzes_passed=ClassStudent.quizzes_passed + (1 if submission.passed else 0),
+        score_sum=ClassStudent.score_sum + submission.score,
+        # Job-ul poate rula după o vizită mai nouă: ultima activitate nu dă înapoi
+        last_activity_at=case(
+            (or_(ClassStudent.last_activity_at.is_(None), ClassStudent.last_activity_at < moment), moment),
+            else_=ClassStudent.last_activity_at
+        )
+    )
+    if completed and lesson.status == 'published':
+        _update(enrollments, lessons_completed=ClassStudent.lessons_completed + 1)
+        _refresh_percentage(enrollments, published_lessons(lesson.professor_id))
+
+
+def lessons_changed(professor_id):
+    """S-a schimbat numărul lecțiilor publicate ale profesorului: procentul se recalculează"""
+    _refresh_percentage(_professor_classes(professor_id), published_lessons(professor_id))
+
+
+# ==================== STATISTICI ====================
+
+def _round(value, digits=1):
+    return round(float(value), digits) if value is not None else None
+
+
+def _distribution(class_id, column, *conditions):
+    """Numărul de elevi pe intervalele 0-20, 20-40, ... 80-100 ale expresiei date"""
+    bucket = case(*[(column < edge, index) for index, edge in enumerate(BUCKETS)],
+                  else_=len(BUCKETS)).label('bucket')
+    counts = dict(
+        db.session.query(bucket, func.count(ClassStudent.id))
+        .filter(ClassStudent.class_id == class_id, *conditions)
+        .group_by(bucket)
+        .all()
+    )
+    bounds = (0,) + BUCKETS + (100,)
+    return [{'range': f'{low}-{high}', 'count': counts.get(index, 0)}
+            for index, (low, high) in enumerate(zip(bounds, bounds[1:]))]
+
+
+def class_stats(cls, now=None):
+    """Mediile, distribuțiile și elevii în risc ai unei clase, din contoarele class_students"""
+    now = now or datetime.utcnow()
+    in_class = ClassStudent.class_id == cls.id
+    has_quizzes = ClassStudent.quizzes_taken > 0
+    student_score = ClassStudent.score_sum / ClassStudent.quizzes_taken
+    last_seen = ClassStudent.last_activity_at
+
+    (students, avg_progress, avg_completed, quizzes_taken, quizzes_passed, score_sum, with_quizzes,
+     avg_student_score, completed_all, not_started, active_week, active_month, never_active) = db.session.query(
+        func.count(ClassStudent.id),
+        func.avg(ClassStudent.progress_percentage),
+        func.avg(ClassStudent.lessons_completed),
+        func.sum(ClassStudent.quizzes_taken),
+        func.sum(ClassStudent.quizzes_passed),
+        func.sum(ClassStudent.score_sum),
+        func.sum(case((has_quizzes, 1), else_=0)),
+        func.avg(case((has_quizzes, student_score), else_=None)),
+        func.sum(case((ClassStudent.progress_percentage >= 100, 1), else_=0)),
+        func.sum(case((ClassStudent.lessons_started == 0, 1), else_=0)),
+        func.sum(case((last_seen >= now - timedelta(days=7), 1), else_=0)),
+        func.sum(case((last_seen >= now - timedelta(days=30), 1), else_=0)),
+        func.sum(case((last_seen.is_(None), 1), else_=0)),
+    ).filter(in_class).one()
+
+    # Criteriile de risc; cei înscriși recent nu sunt încă "inactivi"
+    inactive_before = now - timedelta(days=INACTIVE_DAYS)
+    behind_below = max(0.0, float(avg_progress or 0) - BEHIND_MARGIN)
+    criteria = {
+        'inactive': func.coalesce(last_seen, ClassStudent.joined_at) < inactive_before,
+        'low_score': and_(has_quizzes, ClassStudent.score_sum < LOW_SCORE * ClassStudent.quizzes_taken),
+    }
+    if behind_below > 0:
+        criteria['behind'] = ClassStudent.progress_percentage < behind_below
+    risk = sum((case((condition, 1), else_=0) for condition in criteria.values()), start=0).label('risk')
+
+    at_risk = or_(*criteria.values())
+    at_risk_total = db.session.query(func.count(ClassStudent.id)).filter(in_class, at_risk).scalar()
+    rows = db.session.query(ClassStudent, User.first_name, User.last_name, User.email, risk)\
+        .join(User, User.id == ClassStudent.student_id)\
+        .filter(in_class, at_risk)\
+        .order_by(risk.desc(), ClassStudent.progress_percentage, ClassStudent.id)\
+        .limit(AT_RISK_LIMIT)\
+        .all()
+
+    at_risk_students = []
+    for enrollment, first_name, last_name, email, _ in rows:
+        reasons = []
+        if (enrollment.last_activity_at or enrollment.joined_at) < inactive_before:
+            reasons.append('inactive')
+        if enrollment.quizzes_taken and enrollment.score_sum < LOW_SCORE * enrollment.quizzes_taken:
+            reasons.append('low_score')
+        if 'behind' in criteria and enrollment.progress_percentage < behind_below:
+            reasons.append('behind')
+        at_risk_students.append({
+            'student_id': enrollment.student_id,
+            'student_name': f'{first_name} {last_name}',
+            'student_email': email,
+            'progress_percentage': _round(enrollment.progress_percentage),
+            'average_score': enrollment.average_score,
+            'quizzes_taken': enrollment.quizzes_taken,
+            'last_activity_at': enrollment.last_activity_at.isoformat() if enrollment.last_activity_at else None,
+            'reasons': reasons
+        })
+
+    quizzes_taken = quizzes_taken or 0
+    return {
+        'class_id': cls.id,
+        'students': students,
+        'published_lessons': published_lessons(cls.professor_id),
+        'averages': {
+            'progress_percentage': _round(avg_progress),
+            'lessons_completed': _round(avg_completed),
+            # Media tuturor quiz-urilor vs. media mediilor per elev
+            'score': _round(score_sum / quizzes_taken) if quizzes_taken else None,
+            'student_score': _round(avg_student_score),
+            'pass_rate': _round((quizzes_passed or 0) * 100.0 / quizzes_taken) if quizzes_taken else None,
+            'quizzes_per_student': _round(quizzes_taken / students) if students else None
+        },
+        'completion': {
+            'completed_all': completed_all or 0,
+            'not_started': not_started or 0,
+            'with_quizzes': with_quizzes or 0
+        },
+        'distributions': {
+            'progress_percentage': _distribution(cls.id, ClassStudent.progress_percentage),
+            'average_score': _distribution(cls.id, student_score, has_quizzes)
+        },
+        'activity': {
+            'last_7_days': active_week or 0,
+            'last_30_days': active_month or 0,
+            'older': students - (active_month or 0) - (never_active or 0),
+            'never': never_active or 0
+        },
+        'at_risk': {
+            'total': at_risk_total,
+            'criteria': {
+                'inactive_days': INACTIVE_DAYS,
+                'low_score': LOW_SCORE,
+                'behind_below_progress': _round(behind_below) if 'behind' in criteria else None
+            },
+            'students': at_risk_students
+        }
+    }
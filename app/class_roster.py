@@ -0,0 +1,152 @@
+"""Lista studenților unei clase: paginare keyset, sortare, căutare.
+
+O pagină este o singură interogare class_students JOIN users, doar cu
+coloanele afișate (fără încărcarea obiectelor ClassStudent / User și fără
+lazy-load per rând). Ca în grila de utilizatori din admin (app/user_grid.py),
+nu se folosește OFFSET: cursorul opac ține valorile de sortare și id-ul
+înscrierii ultimului rând, iar pagina următoare începe strict după ele.
+
+Sortările după progres și data înscrierii au indexurile lor compuse
+(class_id, col, id), deci o pagină citește doar rândurile ei. Sortările după
+nume și puncte privesc coloane din users: baza de date parcurge înscrierile
+clasei (indexul unique_class_student) și le ordonează, fără a atinge alte clase.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, func, or_, select
+
+from app.models import db, ClassStudent, User
+from app.user_grid import InvalidCursor, prefix_search
+
+SORTS = {
+    'name': (User.last_name, User.first_name),
+    'points': (User.points,),
+    'progress': (ClassStudent.progress_percentage,),
+    'joined_at': (ClassStudent.joined_at,),
+}
+ORDERS = ('asc', 'desc')
+
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 200
+
+ROSTER_COLUMNS = (
+    ClassStudent.id, ClassStudent.class_id, ClassStudent.student_id, ClassStudent.joined_at,
+    ClassStudent.progress_percentage, ClassStudent.lessons_completed,
+    ClassStudent.quizzes_taken, ClassStudent.score_sum, ClassStudent.last_activity_at,
+    User.first_name, User.last_name, User.email, User.points,
+)
+
+
+# ==================== CURSOR ====================
+
+def _sort_values(sort, row):
+    return [getattr(row, column.key) for column in SORTS[sort]]
+
+
+def encode_cursor(sort, order, row):
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in _sort_values(sort, row)]
+    raw = json.dumps([sort, order, values, row.id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, sort, order):
+    """(valori de sortare, id) din cursor; InvalidCursor dacă nu corespunde sortării cerute"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        cursor_sort, cursor_order, values, last_id = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise InvalidCursor('Cursor invalid')
+
+    if cursor_sort != sort or cursor_order != order or not isinstance(last_id, int):
+        raise InvalidCursor('Cursorul nu corespunde sortării cerute')
+    if not isinstance(values, list) or len(values) != len(SORTS[sort]):
+        raise InvalidCursor('Cursor invalid')
+    if sort == 'joined_at':
+        try:
+            values = [datetime.fromisoformat(values[0])]
+        except (TypeError, ValueError):
+            raise InvalidCursor('Cursor invalid')
+    elif any(isinstance(value, bool) or value is None for value in values):
+        raise InvalidCursor('Cursor invalid')
+    elif sort == 'name' and not all(isinstance(value, str) for value in values):
+        raise InvalidCursor('Cursor invalid')
+    elif sort in ('points', 'progress') and not isinstance(values[0], (int, float)):
+        raise InvalidCursor('Cursor invalid')
+    return values, last_id
+
+
+# ==================== INTEROGĂRI ====================
+
+def _after(columns, values, last_id, descending):
+    """(col1, col2, ..., id) strict după (valori, last_id), expandat ca OR de egalități + comparație"""
+    keys = list(columns) + [ClassStudent.id]
+    bounds = list(values) + [last_id]
+    clauses = []
+    for i, (column, bound) in enumerate(zip(keys, bounds)):
+        compare = column < bound if descending else column > bound
+        clauses.append(and_(*[keys[j] == bounds[j] for j in range(i)], compare))
+    return or_(*clauses)
+
+
+def _base(query, class_id, q=None):
+    query = query.select_from(ClassStudent).join(User, User.id == ClassStudent.student_id)\
+        .where(ClassStudent.class_id == class_id)
+    return prefix_search(query, q)
+
+
+def count_students(class_id, q=None):
+    return db.session.execute(_base(select(func.count(ClassStudent.id)), class_id, q)).scalar()
+
+
+def roster_page(class_id, sort='name', order='asc', cursor=None, per_page=DEFAULT_PER_PAGE, q=None):
+    """O pagină din lista clasei: (rânduri, cursorul paginii următoare sau None)"""
+    descending = order == 'desc'
+    columns = SORTS[sort]
+    query = _base(select(*ROSTER_COLUMNS), class_id, q)
+    if cursor:
+        values, last_id = decode_cursor(cursor, sort, order)
+        query = query.where(_after(columns, values, last_id, descending))
+
+    ordering = [column.desc() if descending else column.asc() for column in columns]
+    ordering.append(ClassStudent.id.desc() if descending else ClassStudent.id.asc())
+    rows = db.session.execute(query.order_by(*ordering).limit(per_page + 1)).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(sort, order, rows[-1])
+    return rows, next_cursor
+
+
+def row_to_dict(row, detailed=False):
+    """Un rând din listă; `detailed` (profesorul clasei sau admin) adaugă rezultatele la quiz-uri
+    și ultima activitate - colegii de clasă nu le văd"""
+    data = {
+        'id': row.id,
+        'class_id': row.class_id,
+        'student_id': row.student_id,
+        'student_name': f'{row.first_name} {row.last_name}',
+        'student_email': row.email,
+        'student_points': row.points,
+        'progress_percentage': round(row.progress_percentage or 0, 1),
+        'lessons_completed': row.lessons_completed,
+        'joined_at': row.joined_at.isoformat() if row.joined_at else None
+    }
+    if detailed:
+        data.update({
+            'quizzes_taken': row.quizzes_taken,
+            'average_score': round(row.score_sum / row.quizzes_taken, 1) if row.quizzes_taken else None,
+            'last_activity_at': row.last_activity_at.isoformat() if row.last_activity_at else None,
+        })
+    return data
+
+
+def is_member(class_id, student_id):
+    """Studentul este înscris în clasă (o căutare pe indexul unic, fără a încărca lista)"""
+    return db.session.query(
+        select(ClassStudent.id).where(ClassStudent.class_id == class_id,
+                                      ClassStudent.student_id == student_id).exists()
+    ).scalar()
@@ -0,0 +1,353 @@
+"""Comenzi CLI (flask <comandă>) pentru operații de administrare"""
+import os
+import sys
+
+import click
+from flask.cli import AppGroup
+
+from app.models import User
+
+course_pack_cli = AppGroup('course-pack', help='Import / export pachete de curs.')
+
+
+@course_pack_cli.command('export')
+@click.argument('output', type=click.File('w', encoding='utf-8'), default='-')
+@click.option('--professor', 'professor_email', default=None, help='Exportă doar lecțiile acestui profesor.')
+@click.option('--status', default=None, help='Filtrează după status (draft/published/archived).')
+def export_course_pack(output, professor_email, status):
+    """Scrie pachetul JSONL în OUTPUT (implicit stdout)"""
+    from app.course_pack import export_pack
+
+    professor_id = None
+    if professor_email:
+        professor = User.query.filter_by(email=professor_email.lower(), role='professor').first()
+        if not professor:
+            raise click.ClickException(f'Profesor inexistent: {professor_email}')
+        professor_id = professor.id
+
+    count = 0
+    for line in export_pack(professor_id=professor_id, status=status):
+        output.write(line)
+        count += 1
+    click.echo(f'✅ {count} lecții exportate.', err=True)
+
+
+@course_pack_cli.command('import')
+@click.argument('pack', type=click.File('rb'))
+@click.option('--professor', 'professor_email', required=True,
+              help='Profesorul implicit pentru lecțiile fără professor_email valid.')
+@click.option('--batch-size', default=500, show_default=True)
+@click.option('--dry-run', is_flag=True, help='Doar validează pachetul.')
+def import_course_pack(pack, professor_email, batch_size, dry_run):
+    """Importă un pachet JSONL sau zip"""
+    from app.course_pack import import_pack
+
+    professor = User.query.filter_by(email=professor_email.lower(), role='professor').first()
+    if not professor:
+        raise click.ClickException(f'Profesor inexistent: {professor_email}')
+
+    report = import_pack(pack, professor_id=professor.id, filename=pack.name,
+                         allow_professor_override=True, batch_size=batch_size,
+                         dry_run=dry_run).to_dict()
+    click.echo(f"✅ Lecții: {report['lessons']}, quiz-uri: {report['quizzes']}, "
+               f"întrebări: {report['questions']}, erori: {report['error_count']}")
+    for error in report['errors']:
+        click.echo(f"   linia {error['line']}: {error['error']}", err=True)
+    if report['error_count']:
+        sys.exit(1)
+
+
+question_banks_cli = AppGroup('question-banks', help='Operații pe băncile de întrebări.')
+
+
+@question_banks_cli.command('dedup')
+@click.argument('bank_id', type=int)
+@click.option('--threshold', default=0.8, show_default=True, help='Similaritatea minimă (Jaccard estimat).')
+def dedup_bank(bank_id, threshold):
+    """Afișează grupurile de întrebări aproape identice dintr-o bancă"""
+    from app.dedup import cluster_bank
+
+    clusters = cluster_bank(bank_id, threshold=threshold)
+    for cluster in clusters:
+        click.echo(' '.join(str(qid) for qid in cluster))
+    click.echo(f'✅ {len(clusters)} grupuri, {sum(len(c) - 1 for c in clusters)} duplicate.', err=True)
+
+
+jobs_cli = AppGroup('jobs', help='Coada de job-uri.')
+
+
+@jobs_cli.command('requeue-submissions')
+@click.option('--older-than', default=60, show_default=True, help='Vechimea minimă (secunde).')
+def requeue_submissions(older_than):
+    """Reprocesează quiz-urile trimise dar neprocesate (ex. după o oprire bruscă)"""
+    from app.jobs import job_queue
+    from app.quiz_pipeline import requeue_unprocessed
+
+    # Din CLI rulăm sincron, fără thread-uri worker
+    job_queue.workers = 0
+    count = requeue_unprocessed(older_than_seconds=older_than, limit=100000)
+    click.echo(f'✅ {count} quiz-uri reprocesate.')
+
+
+maintenance_cli = AppGroup('maintenance', help='Job-urile de întreținere.')
+
+
+@maintenance_cli.command('run')
+@click.argument('names', nargs=-1)
+def run_maintenance(names):
+    """Rulează job-urile de întreținere (implicit toate)"""
+    from app import maintenance  # înregistrează job-urile
+    from app.jobs import job_queue
+    from app.scheduler import scheduler
+
+    unknown = [name for name in names if name not in scheduler.tasks]
+    if unknown:
+        raise click.ClickException(f"Job-uri inexistente: {', '.join(unknown)}")
+
+    job_queue.workers = 0
+    for name in names or scheduler.tasks:
+        rows = scheduler.run_task(name)
+        stats = scheduler.tasks[name].stats
+        click.echo(f"{name}: {rows if rows is not None else 'eroare'} rânduri, {stats['last_duration_ms']} ms")
+
+
+points_cli = AppGroup('points', help='Registrul de puncte.')
+
+
+@points_cli.command('backfill')
+def backfill_points():
+    """Preia în registru soldurile existente (intrări 'opening'); se rulează o singură dată"""
+    from app.ledger import backfill_opening_balances
+
+    count = backfill_opening_balances()
+    click.echo(f'✅ {count} solduri preluate în registru.')
+
+
+@points_cli.command('snapshot')
+def snapshot_points():
+    """Salvează snapshot-urile soldurilor"""
+    from app.ledger import take_snapshots
+
+    click.echo(f'✅ {take_snapshots()} snapshot-uri create.')
+
+
+@points_cli.command('audit')
+def audit_points():
+    """Compară User.points cu registrul de puncte"""
+    from app.ledger import audit
+
+    mismatches = audit()
+    for user_id, points, expected in mismatches:
+        click.echo(f'utilizator {user_id}: {points} puncte, registrul indică {expected}')
+    click.echo(f'✅ {len(mismatches)} diferențe.', err=True)
+    if mismatches:
+        sys.exit(1)
+
+
+stats_cli = AppGroup('stats', help='Statisticile de progres per utilizator.')
+
+
+@stats_cli.command('rebuild')
+@click.option('--user-id', type=int, default=None, help='Doar pentru acest utilizator.')
+def rebuild_stats(user_id):
+    """Recalculează user_stats din progres, badge-uri și quiz-uri"""
+    from app.models import db
+    from app.user_stats import rebuild, rebuild_all
+
+    if user_id is not None:
+        rebuild(user_id)
+        db.session.commit()
+        count = 1
+    else:
+        count = rebuild_all()
+    click.echo(f'✅ {count} rânduri recalculate.')
+
+
+classes_cli = AppGroup('classes', help='Clasele profesorilor.')
+
+
+@classes_cli.command('rebuild')
+@click.option('--class-id', type=int, default=None, help='Doar pentru această clasă.')
+def rebuild_classes(class_id):
+    """Recalculează progresul elevilor în clase din lecții și quiz-uri"""
+    from app.class_progress import rebuild_all
+
+    count = rebuild_all(class_id)
+    click.echo(f'✅ {count} înscrieri recalculate.')
+
+
+assets_cli = AppGroup('assets', help='Fișierele statice (CSS / JS).')
+
+
+@assets_cli.command('build')
+@click.option('--clean', is_flag=True, help='Șterge mai întâi fișierele construite anterior.')
+def build_assets(clean):
+    """Minifică, adaugă amprenta în nume și precomprimă CSS / JS-ul (inclusiv cel inline din șabloane)"""
+    import shutil
+    from app.assets import assets, brotli
+
+    if clean and os.path.isdir(assets.directory):
+        shutil.rmtree(assets.directory)
+
+    report = assets.build()['report']
+    for name, sizes in report['files'].items():
+        click.echo(f"{name}: {sizes['source']} -> {sizes['minified']} B (gzip {sizes['gzip']} B) {sizes['output']}")
+
+    click.echo('')
+    total_saved = 0
+    for template, page in report['pages'].items():
+        total_saved += page['saved']
+        percent = page['saved'] / page['html_before'] * 100
+        click.echo(f"{template}: HTML {page['html_before']} -> {page['html_after']} B "
+                   f"(-{percent:.0f}%), {len(page['bundles'])} pachete")
+    click.echo(f"✅ {len(report['files'])} fișiere, {len(report['pages'])} pagini, "
+               f"{total_saved} B scoși din HTML" + ('' if brotli else ' (brotli indisponibil, doar gzip)'))
+
+
+cache_cli = AppGroup('cache', help='Cache-ul aplicației.')
+
+
+@cache_cli.command('stats')
+def cache_stats():
+    """Afișează statisticile cache-ului din acest proces"""
+    from app.cache import cache
+
+    for name, value in cache.get_stats().items():
+        click.echo(f'{name}: {value}')
+
+
+@cache_cli.command('clear')
+def clear_cache():
+    """Golește cache-ul (are efect pe tot clusterul doar pentru backend-ul redis)"""
+    from app.cache import cache
+
+    cache.clear()
+    click.echo(f'✅ Cache golit ({cache.backend.name}).')
+
+
+review_cli = AppGroup('review', help='Recapitularea cu repetiție spațiată.')
+
+
+@review_cli.command('backfill')
+@click.option('--chunk-size', default=500, show_default=True, help='Quiz-uri trimise per tranzacție.')
+def backfill_review(chunk_size):
+    """Preia quiz-urile existente în coada de recapitulare (se poate relua oricând)"""
+    from app.review import backfill_chunk, finish_backfill
+
+    after_id, total = 0, 0
+    while True:
+        last_id, applied = backfill_chunk(after_id, chunk_size)
+        if last_id is None:
+            break
+        after_id = last_id
+        total += applied
+        click.echo(f'... până la submission {after_id}: {total} întrebări programate')
+    total += finish_backfill(after_id, chunk_size)
+    click.echo(f'✅ {total} întrebări programate; quiz-urile noi actualizează direct recapitularea.')
+
+
+recommendations_cli = AppGroup('recommendations', help='Recomandările de lecții.')
+
+
+@recommendations_cli.command('build')
+@click.option('--block-size', default=50000, show_default=True, help='Elevi citiți per bloc (limitează memoria).')
+def build_recommendations(block_size):
+    """Recalculează lecțiile similare și recomandările per elev"""
+    from app.recommendations import build
+
+    report = build(block_size)
+    click.echo(f"✅ {report['lessons']} lecții, {report['completions']} parcurgeri, "
+               f"{report['similar_pairs']} perechi similare, {report['recommendations']} recomandări "
+               f"pentru {report['users']} elevi în {report['seconds']} s")
+
+
+quiz_cli = AppGroup('quiz', help='Quiz-urile trimise.')
+
+
+@quiz_cli.command('backfill-answers')
+@click.option('--chunk-size', default=1000, show_default=True, help='Quiz-uri trimise per tranzacție.')
+def backfill_answers(chunk_size):
+    """Scrie quiz_answers pentru quiz-urile trimise înainte de tabel (se poate relua oricând)"""
+    from app.quiz_answers import backfill_chunk
+
+    after_id, total = 0, 0
+    while True:
+        after_id, written = backfill_chunk(after_id, chunk_size)
+        if after_id is None:
+            break
+        total += written
+        click.echo(f'... până la submission {after_id}: {total} răspunsuri')
+    click.echo(f'✅ {total} răspunsuri normalizate.')
+
+
+export_cli = AppGroup('export', help='Exportul datelor pentru analiză.')
+
+
+@export_cli.command('activity')
+@click.argument('directory', type=click.Path(file_okay=False))
+@click.option('--tables', '-t', multiple=True, help='Doar aceste tabele (implicit toate).')
+@click.option('--format', 'fmt', type=click.Choice(['auto', 'parquet', 'npz']), default='auto', show_default=True)
+@click.option('--chunk-size', default=100000, show_default=True, help='Rânduri citite și scrise per bucată.')
+@click.option('--lag', default=300, show_default=True, help='Rândurile mai noi de atâtea secunde rămân pentru rularea următoare.')
+def export_activity(directory, tables, fmt, chunk_size, lag):
+    """Exportă incremental quiz-urile, progresul și întâlnirile (de la ultimul watermark)"""
+    from app.export import export_activity as run_export, TABLES
+
+    unknown = [name for name in tables if name not in TABLES]
+    if unknown:
+        raise click.BadParameter(f"Tabele necunoscute: {', '.join(unknown)} (disponibile: {', '.join(TABLES)})")
+    try:
+        counts = run_export(directory, tables or None, fmt, chunk_size, lag)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    for name, rows in counts.items():
+        click.echo(f'{name}: {rows} rânduri noi')
+    click.echo(f'✅ Export în {directory} (manifest.json actualizat).')
+
+
+db_cli = AppGroup('db', help='Schema bazei de date.')
+
+
+@db_cli.command('upgrade-columns')
+@click.option('--dry-run', is_flag=True, help='Doar afișează ce lipsește.')
+def upgrade_columns(dry_run):
+    """Adaugă în tabelele existente coloanele și indexurile noi (se poate rula oricând)"""
+    from app.models import db
+    from app.schema_upgrade import missing_columns, missing_indexes, upgrade, FOLLOW_UP
+
+    if dry_run:
+        with db.engine.connect() as connection:
+            columns, indexes = missing_columns(connection), missing_indexes(connection)
+        for column in columns:
+            click.echo(f'coloană lipsă: {column.table.name}.{column.name}')
+        for index in indexes:
+            click.echo(f'index lipsă: {index.table.name}.{index.name}')
+        click.echo(f'{len(columns)} coloane și {len(indexes)} indexuri de adăugat.')
+        return
+
+    columns, indexes = upgrade()
+    for name in columns:
+        click.echo(f'+ coloană {name}')
+    for name in indexes:
+        click.echo(f'+ index {name}')
+    click.echo(f'✅ Schema la zi ({len(columns)} coloane, {len(indexes)} indexuri adăugate).')
+    for command in sorted({FOLLOW_UP[name.split('.')[0]] for name in columns if name.split('.')[0] in FOLLOW_UP}):
+        click.echo(f'   Rulează acum: {command}')
+
+
+def register_commands(app):
+    """Înregistrează comenzile CLI în aplicație"""
+    app.cli.add_command(course_pack_cli)
+    app.cli.add_command(question_banks_cli)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(maintenance_cli)
+    app.cli.add_command(points_cli)
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(classes_cli)
+    app.cli.add_command(assets_cli)
+    app.cli.add_command(cache_cli)
+    app.cli.add_command(review_cli)
+    app.cli.add_command(recommendations_cli)
+    app.cli.add_command(quiz_cli)
+    app.cli.add_command(export_cli)
+    app.cli.add_command(db_cli)
@@ -0,0 +1,457 @@
+"""Import / export de pachete de curs (lecții + quiz-uri + întrebări).
+
+Formatul pachetului este JSONL: fiecare linie conține o lecție împreună cu
+quiz-urile și întrebările ei. Un pachet poate fi trimis și ca arhivă zip care
+conține unul sau mai multe fișiere ``.jsonl``.
+
+Importul rulează ca un pipeline de generatoare (linii -> înregistrări ->
+validare -> loturi), iar fiecare lot este inserat cu un singur flush pe tabel,
+deci memoria folosită depinde doar de mărimea lotului, nu de mărimea pachetului.
+"""
+import io
+import json
+import zipfile
+
+from sqlalchemy import insert
+from sqlalchemy.orm import selectinload
+
+from app.models import db, User, Lesson, Quiz, Question
+from app import class_progress
+
+PACK_VERSION = 1
+DEFAULT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 50
+
+LESSON_LEVELS = ('beginner', 'intermediate', 'advanced')
+LESSON_STATUSES = ('draft', 'published', 'archived')
+QUESTION_TYPES = ('multiple_choice', 'true_false')
+ANSWERS_BY_TYPE = {
+    'multiple_choice': ('A', 'B', 'C', 'D'),
+    'true_false': ('T', 'F'),
+}
+
+
+class PackRecordError(ValueError):
+    """Înregistrare invalidă în pachet (include numărul liniei)"""
+
+    def __init__(self, line_no, message):
+        super().__init__(message)
+        self.line_no = line_no
+        self.message = message
+
+    def to_dict(self):
+        return {'line': self.line_no, 'error': self.message}
+
+
+# ==================== CITIRE ====================
+
+def iter_pack_lines(stream, filename=None):
+    """Generează liniile (bytes) dintr-un pachet JSONL sau zip.
+
+    Pentru zip, fișierele .jsonl sunt citite pe rând, în ordine alfabetică.
+    """
+    head = stream.read(4)
+    is_zip = head == b'PK\x03\x04' or (filename or '').lower().endswith('.zip')
+
+    if not is_zip:
+        yield from _iter_lines(_Prefixed(head, stream))
+        return
+
+    # zipfile are nevoie de un fișier seekable (upload-urile mari sunt deja pe disc)
+    if not _is_seekable(stream):
+        raise PackRecordError(0, 'Arhiva zip trebuie trimisă ca fișier.')
+    stream.seek(0)
+    with zipfile.ZipFile(stream) as archive:
+        names = sorted(n for n in archive.namelist() if n.lower().endswith('.jsonl'))
+        for name in names:
+            with archive.open(name) as member:
+                yield from _iter_lines(member)
+
+
+def _iter_lines(fileobj):
+    for raw in fileobj:
+        yield raw
+
+
+def _is_seekable(stream):
+    try:
+        return stream.seekable()
+    except AttributeError:
+        return False
+
+
+class _Prefixed(io.RawIOBase):
+    """Stream care re-emite octeții deja citiți pentru detectarea formatului"""
+
+    def __init__(self, prefix, stream):
+        self._prefix = prefix
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._prefix:
+            n = min(len(buffer), len(self._prefix))
+            buffer[:n] = self._prefix[:n]
+            self._prefix = self._prefix[n:]
+            return n
+        chunk = self._stream.read(len(buffer))
+        if not chunk:
+            return 0
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+    def __iter__(self):
+        return iter(io.BufferedReader(self))
+
+
+def parse_records(lines):
+    """Transformă liniile în (line_no, dict); liniile goale sunt ignorate"""
+    for line_no, raw in enumerate(lines, start=1):
+        if isinstance(raw, bytes):
+            try:
+                raw = raw.decode('utf-8')
+            except UnicodeDecodeError:
+                yield line_no, PackRecordError(line_no, 'Linia nu este text UTF-8 valid.')
+                continue
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            record = json.loads(raw)
+        except ValueError:
+            yield line_no, PackRecordError(line_no, 'JSON invalid.')
+            continue
+        yield line_no, record
+
+
+# ==================== VALIDARE ====================
+
+def _text(data, key, line_no, required=True, max_len=None):
+    value = data.get(key)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        if required:
+            raise PackRecordError(line_no, f'Câmpul "{key}" este obligatoriu.')
+        return None
+    if not isinstance(value, str):
+        raise PackRecordError(line_no, f'Câmpul "{key}" trebuie să fie text.')
+    value = value.strip()
+    if max_len and len(value) > max_len:
+        raise PackRecordError(line_no, f'Câmpul "{key}" depășește {max_len} caractere.')
+    return value
+
+
+def _int(data, key, line_no, default, low=None, high=None, nullable=False):
+    value = data.get(key, default)
+    if value is None and nullable:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise PackRecordError(line_no, f'Câmpul "{key}" trebuie să fie număr întreg.')
+    if (low is not None and value < low) or (high is not None and value > high):
+        raise PackRecordError(line_no, f'Câmpul "{key}" este în afara intervalului permis.')
+    return value
+
+
+def _validate_question(data, line_no, position):
+    if not isinstance(data, dict):
+        raise PackRecordError(line_no, 'Întrebare invalidă.')
+
+    question_type = data.get('question_type', 'multiple_choice')
+    if question_type not in QUESTION_TYPES:
+        raise PackRecordError(line_no, f'Tip de întrebare invalid: {question_type}.')
+
+    correct_answer = str(data.get('correct_answer', '')).strip().upper()
+    if correct_answer not in ANSWERS_BY_TYPE[question_type]:
+        raise PackRecordError(line_no, f'Răspuns corect invalid: {correct_answer or "-"}.')
+
+    options = data.get('options') or {}
+    if not isinstance(options, dict):
+        raise PackRecordError(line_no, 'Câmpul "options" trebuie să fie obiect.')
+    if question_type == 'multiple_choice' and not options.get(correct_answer):
+        raise PackRecordError(line_no, 'Varianta corectă lipsește din "options".')
+
+    row = {
+        'question_text': _text(data, 'question_text', line_no),
+        'question_type': question_type,
+        'correct_answer': correct_answer,
+        'explanation': _text(data, 'explanation', line_no, required=False),
+        'points': _int(data, 'points', line_no, 10, low=0),
+        'order': _int(data, 'order', line_no, position, low=0),
+    }
+    for letter in ANSWERS_BY_TYPE['multiple_choice']:
+        row[f'option_{letter.lower()}'] = _text(options, letter, line_no, required=False, max_len=500)
+    return row
+
+
+def _validate_quiz(data, line_no):
+    if not isinstance(data, dict):
+        raise PackRecordError(line_no, 'Quiz invalid.')
+
+    questions = data.get('questions') or []
+    if not isinstance(questions, list):
+        raise PackRecordError(line_no, 'Câmpul "questions" trebuie să fie listă.')
+
+    fields = {
+        'title': _text(data, 'title', line_no, max_len=200),
+        'description': _text(data, 'description', line_no, required=False),
+        'passing_score': _int(data, 'passing_score', line_no, 70, low=0, high=100),
+        'time_limit_minutes': _int(data, 'time_limit_minutes', line_no, None, low=1, nullable=True),
+        'max_attempts': _int(data, 'max_attempts', line_no, 3, low=1),
+        'points_reward': _int(data, 'points_reward', line_no, 50, low=0),
+    }
+    return {
+        'fields': fields,
+        'questions': [_validate_question(q, line_no, i) for i, q in enumerate(questions)],
+    }
+
+
+def validate_record(record, line_no):
+    """Validează o linie din pachet și o normalizează pentru inserare"""
+    if not isinstance(record, dict):
+        raise PackRecordError(line_no, 'Fiecare linie trebuie să fie un obiect JSON.')
+
+    level = record.get('level', 'beginner')
+    if level not in LESSON_LEVELS:
+        raise PackRecordError(line_no, f'Nivel invalid: {level}.')
+
+    status = record.get('status', 'published')
+    if status not in LESSON_STATUSES:
+        raise PackRecordError(line_no, f'Status invalid: {status}.')
+
+    quizzes = record.get('quizzes') or []
+    if not isinstance(quizzes, list):
+        raise PackRecordError(line_no, 'Câmpul "quizzes" trebuie să fie listă.')
+
+    lesson = {
+        'title': _text(record, 'title', line_no, max_len=200),
+        'description': _text(record, 'description', line_no),
+        'content': _text(record, 'content', line_no),
+        'level': level,
+        'category': _text(record, 'category', line_no, required=False, max_len=100),
+        'duration_minutes': _int(record, 'duration_minutes', line_no, 30, low=1),
+        'difficulty': _int(record, 'difficulty', line_no, 3, low=1, high=5),
+        'status': status,
+        'image_url': _text(record, 'image_url', line_no, required=False, max_len=500),
+    }
+    return {
+        'line': line_no,
+        'lesson': lesson,
+        'professor_email': (record.get('professor_email') or '').strip().lower() or None,
+        'quizzes': [_validate_quiz(q, line_no) for q in quizzes],
+    }
+
+
+def validated(records, report):
+    """Păstrează doar înregistrările valide; erorile ajung în raport"""
+    for line_no, record in records:
+        try:
+            if isinstance(record, PackRecordError):
+                raise record
+            yield validate_record(record, line_no)
+        except PackRecordError as e:
+            report.add_error(e)
+
+
+def batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ==================== IMPORT ====================
+
+class ImportReport:
+    """Statistici pentru un import (erorile raportate sunt plafonate)"""
+
+    def __init__(self):
+        self.lessons = 0
+        self.quizzes = 0
+        self.questions = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, error):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(error.to_dict())
+
+    def to_dict(self):
+        return {
+            'lessons': self.lessons,
+            'quizzes': self.quizzes,
+            'questions': self.questions,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
+
+
+class _ProfessorResolver:
+    """Mapează professor_email -> id (doar pentru admini), cu cache pe email"""
+
+    def __init__(self, default_id, allow_override):
+        self.default_id = default_id
+        self.allow_override = allow_override
+        self._cache = {}
+
+    def __call__(self, email):
+        if not self.allow_override or not email:
+            return self.default_id
+        if email not in self._cache:
+            professor_id = db.session.query(User.id)\
+                .filter(User.email == email, User.role == 'professor').scalar()
+            self._cache[email] = professor_id or self.default_id
+        return self._cache[email]
+
+
+def _insert_batch(batch, resolve_professor, report):
+    """Inserează un lot: lecțiile și quiz-urile cu flush (pentru id-uri),
+    apoi toate întrebările lotului într-un singur INSERT multi-row."""
+    lessons = [
+        Lesson(professor_id=resolve_professor(rec['professor_email']), **rec['lesson'])
+        for rec in batch
+    ]
+    db.session.add_all(lessons)
+    db.session.flush()
+
+    quizzes = []
+    quiz_questions = []
+    for lesson, rec in zip(lessons, batch):
+        for quiz_data in rec['quizzes']:
+            quizzes.append(Quiz(lesson_id=lesson.id, **quiz_data['fields']))
+            quiz_questions.append(quiz_data['questions'])
+    if quizzes:
+        db.session.add_all(quizzes)
+        db.session.flush()
+
+    rows = [
+        dict(question, quiz_id=quiz.id)
+        for quiz, questions in zip(quizzes, quiz_questions)
+        for question in questions
+    ]
+    if rows:
+        db.session.execute(insert(Question), rows)
+
+    # Lecțiile publicate noi schimbă procentul de progres în clasele profesorilor lor
+    for professor_id in {lesson.professor_id for lesson in lessons if lesson.status == 'published'}:
+        class_progress.lessons_changed(professor_id)
+
+    db.session.commit()
+
+    # Obiectele lotului nu mai sunt necesare - le scoatem din sesiune
+    for obj in lessons + quizzes:
+        db.session.expunge(obj)
+
+    report.lessons += len(lessons)
+    report.quizzes += len(quizzes)
+    report.questions += len(rows)
+
+
+def import_pack(stream, professor_id, filename=None, allow_professor_override=False,
+                batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """Importă un pachet de curs și returnează un ImportReport.
+
+    Fiecare lot este comis separat; înregistrările invalide sunt sărite și
+    raportate cu numărul liniei.
+    """
+    report = ImportReport()
+    resolve_professor = _ProfessorResolver(professor_id, allow_professor_override)
+
+    records = validated(parse_records(iter_pack_lines(stream, filename)), report)
+    for batch in batched(records, batch_size):
+        if dry_run:
+            report.lessons += len(batch)
+            report.quizzes += sum(len(r['quizzes']) for r in batch)
+            report.questions += sum(len(q['questions']) for r in batch for q in r['quizzes'])
+            continue
+        _insert_batch(batch, resolve_professor, report)
+
+    return report
+
+
+# ==================== EXPORT ====================
+
+def _question_to_pack(question):
+    data = {
+        'question_text': question.question_text,
+        'question_type': question.question_type,
+        'correct_answer': question.correct_answer,
+        'explanation': question.explanation,
+        'points': question.points,
+        'order': question.order,
+    }
+    if question.question_type == 'multiple_choice':
+        data['options'] = {
+            'A': question.option_a,
+            'B': question.option_b,
+            'C': question.option_c,
+            'D': question.option_d,
+        }
+    return data
+
+
+def lesson_to_pack(lesson):
+    """Reprezentarea unei lecții în pachet (fără id-uri specifice mediului)"""
+    return {
+        'version': PACK_VERSION,
+        'title': lesson.title,
+        'description': lesson.description,
+        'content': lesson.content,
+        'level': lesson.level,
+        'category': lesson.category,
+        'duration_minutes': lesson.duration_minutes,
+        'difficulty': lesson.difficulty,
+        'status': lesson.status,
+        'image_url': lesson.image_url,
+        'professor_email': lesson.professor.email if lesson.professor else None,
+        'quizzes': [
+            {
+                'title': quiz.title,
+                'description': quiz.description,
+                'passing_score': quiz.passing_score,
+                'time_limit_minutes': quiz.time_limit_minutes,
+                'max_attempts': quiz.max_attempts,
+                'points_reward': quiz.points_reward,
+                'questions': [
+                    _question_to_pack(q) for q in sorted(quiz.questions, key=lambda q: (q.order, q.id))
+                ],
+            }
+            for quiz in lesson.quizzes
+        ],
+    }
+
+
+def export_pack(professor_id=None, status=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Generează pachetul JSONL linie cu linie.
+
+    Id-urile lecțiilor sunt citite în loturi keyset (id > ultimul id), complet
+    (.all()), apoi fiecare lot este încărcat cu quiz-urile/întrebările lui prin
+    câte un SELECT ... IN. Nu se folosește yield_per: pe un cursor nebufferizat
+    (PyMySQL), SELECT-urile selectinload de pe aceeași conexiune ar arunca
+    rândurile încă necitite. Memoria rămâne proporțională cu un lot.
+    """
+    last_id = 0
+    while True:
+        ids_query = db.session.query(Lesson.id).filter(Lesson.id > last_id)
+        if professor_id is not None:
+            ids_query = ids_query.filter(Lesson.professor_id == professor_id)
+        if status:
+            ids_query = ids_query.filter(Lesson.status == status)
+        ids = [row[0] for row in ids_query.order_by(Lesson.id).limit(batch_size).all()]
+        if not ids:
+            return
+
+        lessons = Lesson.query.options(
+            selectinload(Lesson.professor),
+            selectinload(Lesson.quizzes).selectinload(Quiz.questions),
+        ).filter(Lesson.id.in_(ids)).order_by(Lesson.id).all()
+        for lesson in lessons:
+            yield json.dumps(lesson_to_pack(lesson), ensure_ascii=False) + '\n'
+
+        # Harta de identitate a sesiunii ține referințe slabe: lotul anterior poate fi eliberat
+        last_id = ids[-1]
@@ -0,0 +1,294 @@
+"""Detectarea întrebărilor aproape identice din băncile de întrebări (MinHash + LSH).
+
+Fiecare întrebare primește la inserare o semnătură MinHash (NUM_PERM valori
+uint32, salvată în bank_questions.minhash). Semnătura e împărțită în BANDS
+benzi; două întrebări devin candidate dacă au cel puțin o bandă identică, iar
+candidații sunt confirmați comparând semnăturile (estimarea similarității
+Jaccard). Astfel nu se compară niciodată toate perechile.
+
+- la inserare: indexul LSH al profesorului (în memorie) dă duplicatele în
+  câteva căutări în dicționare; ca în question_index.py, la cel mult
+  REFRESH_INTERVAL_SECONDS indexul verifică (COUNT, MAX(id)) pe băncile
+  profesorului și încarcă doar întrebările scrise de alte procese (id mai
+  mare decât ultimul văzut), iar la rânduri șterse este reconstruit;
+- în batch: semnăturile unei bănci sunt încărcate într-o matrice NumPy, iar
+  grupurile se obțin sortând cheile fiecărei benzi (O(n log n)).
+"""
+import threading
+import time
+import zlib
+
+import numpy as np
+from sqlalchemy import func, update
+
+from app.models import db, BankQuestion, QuestionBank
+from app.search import fold
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+SIMILARITY_THRESHOLD = 0.8
+REFRESH_INTERVAL_SECONDS = 30
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(20240229)
+_PERM_A = _rng.randint(1, _PRIME, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, _PRIME, size=NUM_PERM).astype(np.uint64)
+# Multiplicatori pentru combinarea valorilor unei benzi într-o cheie uint64
+_BAND_MIX = np.array([0x9E3779B97F4A7C15 >> (7 * i) | 1 for i in range(ROWS)], dtype=np.uint64)
+
+
+# ==================== SEMNĂTURI ====================
+
+def shingles(text):
+    """Hash-urile (crc32) n-gramelor de caractere din textul normalizat"""
+    normalized = ' '.join(fold(text or '').split())
+    if len(normalized) <= SHINGLE_SIZE:
+        grams = {normalized}
+    else:
+        grams = {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+    return np.fromiter((zlib.crc32(g.encode('utf-8')) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhash(text):
+    """Semnătura MinHash (NUM_PERM x uint32) pentru un text"""
+    values = shingles(text) % _PRIME
+    hashed = (_PERM_A[:, None] * values[None, :] + _PERM_B[:, None]) % _PRIME
+    return hashed.min(axis=1).astype(np.uint32)
+
+
+def signature_bytes(signature):
+    return signature.astype('<u4').tobytes()
+
+
+def signature_from_bytes(raw):
+    return np.frombuffer(raw, dtype='<u4').astype(np.uint32)
+
+
+def band_keys(signature):
+    """Câte o cheie (int) pentru fiecare bandă a unei semnături"""
+    bands = signature.astype(np.uint64).reshape(BANDS, ROWS)
+    return [int(k) for k in (bands * _BAND_MIX).sum(axis=1)]
+
+
+def similarity(a, b):
+    """Similaritatea Jaccard estimată din două semnături"""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+# ==================== INDEX PE PROFESOR (INSERARE) ====================
+
+class _ProfessorIndex:
+    """Benzile LSH ale întrebărilor unui profesor + starea tabelei la ultima sincronizare"""
+
+    def __init__(self, max_id=0, total=0):
+        self.bands = [dict() for _ in range(BANDS)]
+        self.signatures = {}
+        self.banks = {}
+        self.max_id = max_id
+        self.total = total
+        self.checked_at = time.monotonic()
+
+    def add(self, question_id, bank_id, signature):
+        self.signatures[question_id] = signature
+        self.banks[question_id] = bank_id
+        for band, key in zip(self.bands, band_keys(signature)):
+            band.setdefault(key, []).append(question_id)
+
+    def candidates(self, signature):
+        found = set()
+        for band, key in zip(self.bands, band_keys(signature)):
+            found.update(band.get(key, ()))
+        return found
+
+
+def _stored_signatures(query):
+    """(id, bank_id, semnătură) pentru întrebări; semnăturile lipsă sunt calculate și salvate"""
+    missing = []
+    for row in query.yield_per(1000):
+        if row.minhash:
+            yield row.id, row.bank_id, signature_from_bytes(row.minhash)
+            continue
+        signature = minhash(row.text)
+        missing.append({'id': row.id, 'minhash': signature_bytes(signature)})
+        yield row.id, row.bank_id, signature
+
+    if missing:
+        for start in range(0, len(missing), 1000):
+            db.session.execute(update(BankQuestion), missing[start:start + 1000])
+        db.session.commit()
+
+
+class NearDuplicateIndex:
+    """Indexuri LSH în memorie, câte unul pentru băncile fiecărui profesor"""
+
+    def __init__(self):
+        self._professors = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _questions(professor_id, *columns):
+        return db.session.query(*columns)\
+            .join(QuestionBank, QuestionBank.id == BankQuestion.bank_id)\
+            .filter(QuestionBank.professor_id == professor_id)
+
+    def _state(self, professor_id):
+        """(numărul de întrebări, id-ul maxim) din băncile profesorului"""
+        total, max_id = self._questions(
+            professor_id, func.count(BankQuestion.id), func.max(BankQuestion.id)
+        ).one()
+        return total, max_id or 0
+
+    def _signatures(self, professor_id, after_id, up_to_id):
+        query = self._questions(
+            professor_id, BankQuestion.id, BankQuestion.bank_id, BankQuestion.text, BankQuestion.minhash
+        ).filter(BankQuestion.id > after_id, BankQuestion.id <= up_to_id).order_by(BankQuestion.id)
+        return list(_stored_signatures(query))
+
+    def _build(self, professor_id):
+        total, max_id = self._state(professor_id)
+        index = _ProfessorIndex(max_id, total)
+        for question_id, bank_id, signature in self._signatures(professor_id, 0, max_id):
+            index.add(question_id, bank_id, signature)
+        return index
+
+    def _refresh(self, professor_id, index):
+        """Aplică întrebările scrise de alte procese de la ultima sincronizare"""
+        total, max_id = self._state(professor_id)
+        if total == index.total and max_id == index.max_id:
+            index.checked_at = time.monotonic()
+            return index
+        new_rows = self._questions(professor_id, func.count(BankQuestion.id)).filter(
+            BankQuestion.id > index.max_id, BankQuestion.id <= max_id
+        ).scalar()
+        if index.total + new_rows != total:
+            # Întrebări șterse între timp - reconstruim indexul
+            return self._build(professor_id)
+        rows = self._signatures(professor_id, index.max_id, max_id)
+        with self._lock:
+            for question_id, bank_id, signature in rows:
+                # Cele adăugate deja de add() în acest proces nu se adaugă a doua oară
+                if question_id not in index.signatures:
+                    index.add(question_id, bank_id, signature)
+            index.max_id, index.total = max_id, total
+            index.checked_at = time.monotonic()
+        return index
+
+    def get(self, professor_id):
+        index = self._professors.get(professor_id)
+        if index is None:
+            built = self._build(professor_id)
+            with self._lock:
+                index = self._professors.setdefault(professor_id, built)
+        elif time.monotonic() - index.checked_at >= REFRESH_INTERVAL_SECONDS:
+            refreshed = self._refresh(professor_id, index)
+            if refreshed is not index:
+                with self._lock:
+                    self._professors[professor_id] = refreshed
+                index = refreshed
+        return index
+
+    def find(self, professor_id, signature, exclude_id=None, threshold=SIMILARITY_THRESHOLD):
+        """[(question_id, bank_id, similaritate)] pentru întrebările similare, descrescător"""
+        index = self.get(professor_id)
+        with self._lock:
+            matches = []
+            for question_id in index.candidates(signature):
+                if question_id == exclude_id:
+                    continue
+                score = similarity(signature, index.signatures[question_id])
+                if score >= threshold:
+                    matches.append((question_id, index.banks[question_id], score))
+        matches.sort(key=lambda m: m[2], reverse=True)
+        return matches
+
+    def add(self, professor_id, question_id, bank_id, signature):
+        with self._lock:
+            index = self._professors.get(professor_id)
+            # Indexul neconstruit încă va include întrebarea la prima folosire
+            if index is not None and question_id not in index.signatures:
+                index.add(question_id, bank_id, signature)
+
+    def invalidate(self, professor_id=None):
+        with self._lock:
+            if professor_id is None:
+                self._professors.clear()
+            else:
+                self._professors.pop(professor_id, None)
+
+
+near_duplicates = NearDuplicateIndex()
+
+
+# ==================== GRUPARE ÎN BATCH ====================
+
+class _UnionFind:
+    def __init__(self, size):
+        self.parent = np.arange(size)
+
+    def find(self, i):
+        parent = self.parent
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        while parent[i] != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+def cluster_bank(bank_id, threshold=SIMILARITY_THRESHOLD):
+    """Grupează întrebările aproape identice dintr-o bancă.
+
+    Pentru fiecare bandă, cheile sunt sortate și fiecare grup de chei egale
+    este comparat doar cu primul său element (vectorizat), deci costul este
+    O(BANDS * n log n) indiferent de numărul de perechi.
+    Returnează o listă de clustere (liste de id-uri, cel puțin 2 elemente).
+    """
+    query = db.session.query(
+        BankQuestion.id, BankQuestion.bank_id, BankQuestion.text, BankQuestion.minhash
+    ).filter(BankQuestion.bank_id == bank_id).order_by(BankQuestion.id)
+
+    ids = []
+    rows = []
+    for question_id, _, signature in _stored_signatures(query):
+        ids.append(question_id)
+        rows.append(signature)
+    if len(ids) < 2:
+        return []
+
+    ids = np.array(ids, dtype=np.int64)
+    signatures = np.vstack(rows)
+    del rows
+    min_equal = int(np.ceil(threshold * NUM_PERM))
+    uf = _UnionFind(len(ids))
+
+    for band in range(BANDS):
+        columns = signatures[:, band * ROWS:(band + 1) * ROWS].astype(np.uint64)
+        keys = (columns * _BAND_MIX).sum(axis=1)
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+
+        # Începutul fiecărui grup de chei egale, propagat pe tot grupul
+        starts = np.ones(len(order), dtype=bool)
+        starts[1:] = sorted_keys[1:] != sorted_keys[:-1]
+        group_start = np.maximum.accumulate(np.where(starts, np.arange(len(order)), 0))
+        members = order[~starts]
+        if not len(members):
+            continue
+        representatives = order[group_start[~starts]]
+
+        equal = np.count_nonzero(signatures[members] == signatures[representatives], axis=1)
+        for member, representative in zip(members[equal >= min_equal], representatives[equal >= min_equal]):
+            uf.union(int(member), int(representative))
+
+    roots = np.array([uf.find(i) for i in range(len(ids))])
+    clusters = {}
+    for position in np.flatnonzero(roots != np.arange(len(ids))):
+        clusters.setdefault(int(roots[position]), [int(ids[roots[position]])]).append(int(ids[position]))
+    return sorted(clusters.values(), key=len, reverse=True)
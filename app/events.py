@@ -0,0 +1,88 @@
+"""Notificări după commit pentru modificările modelelor.
+
+Modulele care țin stare derivată în memorie (indexuri, cache-uri) se abonează
+cu @on_commit. Modificările sunt colectate la flush (când istoricul
+atributelor e încă disponibil) și livrate doar după un commit reușit; la
+rollback sunt aruncate.
+"""
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+_subscriptions = []
+
+_PENDING_KEY = 'model_changes'
+
+
+class Change:
+    """O modificare: op ('insert' | 'update' | 'delete'), modelul, id-ul și datele extrase"""
+
+    __slots__ = ('op', 'model', 'id', 'data')
+
+    def __init__(self, op, model, id, data):
+        self.op = op
+        self.model = model
+        self.id = id
+        self.data = data
+
+    def __repr__(self):
+        return f'<Change {self.op} {self.model.__name__} {self.id}>'
+
+
+def on_commit(*models, fields=None, snapshot=None):
+    """Înregistrează callback(changes) pentru modificările modelelor date.
+
+    fields   - pentru update, notifică doar dacă s-a schimbat unul din câmpuri
+    snapshot - funcție obj -> data, apelată la flush (după commit obiectele
+               sunt expirate și nu mai pot fi citite fără query)
+    """
+    def decorator(callback):
+        _subscriptions.append((models, fields, snapshot, callback))
+        return callback
+    return decorator
+
+
+def _changed(obj, fields):
+    if not fields:
+        return True
+    state = inspect(obj)
+    return any(state.attrs[f].history.has_changes() for f in fields)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changes(session, flush_context):
+    if not _subscriptions:
+        return
+    pending = session.info.setdefault(_PENDING_KEY, [])
+    for op, objects in (('insert', session.new), ('update', session.dirty), ('delete', session.deleted)):
+        for obj in objects:
+            for index, (models, fields, snapshot, _) in enumerate(_subscriptions):
+                if not isinstance(obj, models):
+                    continue
+                if op == 'update' and not (session.is_modified(obj) and _changed(obj, fields)):
+                    continue
+                data = snapshot(obj) if snapshot else None
+                pending.append((index, Change(op, type(obj), getattr(obj, 'id', None), data)))
+
+
+@event.listens_for(Session, 'after_commit')
+def _dispatch_changes(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    grouped = {}
+    for index, change in pending:
+        grouped.setdefault(index, []).append(change)
+    for index, changes in grouped.items():
+        callback = _subscriptions[index][3]
+        try:
+            callback(changes)
+        except Exception as e:
+            # Starea derivată nu trebuie să strice commit-ul deja efectuat
+            print(f"Eroare la procesarea modificărilor ({callback.__name__}): {str(e)}")
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_changes(session, previous_transaction):
+    # Rollback-ul unui savepoint (begin_nested) nu anulează tranzacția exterioară
+    if not previous_transaction.nested:
+        session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,288 @@
+"""Exportul incremental al activității (quiz-uri, progres, întâlniri) în fișiere columnare.
+
+    flask export activity /date/export
+    flask export activity /date/export --tables quiz_submissions --format npz
+
+Fiecare tabel este citit cu un cursor pe server (stream_results), în ordinea
+cheii de watermark, și scris în bucăți de `chunk_size` rânduri, împărțite pe
+luni:
+
+    <dir>/<tabel>/month=2025-11/part-<run>-00001.parquet   (pyarrow, zstd)
+    <dir>/<tabel>/month=2025-11/part-<run>-00001.npz       (NumPy, altfel)
+
+manifest.json (rescris atomic după fiecare fișier) păstrează lista fișierelor,
+schema și watermark-ul fiecărui tabel - ultima valoare a cheii exportate. O
+rulare ulterioară citește doar rândurile de după watermark, printr-un
+interval pe index, deci baza de date nu mai este parcursă integral. Rândurile
+mai noi de `lag` secunde sunt lăsate pentru rularea următoare (tranzacțiile
+încă necomise pot avea chei mai mici).
+
+  quiz_submissions - după id (rândurile nu se mai modifică), lună: submitted_at
+  user_progress    - după (last_accessed, id), lună: last_accessed
+  meetings         - după (updated_at, id), lună: meeting_date
+
+La progres și întâlniri, un rând modificat este exportat din nou: versiunea
+cea mai recentă a unui id este cea din fișierul cu watermark-ul mai mare.
+Fișierele care nu apar în manifest (ex. după o întrerupere) se ignoră.
+
+În .npz, textele sunt salvate ca octeți UTF-8 concatenați (`<col>.data`) plus
+pozițiile (`<col>.offsets`), iar valorile NULL ca mască (`<col>.null`);
+read_npz() reface coloanele.
+"""
+import json
+import os
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from sqlalchemy import and_, or_, select
+
+from app.models import db, QuizSubmission, UserProgress, Meeting
+
+MANIFEST = 'manifest.json'
+FORMAT_VERSION = 1
+CHUNK_SIZE = 100000
+DEFAULT_LAG = 300
+
+
+class ExportTable:
+    """Un tabel exportat: modelul, cheia de watermark, coloana lunii și cea pentru `lag`"""
+
+    def __init__(self, model, cursor, month, settle=None):
+        self.model = model
+        self.cursor = cursor
+        self.month = month
+        self.settle = settle or cursor[0]
+
+    @property
+    def name(self):
+        return self.model.__tablename__
+
+    def columns(self):
+        return list(self.model.__table__.columns)
+
+
+TABLES = {table.name: table for table in (
+    ExportTable(QuizSubmission, cursor=('id',), month='submitted_at', settle='submitted_at'),
+    ExportTable(UserProgress, cursor=('last_accessed', 'id'), month='last_accessed'),
+    ExportTable(Meeting, cursor=('updated_at', 'id'), month='meeting_date'),
+)}
+
+
+# ==================== TIPURI ====================
+
+def _kind(column):
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return 'string'
+    if python_type is bool:
+        return 'bool'
+    if python_type is int:
+        return 'int'
+    if python_type is float:
+        return 'float'
+    if python_type is datetime:
+        return 'datetime'
+    if python_type is date:
+        return 'date'
+    return 'string'
+
+
+def _encode(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _decode(value, kind):
+    if value is None:
+        return None
+    if kind == 'datetime':
+        return datetime.fromisoformat(value)
+    if kind == 'date':
+        return date.fromisoformat(value)
+    return value
+
+
+# ==================== SCRIITORI ====================
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError:
+        return None
+
+
+def _write_parquet(path, schema, columns):
+    pa = _pyarrow()
+    types = {'int': pa.int64(), 'float': pa.float64(), 'bool': pa.bool_(), 'datetime': pa.timestamp('us'),
+             'date': pa.date32(), 'string': pa.string()}
+    table = pa.table({name: pa.array(values, type=types[kind])
+                      for (name, kind), values in zip(schema, columns)})
+    pa.parquet.write_table(table, path, compression='zstd')
+
+
+def _write_npz(path, schema, columns):
+    arrays = {}
+    for (name, kind), values in zip(schema, columns):
+        nulls = np.fromiter((value is None for value in values), dtype=bool, count=len(values))
+        if nulls.any():
+            arrays[f'{name}.null'] = nulls
+        if kind == 'datetime':
+            arrays[name] = np.array(values, dtype='datetime64[us]')
+        elif kind == 'date':
+            arrays[name] = np.array(values, dtype='datetime64[D]')
+        elif kind == 'string':
+            encoded = [(value or '').encode('utf-8') for value in values]
+            arrays[f'{name}.offsets'] = np.cumsum([0] + [len(item) for item in encoded], dtype=np.int64)
+            arrays[f'{name}.data'] = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        else:
+            dtype = {'int': np.int64, 'float': np.float64, 'bool': bool}[kind]
+            fill = np.nan if kind == 'float' else 0
+            arrays[name] = np.array([fill if value is None else value for value in values], dtype=dtype)
+    np.savez_compressed(path, **arrays)
+
+
+def read_npz(path, schema):
+    """Coloanele unui fișier .npz exportat: {nume: listă de valori Python}"""
+    with np.load(path) as data:
+        columns = {}
+        for name, kind in schema:
+            nulls = data[f'{name}.null'] if f'{name}.null' in data else None
+            if kind == 'string':
+                offsets, raw = data[f'{name}.offsets'], data[f'{name}.data'].tobytes()
+                values = [raw[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+            elif kind == 'datetime':
+                values = data[name].astype('datetime64[us]').astype(object).tolist()
+            elif kind == 'date':
+                values = data[name].astype(object).tolist()
+            else:
+                values = data[name].tolist()
+            if nulls is not None:
+                values = [None if null else value for value, null in zip(values, nulls)]
+            columns[name] = values
+        return columns
+
+
+WRITERS = {'parquet': ('.parquet', _write_parquet), 'npz': ('.npz', _write_npz)}
+
+
+# ==================== MANIFEST ====================
+
+def load_manifest(directory):
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return {'format_version': FORMAT_VERSION, 'tables': {}, 'runs': []}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_manifest(directory, manifest):
+    path = os.path.join(directory, MANIFEST)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+
+
+# ==================== EXPORT ====================
+
+def _month(value):
+    return f'{value.year:04d}-{value.month:02d}' if value is not None else 'unknown'
+
+
+def _after(table, watermark, schema_kinds):
+    """Condiția "după watermark" pe cheia (a, b, ...), expandată ca să folosească indexul"""
+    columns = [getattr(table.model, name) for name in table.cursor]
+    values = [_decode(watermark[name], schema_kinds[name]) for name in table.cursor]
+    clauses = []
+    for i in range(len(columns)):
+        clauses.append(and_(*[columns[j] == values[j] for j in range(i)], columns[i] > values[i]))
+    return or_(*clauses)
+
+
+def export_table(directory, table, manifest, run_id, fmt, chunk_size=CHUNK_SIZE, lag=DEFAULT_LAG):
+    """Exportă rândurile de după watermark; întoarce numărul de rânduri scrise"""
+    columns = table.columns()
+    schema = [(column.name, _kind(column)) for column in columns]
+    kinds = dict(schema)
+    state = manifest['tables'].setdefault(table.name, {
+        'cursor': list(table.cursor), 'month_column': table.month,
+        'schema': [{'name': name, 'type': kind} for name, kind in schema],
+        'watermark': None, 'rows': 0, 'files': []
+    })
+
+    statement = select(*columns).order_by(*[getattr(table.model, name) for name in table.cursor])
+    if state['watermark']:
+        statement = statement.where(_after(table, state['watermark'], kinds))
+    statement = statement.where(getattr(table.model, table.settle) <= datetime.utcnow() - timedelta(seconds=lag))
+
+    extension, writer = WRITERS[fmt]
+    names = [name for name, _ in schema]
+    month_index = names.index(table.month)
+    cursor_index = [names.index(name) for name in table.cursor]
+    written = 0
+    sequence = len(state['files'])
+
+    connection = db.session.connection().execution_options(stream_results=True, yield_per=chunk_size)
+    for rows in connection.execute(statement).partitions(chunk_size):
+        by_month = {}
+        for row in rows:
+            by_month.setdefault(_month(row[month_index]), []).append(row)
+
+        for month, month_rows in sorted(by_month.items()):
+            sequence += 1
+            folder = os.path.join(directory, table.name, f'month={month}')
+            os.makedirs(folder, exist_ok=True)
+            filename = f'part-{run_id}-{sequence:05d}{extension}'
+            path = os.path.join(folder, filename)
+            # Scriere atomică: un fișier parțial nu apare niciodată sub numele final
+            temporary = path + '.tmp' + extension
+            writer(temporary, schema, [list(values) for values in zip(*month_rows)])
+            os.replace(temporary, path)
+            state['files'].append({
+                'path': os.path.relpath(path, directory),
+                'month': month,
+                'rows': len(month_rows),
+                'format': fmt,
+                'run': run_id
+            })
+
+        last = rows[-1]
+        state['watermark'] = {name: _encode(last[index]) for name, index in zip(table.cursor, cursor_index)}
+        state['rows'] += len(rows)
+        written += len(rows)
+        _save_manifest(directory, manifest)
+
+    return written
+
+
+def export_activity(directory, tables=None, fmt='auto', chunk_size=CHUNK_SIZE, lag=DEFAULT_LAG):
+    """Exportă tabelele cerute (implicit toate); întoarce {tabel: rânduri noi}"""
+    if fmt == 'auto':
+        fmt = 'parquet' if _pyarrow() else 'npz'
+    elif fmt == 'parquet' and not _pyarrow():
+        raise RuntimeError('Formatul parquet necesită pachetul pyarrow (pip install pyarrow)')
+
+    os.makedirs(directory, exist_ok=True)
+    manifest = load_manifest(directory)
+    run_id = datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+    started_at = datetime.utcnow()
+
+    counts = {}
+    try:
+        for name in tables or TABLES:
+            counts[name] = export_table(directory, TABLES[name], manifest, run_id, fmt, chunk_size, lag)
+    finally:
+        db.session.rollback()
+
+    manifest['runs'].append({
+        'run': run_id,
+        'format': fmt,
+        'started_at': started_at.isoformat(),
+        'finished_at': datetime.utcnow().isoformat(),
+        'rows': counts
+    })
+    _save_manifest(directory, manifest)
+    return counts
@@ -0,0 +1,162 @@
+"""Cache pentru fragmente de șablon: {% cache %} ... {% endcache %}.
+
+    {% cache 'lessons-list', current_level, depends='lessons' %}
+        ... lista de lecții ...
+    {% endcache %}
+
+Fragmentul randat este păstrat după (șablon, argumente, versiunile datelor
+din `depends`). Versiunile sunt contoare în memorie incrementate după commit
+(app.events) când se modifică modelele de care depind fragmentele, deci o
+modificare invalidează imediat fragmentele din procesul curent. Pentru
+celelalte procese și pentru contoarele care nu invalidează (vizualizări),
+fiecare intrare expiră după FRAGMENT_CACHE_TTL secunde. Numărul de intrări
+este limitat (LRU, FRAGMENT_CACHE_SIZE).
+
+Ce ține de utilizatorul curent (navigația, abonamentul) rămâne în afara
+blocului sau intră explicit în argumente. Interogările costisitoare se dau
+șablonului prin deferred(), ca să ruleze doar când fragmentul nu e în cache.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from app.events import on_commit
+from app.models import Lesson, User, SubscriptionPlan
+
+
+class deferred:
+    """Listă calculată la prima folosire (ex. rezultatul unei interogări)"""
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._items = None
+
+    def _load(self):
+        if self._items is None:
+            self._items = list(self._loader())
+        return self._items
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def __bool__(self):
+        return bool(self._load())
+
+
+class FragmentCache:
+    """Fragmente randate, LRU + TTL, cu versiuni pe domenii de date"""
+
+    def __init__(self, max_entries=512, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = True
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def init_app(self, app):
+        self.max_entries = app.config.get('FRAGMENT_CACHE_SIZE', 512)
+        self.ttl = app.config.get('FRAGMENT_CACHE_TTL', 60)
+        self.enabled = app.config.get('FRAGMENT_CACHE_ENABLED', True)
+        app.jinja_env.add_extension(FragmentCacheExtension)
+        app.jinja_env.fragment_cache = self
+        app.jinja_env.globals['deferred'] = deferred
+        app.extensions['fragment_cache'] = self
+
+    def bump(self, *scopes):
+        """Invalidează fragmentele care depind de domeniile date"""
+        with self._lock:
+            for scope in scopes:
+                self._versions[scope] = self._versions.get(scope, 0) + 1
+
+    def get_or_render(self, key, depends, render):
+        if not self.enabled:
+            return render()
+
+        with self._lock:
+            key = key + tuple(self._versions.get(scope, 0) for scope in depends)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[1]
+            self.stats['misses'] += 1
+
+        # Randarea se face în afara lock-ului (o randare dublă ocazională e inofensivă)
+        html = render()
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, html)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+        return html
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries), versions=dict(self._versions))
+
+
+fragment_cache = FragmentCache()
+
+
+class FragmentCacheExtension(Extension):
+    """Tag-ul {% cache nume, argumente..., depends=domenii %}"""
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        depends = nodes.Const(())
+        while parser.stream.skip_if('comma'):
+            if parser.stream.current.test('name:depends') and parser.stream.look().test('assign'):
+                next(parser.stream)
+                next(parser.stream)
+                depends = parser.parse_expression()
+            else:
+                args.append(parser.parse_expression())
+
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        call = self.call_method('_cached', [nodes.Const(parser.name), nodes.List(args), depends])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _cached(self, template_name, args, depends, caller):
+        if isinstance(depends, str):
+            depends = (depends,)
+        key = (template_name,) + tuple(args)
+        return Markup(self.environment.fragment_cache.get_or_render(key, tuple(depends), caller))
+
+
+# ==================== INVALIDARE ====================
+
+@on_commit(Lesson, fields=('title', 'description', 'level', 'category', 'status', 'image_url',
+                           'duration_minutes', 'difficulty', 'rating', 'total_ratings', 'professor_id'))
+def _lessons_changed(changes):
+    fragment_cache.bump('lessons')
+
+
+@on_commit(User, fields=('first_name', 'last_name', 'role', 'bio', 'specialization',
+                         'rating', 'total_reviews', 'is_available'),
+           snapshot=lambda user: user.role)
+def _professors_changed(changes):
+    if any(change.data == 'professor' or change.op != 'insert' for change in changes):
+        # Numele profesorului apare și pe cardurile lecțiilor
+        fragment_cache.bump('professors', 'lessons')
+
+
+@on_commit(SubscriptionPlan)
+def _plans_changed(changes):
+    fragment_cache.bump('plans')
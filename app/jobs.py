@@ -0,0 +1,214 @@
+"""Coadă de job-uri în proces, cu thread-uri worker și reîncercări.
+
+Job-urile sunt înregistrate după nume (@job_queue.task('nume')) și puse în
+coadă cu job_queue.enqueue('nume', key=..., **payload). Transportul este
+abstractizat de JobBackend: LocalBackend ține job-urile în memorie, iar un
+broker extern (Redis, RabbitMQ etc.) poate fi adăugat implementând aceeași
+interfață.
+
+Job-urile trebuie să fie idempotente: un job poate rula de mai multe ori
+(reîncercări, repornirea procesului), de aceea handler-ele verifică singure
+dacă efectul a fost deja aplicat.
+"""
+import heapq
+import itertools
+import os
+import threading
+import time
+
+from app.models import db
+
+
+class Job:
+    """Un job din coadă: numele handler-ului, argumentele și cheia de idempotență"""
+
+    __slots__ = ('name', 'payload', 'key', 'attempts')
+
+    def __init__(self, name, payload, key=None, attempts=0):
+        self.name = name
+        self.payload = payload
+        self.key = key
+        self.attempts = attempts
+
+    def __repr__(self):
+        return f'<Job {self.name} key={self.key} attempts={self.attempts}>'
+
+
+class JobBackend:
+    """Interfața pentru transportul job-urilor"""
+
+    def push(self, job, delay=0):
+        raise NotImplementedError
+
+    def pop(self, timeout=None):
+        """Următorul job disponibil sau None după `timeout` secunde"""
+        raise NotImplementedError
+
+    def size(self):
+        raise NotImplementedError
+
+
+class LocalBackend(JobBackend):
+    """Coadă în memorie (heap după momentul în care job-ul devine disponibil)"""
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+
+    def push(self, job, delay=0):
+        with self._cond:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._counter), job))
+            self._cond.notify()
+
+    def pop(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self._heap and self._heap[0][0] <= now:
+                    return heapq.heappop(self._heap)[2]
+                wait = None if deadline is None else deadline - now
+                if self._heap:
+                    ready_in = self._heap[0][0] - now
+                    wait = ready_in if wait is None else min(wait, ready_in)
+                if wait is not None and wait <= 0:
+                    return None
+                self._cond.wait(wait)
+
+    def size(self):
+        with self._cond:
+            return len(self._heap)
+
+
+class JobQueue:
+    """Registrul de handler-e + worker-ii care consumă coada"""
+
+    def __init__(self, backend=None):
+        self.backend = backend or LocalBackend()
+        self.handlers = {}
+        self.app = None
+        self.workers = 0
+        self.max_retries = 3
+        self.retry_delay = 1.0
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+        # cheie -> 'queued' | 'running'; _rerun: job-ul de repus în coadă după rularea curentă
+        self._pending_keys = {}
+        self._rerun = {}
+        self.stats = {'enqueued': 0, 'processed': 0, 'retried': 0, 'failed': 0, 'deduplicated': 0, 'rerun': 0}
+
+    def init_app(self, app):
+        self.app = app
+        self.workers = app.config.get('JOB_WORKERS', 2)
+        self.max_retries = app.config.get('JOB_MAX_RETRIES', 3)
+        self.retry_delay = app.config.get('JOB_RETRY_DELAY', 1.0)
+        app.extensions['job_queue'] = self
+
+    def task(self, name):
+        """Decorator pentru înregistrarea unui handler"""
+        def decorator(func):
+            self.handlers[name] = func
+            return func
+        return decorator
+
+    def enqueue(self, name, key=None, **payload):
+        """Pune un job în coadă; job-urile cu aceeași cheie aflate deja în coadă sunt ignorate.
+
+        Dacă job-ul cu aceeași cheie rulează deja, s-ar putea să nu vadă datele
+        care au dus la acest apel - rulează încă o dată după ce termină.
+        """
+        if name not in self.handlers:
+            raise KeyError(f'Job necunoscut: {name}')
+
+        job = Job(name, payload, key)
+        if not self.workers:
+            # Mod sincron (teste / JOB_WORKERS=0): rulează imediat
+            self._run(job)
+            return job
+
+        with self._lock:
+            if key is not None:
+                state = self._pending_keys.get(key)
+                if state == 'running':
+                    self._rerun[key] = job
+                    self.stats['deduplicated'] += 1
+                    return None
+                if state == 'queued':
+                    self.stats['deduplicated'] += 1
+                    return None
+                self._pending_keys[key] = 'queued'
+            self.stats['enqueued'] += 1
+        self._ensure_started()
+        self.backend.push(job)
+        return job
+
+    def _ensure_started(self):
+        # Thread-urile nu supraviețuiesc unui fork - pornim worker-ii în procesul curent
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._threads = []
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker_loop, name=f'job-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            self._pid = os.getpid()
+
+    def _worker_loop(self):
+        while True:
+            job = self.backend.pop(timeout=1.0)
+            if job is None:
+                continue
+            if job.key is not None:
+                with self._lock:
+                    self._pending_keys[job.key] = 'running'
+            with self.app.app_context():
+                self._run(job)
+
+    def _run(self, job):
+        handler = self.handlers[job.name]
+        try:
+            handler(**job.payload)
+        except Exception as e:
+            db.session.rollback()
+            job.attempts += 1
+            if job.attempts <= self.max_retries and self.workers:
+                if job.key is not None:
+                    with self._lock:
+                        # Reîncercarea rulează oricum după eventualele apeluri din timpul rulării
+                        self._rerun.pop(job.key, None)
+                        self._pending_keys[job.key] = 'queued'
+                self.stats['retried'] += 1
+                # Backoff exponențial: 1s, 2s, 4s ...
+                self.backend.push(job, delay=self.retry_delay * 2 ** (job.attempts - 1))
+                print(f"Job {job.name} eșuat (încercarea {job.attempts}), se reîncearcă: {str(e)}")
+                return
+            self.stats['failed'] += 1
+            self._release(job)
+            print(f"Job {job.name} eșuat definitiv: {str(e)}")
+            return
+        self.stats['processed'] += 1
+        self._release(job)
+
+    def _release(self, job):
+        if job.key is None:
+            return
+        with self._lock:
+            rerun = self._rerun.pop(job.key, None)
+            if rerun is None:
+                self._pending_keys.pop(job.key, None)
+                return
+            self._pending_keys[job.key] = 'queued'
+            self.stats['rerun'] += 1
+        self.backend.push(rerun)
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, queued=self.backend.size(), workers=len(self._threads))
+
+
+job_queue = JobQueue()
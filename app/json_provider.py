@@ -0,0 +1,185 @@
+"""Provider JSON pentru Flask cu encoder rapid opțional și răspunsuri JSON în flux.
+
+FastJSONProvider folosește orjson sau ujson dacă sunt instalate (JSON_BACKEND =
+'auto' le încearcă în această ordine) și biblioteca standard altfel. Ieșirea
+rămâne compatibilă cu provider-ul implicit al Flask: chei sortate, datele
+calendaristice și celelalte tipuri speciale trec prin același `default`.
+
+Pentru colecții mari, stream_json_array / stream_json_object (și
+iter_json_lines, pentru exporturi JSONL) trimit răspunsul pe bucăți dintr-un generator: memoria rămâne
+constantă, iar primii octeți pleacă înainte ca lista să fie completă.
+
+Pentru obiecte ORM cu relații, generatorul potrivit este iter_query_batches:
+loturi keyset citite complet (.all()), fiecare cu încărcările lui selectinload.
+Un yield_per cu selectinload nu merge pe PyMySQL: SELECT-urile suplimentare de
+pe aceeași conexiune aruncă rândurile încă necitite ale cursorului nebufferizat.
+"""
+import json
+
+from flask import current_app, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import and_, or_
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+STREAM_CHUNK_ITEMS = 100
+STREAM_BATCH_ROWS = 500
+STREAM_ERROR = {'success': False, 'error': 'Răspunsul a fost întrerupt de o eroare.'}
+
+
+def _available_backend(preferred='auto'):
+    if preferred in ('auto', 'orjson') and orjson is not None:
+        return 'orjson'
+    if preferred in ('auto', 'ujson') and ujson is not None:
+        return 'ujson'
+    return 'json'
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """DefaultJSONProvider cu serializare prin orjson / ujson când sunt disponibile"""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.backend = _available_backend(app.config.get('JSON_BACKEND', 'auto'))
+
+    def encode(self, obj, pretty=False):
+        """Serializează direct în bytes (UTF-8)"""
+        if self.backend == 'orjson':
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if pretty:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=self.default, option=option)
+        if self.backend == 'ujson':
+            return ujson.dumps(obj, ensure_ascii=self.ensure_ascii, sort_keys=self.sort_keys,
+                               default=self.default, indent=2 if pretty else 0).encode('utf-8')
+        return json.dumps(obj, ensure_ascii=self.ensure_ascii, sort_keys=self.sort_keys,
+                          default=self.default, indent=2 if pretty else None,
+                          separators=None if pretty else (',', ':')).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # Opțiuni cerute explicit (indent, cls etc.) - doar biblioteca standard le suportă pe toate
+            return super().dumps(obj, **kwargs)
+        return self.encode(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if self.backend == 'orjson' and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(self.encode(obj, pretty) + b'\n', mimetype=self.mimetype)
+
+
+# ==================== RĂSPUNSURI ÎN FLUX ====================
+
+def _encoder():
+    provider = current_app.json
+    if isinstance(provider, FastJSONProvider):
+        return provider.encode
+    return lambda obj: provider.dumps(obj).encode('utf-8')
+
+
+def iter_query_batches(query, columns, entity_id, options=(), batch_size=STREAM_BATCH_ROWS):
+    """Obiectele unei interogări ORM, descrescător după (columns..., entity_id), în loturi keyset.
+
+    Fiecare lot este o interogare completă (LIMIT + .all()), deci încărcările
+    `options` (selectinload) rulează după ce rândurile lotului au fost citite.
+    """
+    keys = list(columns) + [entity_id]
+    ordering = [key.desc() for key in keys]
+    bound = None
+    while True:
+        batch_query = query
+        if bound is not None:
+            batch_query = batch_query.filter(or_(*[
+                and_(*[keys[j] == bound[j] for j in range(i)], keys[i] < bound[i])
+                for i in range(len(keys))
+            ]))
+        batch = batch_query.options(*options).order_by(*ordering).limit(batch_size).all()
+        yield from batch
+        if len(batch) < batch_size:
+            return
+        bound = [getattr(batch[-1], key.key) for key in keys]
+
+
+def iter_json_array(items, serialize=None, chunk_items=STREAM_CHUNK_ITEMS, counter=None):
+    """Generator de bytes pentru un array JSON; `counter` (listă) primește numărul de elemente"""
+    encode = _encoder()
+    yield b'['
+    buffer = []
+    count = 0
+    for item in items:
+        if serialize is not None:
+            item = serialize(item)
+        buffer.append(encode(item))
+        count += 1
+        if len(buffer) >= chunk_items:
+            yield (b',' if count > len(buffer) else b'') + b','.join(buffer)
+            buffer = []
+    if buffer:
+        yield (b',' if count > len(buffer) else b'') + b','.join(buffer)
+    yield b']'
+    if counter is not None:
+        counter.append(count)
+
+
+def iter_json_lines(items, serialize=None, chunk_items=STREAM_CHUNK_ITEMS):
+    """Generator de bytes JSON Lines (un obiect pe linie)"""
+    encode = _encoder()
+    buffer = []
+    for item in items:
+        if serialize is not None:
+            item = serialize(item)
+        buffer.append(encode(item) + b'\n')
+        if len(buffer) >= chunk_items:
+            yield b''.join(buffer)
+            buffer = []
+    if buffer:
+        yield b''.join(buffer)
+
+
+def stream_json_array(items, serialize=None, status=200):
+    """Răspuns cu un array JSON trimis pe bucăți"""
+    generator = stream_with_context(iter_json_array(items, serialize))
+    return current_app.response_class(generator, status=status, mimetype='application/json')
+
+
+def stream_json_object(key, items, head=None, tail=None, serialize=None, status=200):
+    """Răspuns {**head, key: [items...], **tail(count)} trimis pe bucăți.
+
+    `tail` primește numărul de elemente trimise (ex. lambda n: {'count': n}).
+    Statusul 200 și antetele pleacă odată cu primii octeți, deci o eroare
+    apărută în timpul listei nu mai poate deveni un 500: lista este închisă
+    și corpul se termină cu STREAM_ERROR în locul lui `tail`. De aceea
+    'success': True trebuie pus în `tail`, nu în `head` - clientul vede
+    succesul doar dacă răspunsul a ajuns complet.
+    """
+    def generate():
+        encode = _encoder()
+        prefix = encode(dict(head or {}))[:-1]
+        yield prefix + (b',' if len(prefix) > 1 else b'') + encode(key) + b':'
+        counter = []
+        try:
+            yield from iter_json_array(items, serialize, counter=counter)
+        except Exception as e:
+            print(f"Eroare în timpul răspunsului în flux: {str(e)}")
+            yield b'],' + encode(STREAM_ERROR)[1:] + b'\n'
+            return
+        trailer = encode(tail(counter[0]))[1:] if tail else b'}'
+        yield (b',' + trailer if len(trailer) > 1 else trailer) + b'\n'
+
+    return current_app.response_class(stream_with_context(generate()), status=status,
+                                      mimetype='application/json')
@@ -0,0 +1,428 @@
+"""Clasamentul studenților în timp real, prin Server-Sent Events.
+
+LeaderboardHub ține în memorie, per proces, punctele tuturor studenților
+(role='user') într-o listă sortată: rangul unui utilizator (1 + câți au
+strict mai multe puncte, ca în /api/leaderboard/global) se află prin căutare
+binară, iar top N prin slicing. Conexiunile deschise nu rulează interogări.
+
+Starea se încarcă la prima conexiune și e ținută la zi de un thread al
+procesului, doar cât timp există conexiuni:
+  - la fiecare LEADERBOARD_POLL_SECONDS recitește utilizatorii care apar în
+    points_ledger după ultima intrare văzută - orice modificare de puncte trece
+    prin registru, deci sunt prinse și cele făcute de alte procese. Fereastra
+    acoperă și ultimele SETTLE_SECONDS, pentru tranzacțiile comise în altă
+    ordine decât id-urile lor;
+  - un commit din procesul curent care modifică puncte (apply_points) trezește
+    thread-ul imediat;
+  - la LEADERBOARD_RELOAD_SECONDS, reîncărcare completă (conturi șterse,
+    schimbări de rol).
+
+Fiecare conexiune are propriul buffer, limitat, în care modificările se
+contopesc: pentru top rămâne doar ultima stare a fiecărui rang, pentru rangul
+propriu doar ultima valoare. Dacă între două citiri se schimbă mai mult de
+LEADERBOARD_MAX_PENDING ranguri, conexiunea primește un snapshot complet în
+locul delta-urilor.
+
+Conexiunile pot fi servite în două feluri: de ruta Flask (events(), câte un
+thread de worker ocupat pe toată durata conexiunii - potrivit doar pentru
+puțini spectatori sub serve.py/gthread) sau de aplicația ASGI
+(app/async_api.py, wait_async()), unde o conexiune deschisă nu ține niciun
+thread: bufferul trezește bucla asyncio prin call_soon_threadsafe.
+
+Evenimente trimise:
+  snapshot  {"top": [[rang, id, nume, puncte, lecții], ...], "total": n, "me": {...} | null}
+  delta     {"top": [...rangurile schimbate...], "size": n_top, "total": n, "me": {...}}
+"""
+import asyncio
+import bisect
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from app.ledger import POINTS_CHANGED_KEY
+from app.models import db, User, UserStats, PointsLedgerEntry
+
+SETTLE_SECONDS = 5
+RETRY_MS = 5000
+CHUNK_SIZE = 500
+
+
+class Subscription:
+    """O conexiune SSE: bufferul ei de modificări, contopite"""
+
+    def __init__(self, hub, user_id, top, max_pending):
+        self.hub = hub
+        self.user_id = user_id
+        self.top = top
+        self.max_pending = max_pending
+        self.last_me = None
+        self.sent_size = None
+        self._cond = threading.Condition()
+        self._top = {}
+        self._size = None
+        self._total = None
+        self._me = None
+        self._reset = True
+        self._async_waiter = None
+
+    def push(self, top_changes, size, total, me):
+        """Apelat de hub (sub lock-ul hub-ului) la fiecare lot de modificări"""
+        with self._cond:
+            if self._reset:
+                return
+            changed = False
+            for rank, row in top_changes.items():
+                if rank <= self.top:
+                    self._top[rank] = row
+                    changed = True
+            if size is not None and min(size, self.top) != self.sent_size:
+                self._size = self.sent_size = min(size, self.top)
+                changed = True
+            if total is not None:
+                self._total = total
+                changed = True
+            if me is not None:
+                self._me = me
+                changed = True
+            if len(self._top) > self.max_pending:
+                self._top.clear()
+                self._reset = True
+            if changed:
+                self._cond.notify()
+                if self._async_waiter is not None:
+                    loop, waiter = self._async_waiter
+                    loop.call_soon_threadsafe(waiter.set)
+
+    def _pending(self):
+        return self._reset or self._top or self._size is not None or self._me is not None \
+            or self._total is not None
+
+    def _take(self):
+        """Evenimentul din buffer (golindu-l), apelat sub self._cond cu _pending() adevărat"""
+        if self._reset:
+            return None
+        data = {'top': [self._top[rank] for rank in sorted(self._top)]}
+        if self._size is not None:
+            data['size'] = self._size
+        if self._total is not None:
+            data['total'] = self._total
+        if self._me is not None:
+            data['me'] = self._me
+        self._top, self._size, self._total, self._me = {}, None, None, None
+        return 'delta', data
+
+    def wait(self, timeout):
+        """Următorul eveniment ('snapshot' | 'delta', date) sau None după `timeout` secunde"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while not self._pending():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            item = self._take()
+        return item or ('snapshot', self.hub.snapshot(self))
+
+    async def wait_async(self, timeout):
+        """Ca wait(), dar așteaptă în bucla asyncio, fără a bloca un thread"""
+        loop = asyncio.get_running_loop()
+        if self._async_waiter is None:
+            self._async_waiter = (loop, asyncio.Event())
+        waiter = self._async_waiter[1]
+        deadline = loop.time() + timeout
+        while True:
+            waiter.clear()
+            with self._cond:
+                pending = self._pending()
+                item = self._take() if pending else None
+            if pending:
+                return item or ('snapshot', self.hub.snapshot(self))
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(waiter.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    def _clear(self):
+        with self._cond:
+            self._top, self._size, self._total, self._me = {}, None, None, None
+            self._reset = False
+
+    def events(self, heartbeat):
+        """Generatorul răspunsului text/event-stream"""
+        try:
+            yield f'retry: {RETRY_MS}\n\n'
+            while True:
+                item = self.wait(heartbeat)
+                if item is None:
+                    # Comentariu SSE: ține conexiunea deschisă și detectează clienții plecați
+                    yield ': ping\n\n'
+                    continue
+                yield format_event(*item)
+        finally:
+            self.hub.unsubscribe(self)
+
+
+def format_event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+
+class LeaderboardHub:
+    """Clasamentul în memorie + abonații procesului curent"""
+
+    def __init__(self):
+        self.app = None
+        self.max_top = 100
+        self.poll_seconds = 2.0
+        self.reload_seconds = 300
+        self.heartbeat = 15
+        self.max_pending = 50
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._pid = None
+        self._subscribers = {}
+        self._loaded_at = None
+        self._marks = deque()
+        self._reset_state()
+        self.stats = {'loads': 0, 'polls': 0, 'users_updated': 0, 'publishes': 0}
+
+    def init_app(self, app):
+        self.app = app
+        self.max_top = app.config.get('LEADERBOARD_STREAM_TOP', 100)
+        self.poll_seconds = app.config.get('LEADERBOARD_POLL_SECONDS', 2.0)
+        self.reload_seconds = app.config.get('LEADERBOARD_RELOAD_SECONDS', 300)
+        self.heartbeat = app.config.get('LEADERBOARD_HEARTBEAT_SECONDS', 15)
+        self.max_pending = app.config.get('LEADERBOARD_MAX_PENDING', 50)
+        app.extensions['leaderboard_hub'] = self
+
+    def _reset_state(self):
+        self._keys = []        # (-puncte, id), sortat
+        self._points = {}      # id -> puncte
+        self._names = {}
+        self._lessons = {}
+        self._last_top = []    # ultimul top publicat: [(id, puncte, lecții), ...]
+        self._last_total = 0
+
+    # ---------- starea în memorie ----------
+
+    def _set(self, user_id, points, name=None, lessons=None):
+        old = self._points.get(user_id)
+        if old is not None:
+            index = bisect.bisect_left(self._keys, (-old, user_id))
+            del self._keys[index]
+        if points is None:
+            self._points.pop(user_id, None)
+            self._names.pop(user_id, None)
+            self._lessons.pop(user_id, None)
+            return
+        bisect.insort(self._keys, (-points, user_id))
+        self._points[user_id] = points
+        if name is not None:
+            self._names[user_id] = name
+        if lessons is not None:
+            self._lessons[user_id] = lessons
+
+    def rank_of(self, user_id):
+        points = self._points.get(user_id)
+        if points is None:
+            return None
+        return bisect.bisect_left(self._keys, (-points,)) + 1
+
+    def _top(self):
+        return [(user_id, -neg_points, self._lessons.get(user_id, 0))
+                for neg_points, user_id in self._keys[:self.max_top]]
+
+    def _row(self, rank, entry):
+        user_id, points, lessons = entry
+        return [rank, user_id, self._names.get(user_id, ''), points, lessons]
+
+    def _me(self, user_id):
+        rank = self.rank_of(user_id)
+        if rank is None:
+            return None
+        return {'user_id': user_id, 'rank': rank, 'points': self._points[user_id]}
+
+    def snapshot(self, subscription):
+        """Starea completă pentru o conexiune (golește bufferul ei)"""
+        with self._lock:
+            subscription._clear()
+            me = self._me(subscription.user_id)
+            subscription.last_me = me
+            top = self._last_top[:subscription.top]
+            subscription.sent_size = len(top)
+            return {
+                'top': [self._row(rank, entry) for rank, entry in enumerate(top, start=1)],
+                'total': len(self._keys),
+                'me': me,
+            }
+
+    # ---------- încărcare și actualizare ----------
+
+    def _student_rows(self, query):
+        return query.with_entities(
+            User.id, User.first_name, User.last_name, User.role, User.points, UserStats.completed_lessons
+        ).outerjoin(UserStats, UserStats.user_id == User.id)
+
+    def load(self):
+        """Încarcă toți studenții (o singură interogare, citită pe bucăți)"""
+        max_id = db.session.query(func.max(PointsLedgerEntry.id)).scalar() or 0
+        rows = self._student_rows(User.query.filter(User.role == 'user')).yield_per(5000)
+        keys, points, names, lessons = [], {}, {}, {}
+        for user_id, first_name, last_name, _, user_points, completed in rows:
+            user_points = user_points or 0
+            keys.append((-user_points, user_id))
+            points[user_id] = user_points
+            names[user_id] = f'{first_name} {last_name}'
+            lessons[user_id] = completed or 0
+        keys.sort()
+        db.session.commit()
+
+        with self._lock:
+            self._keys, self._points, self._names, self._lessons = keys, points, names, lessons
+            self._loaded_at = time.monotonic()
+            self._marks = deque([(self._loaded_at, max_id)])
+            self.stats['loads'] += 1
+            self._publish()
+
+    def _since_id(self, now):
+        """Cea mai mare intrare din registru văzută acum cel puțin SETTLE_SECONDS"""
+        while len(self._marks) > 1 and self._marks[1][0] <= now - SETTLE_SECONDS:
+            self._marks.popleft()
+        return self._marks[0][1]
+
+    def poll(self):
+        """Recitește utilizatorii cu intrări noi în registru și publică modificările"""
+        now = time.monotonic()
+        if self._loaded_at is None or now - self._loaded_at >= self.reload_seconds:
+            self.load()
+            return
+
+        since = self._since_id(now)
+        max_id = db.session.query(func.max(PointsLedgerEntry.id)).scalar() or 0
+        user_ids = [row[0] for row in db.session.query(PointsLedgerEntry.user_id)
+                    .filter(PointsLedgerEntry.id > since).distinct()]
+        rows = []
+        for start in range(0, len(user_ids), CHUNK_SIZE):
+            rows.extend(self._student_rows(User.query.filter(User.id.in_(user_ids[start:start + CHUNK_SIZE]))))
+        db.session.commit()
+
+        with self._lock:
+            self._marks.append((now, max_id))
+            self.stats['polls'] += 1
+            found = set()
+            for user_id, first_name, last_name, role, user_points, completed in rows:
+                found.add(user_id)
+                if role != 'user':
+                    self._set(user_id, None)
+                elif self._points.get(user_id) != (user_points or 0) \
+                        or self._lessons.get(user_id) != (completed or 0):
+                    self._set(user_id, user_points or 0, f'{first_name} {last_name}', completed or 0)
+                    self.stats['users_updated'] += 1
+            for user_id in set(user_ids) - found:
+                self._set(user_id, None)
+            self._publish()
+
+    def _publish(self):
+        """Trimite abonaților diferențele față de ultimul top publicat și rangurile proprii"""
+        top = self._top()
+        changes = {rank: self._row(rank, entry) for rank, entry in enumerate(top, start=1)
+                   if rank > len(self._last_top) or self._last_top[rank - 1] != entry}
+        size = len(top) if len(top) != len(self._last_top) else None
+        self._last_top = top
+        total = len(self._keys)
+        total_changed = total != self._last_total
+        self._last_total = total
+
+        me_cache = {}
+        for user_id, subscriptions in self._subscribers.items():
+            if user_id not in me_cache:
+                me_cache[user_id] = self._me(user_id)
+            me = me_cache[user_id]
+            for subscription in subscriptions:
+                me_changed = me != subscription.last_me
+                if not (changes or size is not None or total_changed or me_changed):
+                    continue
+                subscription.last_me = me
+                subscription.push(changes, size, total if total_changed else None,
+                                  me if me_changed else None)
+        if changes or size is not None:
+            self.stats['publishes'] += 1
+
+    # ---------- abonați ----------
+
+    def subscribe(self, user_id, top):
+        """Înregistrează o conexiune; la prima conexiune din proces încarcă clasamentul"""
+        self.ensure_started()
+        if self._loaded_at is None:
+            self.load()
+        subscription = Subscription(self, user_id, min(max(top, 1), self.max_top), self.max_pending)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscribers.get(subscription.user_id)
+            if subscriptions:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscribers[subscription.user_id]
+
+    def wake(self):
+        self._wake.set()
+
+    def ensure_started(self):
+        # Ca la scheduler: thread-ul nu supraviețuiește unui fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Datele încărcate înainte de fork (warmup) rămân valabile: poll-ul
+            # continuă de la ultima intrare din registru văzută de părinte
+            self._subscribers = {}
+            thread = threading.Thread(target=self._loop, name='leaderboard-hub', daemon=True)
+            thread.start()
+            self._pid = os.getpid()
+
+    def _loop(self):
+        while True:
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+            if not self._subscribers:
+                continue
+            with self.app.app_context():
+                try:
+                    self.poll()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Eroare la actualizarea clasamentului: {str(e)}")
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, students=len(self._keys),
+                        connections=sum(len(subs) for subs in self._subscribers.values()))
+
+
+leaderboard_hub = LeaderboardHub()
+
+
+# ==================== COMMIT-URI LOCALE ====================
+
+@event.listens_for(Session, 'after_commit')
+def _points_committed(session):
+    if session.info.pop(POINTS_CHANGED_KEY, None):
+        leaderboard_hub.wake()
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _points_rolled_back(session, previous_transaction):
+    if not previous_transaction.nested:
+        session.info.pop(POINTS_CHANGED_KEY, None)
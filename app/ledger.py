@@ -0,0 +1,176 @@
+"""Registrul de puncte (append-only) și actualizarea atomică a soldului.
+
+Orice modificare a User.points trece prin apply_points(), care, în
+tranzacția apelantului:
+  - execută UPDATE users SET points = points + :amount, fără citire
+    prealabilă (pentru debit doar dacă soldul ajunge, altfel
+    InsufficientPoints) - rândul utilizatorului e blocat doar până la commit;
+  - adaugă intrarea corespunzătoare în points_ledger.
+
+Snapshot-urile periodice (take_snapshots) salvează soldul utilizatorilor la
+o anumită intrare din registru. Soldul istoric și auditul
+(User.points == ultimul snapshot + intrările de după el) citesc astfel doar
+intrările de după ultimul snapshot, prin indexul (user_id, id).
+
+Soldurile de dinainte de registru sunt preluate o singură dată ca intrări
+'opening' (flask points backfill).
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, insert, update
+
+from app.models import db, User, PointsLedgerEntry, PointsSnapshot
+
+CHUNK_SIZE = 1000
+# Intrările mai noi pot aparține unor tranzacții încă necomise
+# (id alocat, dar invizibil), așa că snapshot-ul nu le include încă
+SNAPSHOT_SETTLE_SECONDS = 60
+# Marcaj în session.info: tranzacția curentă a modificat puncte (vezi app/leaderboard_stream.py)
+POINTS_CHANGED_KEY = 'points_changed'
+
+
+class InsufficientPoints(Exception):
+    """Soldul nu acoperă debitul cerut"""
+
+
+def apply_points(user_id, amount, entry_type, reference_id=None):
+    """Adaugă `amount` (poate fi negativ) la soldul utilizatorului și îl înregistrează în registru"""
+    statement = update(User).where(User.id == user_id).values(points=User.points + amount)
+    if amount < 0:
+        statement = statement.where(User.points >= -amount)
+    if not db.session.execute(statement).rowcount:
+        if amount < 0:
+            raise InsufficientPoints(f'Sold insuficient pentru {-amount} puncte')
+        raise ValueError(f'Utilizator inexistent: {user_id}')
+
+    db.session.execute(insert(PointsLedgerEntry).values(
+        user_id=user_id,
+        amount=amount,
+        entry_type=entry_type,
+        reference_id=reference_id,
+        created_at=datetime.utcnow()
+    ))
+    db.session.info[POINTS_CHANGED_KEY] = True
+
+
+# ==================== SNAPSHOT-URI ====================
+
+def _latest_snapshots():
+    """Subinterogare: ultimul ledger_id inclus în snapshot, per utilizator"""
+    return db.session.query(
+        PointsSnapshot.user_id, func.max(PointsSnapshot.ledger_id).label('ledger_id')
+    ).group_by(PointsSnapshot.user_id).subquery()
+
+
+def _snapshot_balances(user_ids):
+    latest = _latest_snapshots()
+    rows = db.session.query(PointsSnapshot.user_id, PointsSnapshot.balance)\
+        .join(latest, and_(PointsSnapshot.user_id == latest.c.user_id,
+                           PointsSnapshot.ledger_id == latest.c.ledger_id))\
+        .filter(PointsSnapshot.user_id.in_(user_ids)).all()
+    return dict(rows)
+
+
+def take_snapshots():
+    """Salvează soldul utilizatorilor cu intrări noi de la ultima rundă; întoarce numărul de snapshot-uri.
+
+    Fiecare rundă acoperă intervalul de id-uri (ultimul snapshot, upper], deci
+    un utilizator fără intrări noi își păstrează snapshot-ul anterior.
+    """
+    settled = datetime.utcnow() - timedelta(seconds=SNAPSHOT_SETTLE_SECONDS)
+    upper = db.session.query(func.max(PointsLedgerEntry.id))\
+        .filter(PointsLedgerEntry.created_at <= settled).scalar()
+    lower = db.session.query(func.max(PointsSnapshot.ledger_id)).scalar() or 0
+    if not upper or upper <= lower:
+        return 0
+
+    deltas = db.session.query(PointsLedgerEntry.user_id, func.sum(PointsLedgerEntry.amount))\
+        .filter(PointsLedgerEntry.id > lower, PointsLedgerEntry.id <= upper)\
+        .group_by(PointsLedgerEntry.user_id).order_by(PointsLedgerEntry.user_id).all()
+
+    created = 0
+    now = datetime.utcnow()
+    for start in range(0, len(deltas), CHUNK_SIZE):
+        chunk = deltas[start:start + CHUNK_SIZE]
+        previous = _snapshot_balances([user_id for user_id, _ in chunk])
+        db.session.execute(insert(PointsSnapshot), [
+            {'user_id': user_id, 'ledger_id': upper, 'created_at': now,
+             'balance': previous.get(user_id, 0) + int(delta)}
+            for user_id, delta in chunk
+        ])
+        db.session.commit()
+        created += len(chunk)
+    return created
+
+
+def balance_at(user_id, ledger_id):
+    """Soldul utilizatorului imediat după intrarea `ledger_id`"""
+    snapshot = db.session.query(PointsSnapshot.ledger_id, PointsSnapshot.balance)\
+        .filter(PointsSnapshot.user_id == user_id, PointsSnapshot.ledger_id <= ledger_id)\
+        .order_by(PointsSnapshot.ledger_id.desc()).first()
+    base_id, balance = snapshot or (0, 0)
+    delta = db.session.query(func.sum(PointsLedgerEntry.amount))\
+        .filter(PointsLedgerEntry.user_id == user_id,
+                PointsLedgerEntry.id > base_id, PointsLedgerEntry.id <= ledger_id).scalar()
+    return balance + int(delta or 0)
+
+
+def history(user_id, limit=50, before_id=None):
+    """Intrările utilizatorului (cele mai noi primele), cu soldul după fiecare"""
+    query = PointsLedgerEntry.query.filter_by(user_id=user_id)
+    if before_id:
+        query = query.filter(PointsLedgerEntry.id < before_id)
+    entries = query.order_by(PointsLedgerEntry.id.desc()).limit(limit).all()
+    if not entries:
+        return []
+
+    balance = balance_at(user_id, entries[0].id)
+    result = []
+    for entry in entries:
+        result.append(dict(entry.to_dict(), balance_after=balance))
+        balance -= entry.amount
+    return result
+
+
+# ==================== AUDIT ====================
+
+def audit(chunk_size=CHUNK_SIZE):
+    """Utilizatorii al căror User.points diferă de registru: [(user_id, points, expected)]"""
+    latest = _latest_snapshots()
+    mismatches = []
+    last_id = 0
+    while True:
+        users = db.session.query(User.id, User.points).filter(User.id > last_id)\
+            .order_by(User.id).limit(chunk_size).all()
+        if not users:
+            break
+        last_id = users[-1].id
+        user_ids = [user.id for user in users]
+
+        expected = _snapshot_balances(user_ids)
+        after_snapshot = db.session.query(PointsLedgerEntry.user_id, func.sum(PointsLedgerEntry.amount))\
+            .outerjoin(latest, latest.c.user_id == PointsLedgerEntry.user_id)\
+            .filter(PointsLedgerEntry.user_id.in_(user_ids),
+                    PointsLedgerEntry.id > func.coalesce(latest.c.ledger_id, 0))\
+            .group_by(PointsLedgerEntry.user_id).all()
+        for user_id, delta in after_snapshot:
+            expected[user_id] = expected.get(user_id, 0) + int(delta)
+
+        for user in users:
+            if (user.points or 0) != expected.get(user.id, 0):
+                mismatches.append((user.id, user.points or 0, expected.get(user.id, 0)))
+    return mismatches
+
+
+def backfill_opening_balances(chunk_size=CHUNK_SIZE):
+    """Adaugă intrări 'opening' pentru soldurile care nu sunt acoperite de registru"""
+    created = 0
+    for user_id, points, expected in audit(chunk_size):
+        db.session.execute(insert(PointsLedgerEntry).values(
+            user_id=user_id, amount=points - expected, entry_type='opening', created_at=datetime.utcnow()
+        ))
+        created += 1
+        if created % chunk_size == 0:
+            db.session.commit()
+    db.session.commit()
+    return created
@@ -0,0 +1,114 @@
+"""Job-uri de întreținere pentru stările care expiră.
+
+Fiecare job actualizează rândurile în bucăți de CHUNK_SIZE (UPDATE pe
+cheia primară, câte un commit per bucată), iar selecția folosește
+indexurile compuse (status, dată) de pe tabelele respective:
+
+  rewards.expire        - recompensele pending cu expires_at trecut -> expired
+  subscriptions.expire  - abonamentele active cu end_date trecut -> expired,
+                          iar User.premium este resetat dacă utilizatorul nu
+                          mai are alt abonament activ
+  meetings.complete     - întâlnirile confirmate care s-au terminat -> completed
+  quiz.requeue          - quiz-urile trimise rămase neprocesate (vezi quiz_pipeline)
+  points.snapshot       - snapshot-urile soldurilor de puncte (vezi ledger)
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, exists, or_, select, update
+
+from app.ledger import take_snapshots
+from app.models import db, User, Reward, Subscription, Meeting
+from app.quiz_pipeline import requeue_unprocessed
+from app.scheduler import scheduler
+
+CHUNK_SIZE = 1000
+
+
+def _update_ids(model, ids, values, *conditions):
+    """UPDATE pe o bucată de id-uri; condițiile sunt reverificate (concurență cu request-urile)"""
+    return db.session.execute(
+        update(model).where(model.id.in_(ids), *conditions).values(**values),
+        execution_options={'synchronize_session': False}
+    ).rowcount
+
+
+@scheduler.every(300, 'rewards.expire')
+def expire_rewards():
+    now = datetime.utcnow()
+    conditions = (Reward.status == 'pending', Reward.expires_at < now)
+    touched = 0
+    while True:
+        ids = [row[0] for row in db.session.query(Reward.id).filter(*conditions).limit(CHUNK_SIZE).all()]
+        if not ids:
+            break
+        touched += _update_ids(Reward, ids, {'status': 'expired'}, *conditions)
+        db.session.commit()
+        if len(ids) < CHUNK_SIZE:
+            break
+    return touched
+
+
+@scheduler.every(300, 'subscriptions.expire')
+def expire_subscriptions():
+    now = datetime.utcnow()
+    conditions = (Subscription.status == 'active', Subscription.end_date <= now)
+    still_active = exists(select(Subscription.id).where(
+        Subscription.user_id == User.id,
+        Subscription.status == 'active',
+        or_(Subscription.end_date.is_(None), Subscription.end_date > now)
+    ))
+    touched = 0
+    while True:
+        rows = db.session.query(Subscription.id, Subscription.user_id).filter(*conditions)\
+            .limit(CHUNK_SIZE).all()
+        if not rows:
+            break
+        touched += _update_ids(Subscription, [row.id for row in rows], {'status': 'expired'}, *conditions)
+        touched += db.session.execute(
+            update(User)
+            .where(User.id.in_({row.user_id for row in rows}), User.premium == True, ~still_active)
+            .values(premium=False),
+            execution_options={'synchronize_session': False}
+        ).rowcount
+        db.session.commit()
+        if len(rows) < CHUNK_SIZE:
+            break
+    return touched
+
+
+@scheduler.every(600, 'meetings.complete')
+def complete_meetings():
+    # meeting_date este ora locală (vezi api_create_meeting)
+    now = datetime.now()
+    touched = 0
+    last_date, last_id = None, 0
+    while True:
+        query = db.session.query(Meeting.id, Meeting.meeting_date, Meeting.duration_minutes)\
+            .filter(Meeting.status == 'confirmed', Meeting.meeting_date <= now)
+        if last_date is not None:
+            # Paginare după (meeting_date, id): întâlnirile încă în desfășurare rămân în urmă
+            query = query.filter(or_(Meeting.meeting_date > last_date,
+                                     and_(Meeting.meeting_date == last_date, Meeting.id > last_id)))
+        rows = query.order_by(Meeting.meeting_date, Meeting.id).limit(CHUNK_SIZE).all()
+        if not rows:
+            break
+        last_date, last_id = rows[-1].meeting_date, rows[-1].id
+
+        ended = [row.id for row in rows
+                 if row.meeting_date + timedelta(minutes=row.duration_minutes or 60) <= now]
+        if ended:
+            touched += _update_ids(Meeting, ended, {'status': 'completed'}, Meeting.status == 'confirmed')
+            db.session.commit()
+        if len(rows) < CHUNK_SIZE:
+            break
+    return touched
+
+
+@scheduler.every(300, 'quiz.requeue')
+def requeue_submissions():
+    return requeue_unprocessed()
+
+
+@scheduler.every(3600, 'points.snapshot')
+def snapshot_points():
+    return take_snapshots()
@@ -2,16 +2,23 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_login import UserMixin
 from datetime import datetime, timezone
+from sqlalchemy import inspect
 
 db = SQLAlchemy()
 bcrypt = Bcrypt()
 
 class User(db.Model, UserMixin):
     __tablename__ = 'users'
+    # Sortările din grila de admin (paginare keyset, vezi app/user_grid.py)
+    __table_args__ = (
+        db.Index('ix_users_points_id', 'points', 'id'),
+        db.Index('ix_users_created_id', 'created_at', 'id'),
+        db.Index('ix_users_role_id', 'role', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    first_name = db.Column(db.String(20), nullable=False)
-    last_name = db.Column(db.String(20), nullable=False)
+    first_name = db.Column(db.String(20), nullable=False, index=True)
+    last_name = db.Column(db.String(20), nullable=False, index=True)
     email = db.Column(db.String(255), unique = True, nullable=False, index=True)
     password = db.Column(db.String(255), nullable=False)
     role = db.Column(db.Enum('user','professor', 'admin'), default='user', nullable=False)
@@ -26,7 +33,7 @@ class User(db.Model, UserMixin):
     is_available = db.Column(db.Boolean, default=True)
     
 
-    created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relații
     meetings_as_student = db.relationship('Meeting', foreign_keys='Meeting.student_id', backref='student', lazy=True)
@@ -51,13 +58,6 @@ class User(db.Model, UserMixin):
         """Verifică dacă utilizatorul poate solicita feedback (500+ puncte)"""
         return self.points >= 500
     
-    def deduct_points_for_feedback(self):
-        """Scade 500 puncte pentru feedback"""
-        if self.points >= 500:
-            self.points -= 500
-            return True
-        return False
-    
     def to_dict(self):
         """Convertește obiectul la dicționar (pentru JSON)"""
         data = {
@@ -174,6 +174,11 @@ class Lesson(db.Model):
 
 class Meeting(db.Model):
     __tablename__ = 'meetings'
+    __table_args__ = (
+        db.Index('ix_meetings_status_date', 'status', 'meeting_date'),
+        # Exportul incremental (app/export.py) continuă de la ultimul (updated_at, id)
+        db.Index('ix_meetings_updated', 'updated_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -198,8 +203,8 @@ class Meeting(db.Model):
     # Puncte consumate pentru această întâlnire
     points_cost = db.Column(db.Integer, default=500)
     
-    created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
-    updated_at = db.Column(db.DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def __repr__(self):
         return f'<Meeting {self.id}: Student {self.student_id} - Professor {self.professor_id}>'
@@ -266,6 +271,12 @@ class Quiz(db.Model):
     def __repr__(self):
         return f'<Quiz {self.title}>'
     
+    def question_count(self):
+        """Numărul de întrebări, fără să încarce întrebările dacă nu sunt deja încărcate"""
+        if 'questions' not in inspect(self).unloaded:
+            return len(self.questions)
+        return Question.query.filter_by(quiz_id=self.id).count()
+    
     def to_dict(self, include_questions=False):
         """Convertește la dicționar"""
         data = {
@@ -277,7 +288,7 @@ class Quiz(db.Model):
             'time_limit_minutes': self.time_limit_minutes,
             'max_attempts': self.max_attempts,
             'points_reward': self.points_reward,
-            'total_questions': len(self.questions)
+            'total_questions': self.question_count()
         }
         
         if include_questions:
@@ -291,7 +302,8 @@ class Question(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     
-    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id'), nullable=False)
+    # Index explicit: baremul (catalog.answer_key) se citește la fiecare notare
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id'), nullable=False, index=True)
     
     # Conținut
     question_text = db.Column(db.Text, nullable=False)
@@ -313,6 +325,9 @@ class Question(db.Model):
     # Ordinea în quiz
     order = db.Column(db.Integer, default=0)
     
+    # Întrebarea din bancă din care a fost generată (quiz-uri asamblate)
+    source_bank_question_id = db.Column(db.Integer, db.ForeignKey('bank_questions.id'), nullable=True, index=True)
+    
     def __repr__(self):
         return f'<Question {self.id}>'
     
@@ -369,6 +384,9 @@ class QuizSubmission(db.Model):
     
     submitted_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Setat de job-ul de procesare (puncte, progres) - garantează o singură aplicare
+    processed_at = db.Column(db.DateTime, nullable=True, index=True)
+    
     # Relații
     user = db.relationship('User', backref='quiz_submissions')
     lesson = db.relationship('Lesson', backref='quiz_submissions')
@@ -392,6 +410,62 @@ class QuizSubmission(db.Model):
         }
 
 
+class QuizAnswer(db.Model):
+    """Un răspuns corectat dintr-un quiz trimis (forma normalizată a QuizSubmission.answers)"""
+    __tablename__ = 'quiz_answers'
+    # Analiza itemilor citește toate răspunsurile unui quiz dintr-un interval pe index
+    __table_args__ = (db.Index('ix_quiz_answers_quiz', 'quiz_id', 'submission_id'),)
+    
+    submission_id = db.Column(db.Integer, db.ForeignKey('quiz_submissions.id', ondelete='CASCADE'), primary_key=True)
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), primary_key=True)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id', ondelete='CASCADE'), nullable=False)
+    
+    chosen = db.Column(db.String(1), nullable=True)  # A-D / T / F; NULL = fără răspuns
+    is_correct = db.Column(db.Boolean, nullable=False)
+    
+    def __repr__(self):
+        return f'<QuizAnswer submission {self.submission_id} question {self.question_id}>'
+
+
+class ReviewItem(db.Model):
+    """Starea de memorare SM-2 a unei întrebări pentru un utilizator (menținută de app/review.py)"""
+    __tablename__ = 'review_items'
+    # Coada /api/review/next: interval pe (user_id, due_at), fără sortare suplimentară
+    __table_args__ = (db.Index('ix_review_items_user_due', 'user_id', 'due_at'),)
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), primary_key=True)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id', ondelete='CASCADE'), nullable=False)
+    
+    # SM-2: factorul de ușurință, intervalul curent și repetițiile corecte consecutive
+    easiness = db.Column(db.Float, default=2.5, nullable=False)
+    interval_days = db.Column(db.Integer, default=0, nullable=False)
+    repetitions = db.Column(db.Integer, default=0, nullable=False)
+    lapses = db.Column(db.Integer, default=0, nullable=False)
+    
+    due_at = db.Column(db.DateTime, nullable=False)
+    last_reviewed_at = db.Column(db.DateTime, nullable=True)
+    last_quality = db.Column(db.SmallInteger, nullable=True)
+    
+    # Ultimul quiz aplicat: reprocesarea aceluiași submission nu schimbă starea
+    last_submission_id = db.Column(db.Integer, nullable=True)
+    
+    def __repr__(self):
+        return f'<ReviewItem user {self.user_id} question {self.question_id}>'
+    
+    def to_dict(self):
+        return {
+            'question_id': self.question_id,
+            'quiz_id': self.quiz_id,
+            'easiness': round(self.easiness, 2),
+            'interval_days': self.interval_days,
+            'repetitions': self.repetitions,
+            'lapses': self.lapses,
+            'due_at': self.due_at.isoformat(),
+            'last_reviewed_at': self.last_reviewed_at.isoformat() if self.last_reviewed_at else None
+        }
+
+
 class Badge(db.Model):
     __tablename__ = 'badges'
     
@@ -475,8 +549,11 @@ class UserProgress(db.Model):
     user = db.relationship('User', backref='progress')
     lesson = db.relationship('Lesson', backref='user_progress')
     
-    # Index unic pentru user + lesson
-    __table_args__ = (db.UniqueConstraint('user_id', 'lesson_id', name='unique_user_lesson'),)
+    # Index unic pentru user + lesson; (last_accessed, id) pentru exportul incremental
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'lesson_id', name='unique_user_lesson'),
+        db.Index('ix_user_progress_accessed', 'last_accessed', 'id'),
+    )
     
     def __repr__(self):
         return f'<UserProgress user={self.user_id} lesson={self.lesson_id}>'
@@ -496,8 +573,37 @@ class UserProgress(db.Model):
             'last_accessed': self.last_accessed.isoformat()
         }
 
+class LessonSimilarity(db.Model):
+    """Lecțiile parcurse de aceiași elevi (calculate de app/recommendations.py)"""
+    __tablename__ = 'lesson_similarities'
+    
+    lesson_id = db.Column(db.Integer, db.ForeignKey('lessons.id', ondelete='CASCADE'), primary_key=True)
+    similar_lesson_id = db.Column(db.Integer, db.ForeignKey('lessons.id', ondelete='CASCADE'), primary_key=True)
+    
+    score = db.Column(db.Float, nullable=False)  # Similaritate cosinus (0-1)
+    rank = db.Column(db.SmallInteger, nullable=False)
+    
+    def __repr__(self):
+        return f'<LessonSimilarity {self.lesson_id} -> {self.similar_lesson_id}>'
+
+
+class LessonRecommendation(db.Model):
+    """Lecțiile recomandate unui elev, în ordinea scorului (calculate de app/recommendations.py)"""
+    __tablename__ = 'lesson_recommendations'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    lesson_id = db.Column(db.Integer, db.ForeignKey('lessons.id', ondelete='CASCADE'), primary_key=True)
+    
+    score = db.Column(db.Float, nullable=False)
+    rank = db.Column(db.SmallInteger, nullable=False)
+    
+    def __repr__(self):
+        return f'<LessonRecommendation user {self.user_id} lesson {self.lesson_id}>'
+
+
 class Reward(db.Model):
     __tablename__ = 'rewards'
+    __table_args__ = (db.Index('ix_rewards_status_expires', 'status', 'expires_at'),)
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -560,6 +666,130 @@ class Reward(db.Model):
         }
 
 
+class PointsLedgerEntry(db.Model):
+    """Mișcare de puncte (append-only); User.points este suma intrărilor"""
+    __tablename__ = 'points_ledger'
+    __table_args__ = (db.Index('ix_points_ledger_user_id', 'user_id', 'id'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    
+    # Pozitiv = credit, negativ = debit
+    amount = db.Column(db.Integer, nullable=False)
+    
+    entry_type = db.Column(db.Enum('opening', 'signup', 'quiz', 'reward', 'meeting_hold',
+                                   'meeting_refund', 'adjustment'), nullable=False)
+    
+    # Id-ul obiectului sursă (submission, reward, meeting)
+    reference_id = db.Column(db.Integer, nullable=True)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<PointsLedgerEntry {self.entry_type} {self.amount:+d} user {self.user_id}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'amount': self.amount,
+            'entry_type': self.entry_type,
+            'reference_id': self.reference_id,
+            'created_at': self.created_at.isoformat()
+        }
+
+
+class PointsSnapshot(db.Model):
+    """Soldul unui utilizator după intrarea `ledger_id` din registru"""
+    __tablename__ = 'points_snapshots'
+    __table_args__ = (db.Index('ix_points_snapshots_user_ledger', 'user_id', 'ledger_id'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    ledger_id = db.Column(db.Integer, nullable=False)
+    balance = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<PointsSnapshot user {self.user_id} @ {self.ledger_id}: {self.balance}>'
+
+
+class UserStats(db.Model):
+    """Contoarele de progres ale unui utilizator (menținute de app/user_stats.py)"""
+    __tablename__ = 'user_stats'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    
+    completed_lessons = db.Column(db.Integer, default=0, nullable=False)
+    in_progress_lessons = db.Column(db.Integer, default=0, nullable=False)
+    total_badges = db.Column(db.Integer, default=0, nullable=False)
+    
+    # Zile consecutive cu cel puțin un quiz promovat, până la last_active_date inclusiv
+    consecutive_days = db.Column(db.Integer, default=0, nullable=False)
+    last_active_date = db.Column(db.Date, nullable=True)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<UserStats user {self.user_id}>'
+    
+    def current_streak(self, today=None):
+        """Seria curentă: contează doar dacă ultima zi activă este azi (UTC)"""
+        today = today or datetime.utcnow().date()
+        return self.consecutive_days if self.last_active_date == today else 0
+    
+    def to_dict(self):
+        return {
+            'completed_lessons': self.completed_lessons,
+            'in_progress_lessons': self.in_progress_lessons,
+            'total_badges': self.total_badges,
+            'consecutive_days': self.current_streak()
+        }
+
+
+class Notification(db.Model):
+    """Notificare compactă pentru un utilizator (scrisă de app/notifications.py)"""
+    __tablename__ = 'notifications'
+    __table_args__ = (db.Index('ix_notifications_user_id', 'user_id', 'id'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    
+    kind = db.Column(db.Enum('meeting_requested', 'meeting_confirmed', 'meeting_rejected',
+                             'meeting_cancelled', 'feedback_received'), nullable=False)
+    # Cine a declanșat notificarea și obiectul la care se referă (întâlnire, feedback)
+    actor_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
+    reference_id = db.Column(db.Integer, nullable=True)
+    
+    text = db.Column(db.String(255), nullable=False)
+    is_read = db.Column(db.Boolean, default=False, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<Notification {self.kind} user {self.user_id}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'text': self.text,
+            'reference_id': self.reference_id,
+            'link': '/meetings' if self.kind.startswith('meeting_') else None,
+            'is_read': self.is_read,
+            'created_at': self.created_at.isoformat()
+        }
+
+
+class NotificationCounter(db.Model):
+    """Numărul de notificări necitite ale unui utilizator"""
+    __tablename__ = 'notification_counters'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    unread = db.Column(db.Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f'<NotificationCounter user {self.user_id}: {self.unread}>'
+
+
 # ==================== SPRINT 5: CLASE & FEEDBACK ====================
 
 class Class(db.Model):
@@ -590,6 +820,12 @@ class Class(db.Model):
     def __repr__(self):
         return f'<Class {self.name}>'
     
+    def student_count(self):
+        """Numărul de studenți, fără să încarce înscrierile dacă nu sunt deja încărcate"""
+        if 'students' not in inspect(self).unloaded:
+            return len(self.students)
+        return ClassStudent.query.filter_by(class_id=self.id).count()
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -598,7 +834,7 @@ class Class(db.Model):
             'code': self.code,
             'professor_id': self.professor_id,
             'professor_name': self.professor.get_full_name(),
-            'student_count': len(self.students),
+            'student_count': self.student_count(),
             'status': self.status,
             'created_at': self.created_at.isoformat()
         }
@@ -616,17 +852,38 @@ class ClassStudent(db.Model):
     # Dată înscrierii
     joined_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    # Progres în clasă
+    # Progres în clasă (menținut de app/class_progress.py): lecțiile publicate ale profesorului clasei.
+    # server_default: coloanele se adaugă tabelei existente (flask db upgrade-columns), apoi `flask classes rebuild`
     progress_percentage = db.Column(db.Float, default=0.0)
+    lessons_started = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    lessons_completed = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    
+    # Quiz-urile trimise la lecțiile profesorului
+    quizzes_taken = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    quizzes_passed = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    score_sum = db.Column(db.Float, default=0.0, server_default='0', nullable=False)
+    
+    last_activity_at = db.Column(db.DateTime, nullable=True)
     
     # Relații
     student = db.relationship('User', backref='class_enrollments')
     
-    __table_args__ = (db.UniqueConstraint('class_id', 'student_id', name='unique_class_student'),)
+    # Unic pe (clasă, student); indexul pe student servește actualizările după activitatea elevului,
+    # iar (class_id, col, id) sortările listei clasei (app/class_roster.py)
+    __table_args__ = (
+        db.UniqueConstraint('class_id', 'student_id', name='unique_class_student'),
+        db.Index('ix_class_students_student', 'student_id'),
+        db.Index('ix_class_students_progress', 'class_id', 'progress_percentage', 'id'),
+        db.Index('ix_class_students_joined', 'class_id', 'joined_at', 'id'),
+    )
     
     def __repr__(self):
         return f'<ClassStudent class_id={self.class_id} student_id={self.student_id}>'
     
+    @property
+    def average_score(self):
+        return round(self.score_sum / self.quizzes_taken, 1) if self.quizzes_taken else None
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -636,6 +893,10 @@ class ClassStudent(db.Model):
             'student_email': self.student.email,
             'student_points': self.student.points,
             'progress_percentage': self.progress_percentage,
+            'lessons_completed': self.lessons_completed,
+            'quizzes_taken': self.quizzes_taken,
+            'average_score': self.average_score,
+            'last_activity_at': self.last_activity_at.isoformat() if self.last_activity_at else None,
             'joined_at': self.joined_at.isoformat()
         }
 
@@ -752,6 +1013,9 @@ class BankQuestion(db.Model):
     # Dificultate
     difficulty = db.Column(db.Integer, default=1)  # 1-5
     
+    # Semnătura MinHash a textului (detectare duplicate)
+    minhash = db.Column(db.LargeBinary, nullable=True)
+    
     # Dată
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
@@ -818,6 +1082,7 @@ class SubscriptionPlan(db.Model):
 class Subscription(db.Model):
     """Abonamente ale utilizatorilor"""
     __tablename__ = 'subscriptions'
+    __table_args__ = (db.Index('ix_subscriptions_status_end', 'status', 'end_date'),)
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -970,4 +1235,16 @@ class AdminSetting(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def __repr__(self):
-        return f'<AdminSetting {self.key}>'
\ No newline at end of file
+        return f'<AdminSetting {self.key}>'
+
+
+class SchedulerLock(db.Model):
+    """Lease pentru procesul care rulează job-urile programate (un singur lider)"""
+    __tablename__ = 'scheduler_locks'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    owner = db.Column(db.String(100), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f'<SchedulerLock {self.name} - {self.owner}>'
@@ -0,0 +1,341 @@
+"""Notificări pentru utilizatori: înregistrări compacte + contor de necitite.
+
+notify() adaugă, în tranzacția apelantului, un rând în `notifications` și
+incrementează atomic contorul din `notification_counters`. După commit,
+NotificationHub (per proces) reține id-ul celei mai noi notificări a
+destinatarului și trezește cererile long-poll ale acestuia.
+
+/api/notifications/poll?since=<id> răspunde imediat dacă există notificări
+mai noi decât `since`; altfel așteaptă, fără conexiune la baza de date, până
+la NOTIFICATIONS_POLL_TIMEOUT secunde. O cerere care expiră fără noutăți nu
+rulează nicio interogare: id-ul ultimei notificări și numărul de necitite
+sunt ținute în memorie (contorul, cu NOTIFICATIONS_COUNTER_TTL secunde, ca
+marcările ca citit din alte procese să ajungă și aici).
+
+Sub serve.py (gthread) o cerere în așteptare ține ocupat un thread de
+worker; aplicația ASGI (app/async_api.py) servește același endpoint cu
+wait_async(), unde așteptarea este o corutină trezită prin
+call_soon_threadsafe.
+
+Notificările scrise de alte procese sunt descoperite de thread-ul hub-ului:
+cât timp există cereri în așteptare, citește la NOTIFICATIONS_SCAN_SECONDS
+notificările cu id mai mare decât ultimul văzut - o singură interogare pe
+proces, indiferent de numărul de clienți.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from sqlalchemy import case, event, func, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import db, Notification, NotificationCounter
+
+MAX_TEXT_LENGTH = 255
+SCAN_LIMIT = 5000
+POLL_LIMIT = 50
+# Fereastra recitită la fiecare scanare: tranzacții comise în altă ordine decât id-urile lor
+SETTLE_SECONDS = 5
+
+_PENDING_KEY = 'notifications'
+
+
+# ==================== SCRIERE ====================
+
+def _pending(user_id, notification_id=None):
+    db.session.info.setdefault(_PENDING_KEY, []).append((user_id, notification_id))
+
+
+def _add_unread(user_id):
+    statement = update(NotificationCounter).where(NotificationCounter.user_id == user_id)\
+        .values(unread=NotificationCounter.unread + 1)
+    if db.session.execute(statement).rowcount:
+        return
+    # Primul contor al utilizatorului: pornește de la notificările necitite existente
+    unread = db.session.query(func.count(Notification.id))\
+        .filter(Notification.user_id == user_id, Notification.is_read.is_(False)).scalar()
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(NotificationCounter).values(user_id=user_id, unread=unread))
+    except IntegrityError:
+        # Creat concurent de altă tranzacție, care nu vedea notificarea noastră
+        db.session.execute(statement)
+
+
+def notify(user_id, kind, text, actor_id=None, reference_id=None):
+    """Creează o notificare pentru `user_id` (fără commit); întoarce id-ul ei"""
+    if len(text) > MAX_TEXT_LENGTH:
+        text = text[:MAX_TEXT_LENGTH - 1] + '…'
+    result = db.session.execute(insert(Notification).values(
+        user_id=user_id,
+        kind=kind,
+        text=text,
+        actor_id=actor_id,
+        reference_id=reference_id,
+        is_read=False,
+        created_at=datetime.utcnow()
+    ))
+    notification_id = result.inserted_primary_key[0]
+    _add_unread(user_id)
+    _pending(user_id, notification_id)
+    return notification_id
+
+
+def mark_read(user_id, ids=None):
+    """Marchează ca citite notificările date (sau toate); întoarce câte s-au schimbat"""
+    statement = update(Notification).where(Notification.user_id == user_id, Notification.is_read.is_(False))
+    if ids is not None:
+        statement = statement.where(Notification.id.in_(ids))
+    changed = db.session.execute(statement.values(is_read=True)).rowcount
+    if changed:
+        db.session.execute(
+            update(NotificationCounter).where(NotificationCounter.user_id == user_id)
+            .values(unread=case((NotificationCounter.unread > changed, NotificationCounter.unread - changed),
+                                else_=0))
+        )
+        _pending(user_id)
+    return changed
+
+
+def recent(user_id, limit=20, before_id=None):
+    """Notificările utilizatorului, cele mai noi întâi (paginare după id)"""
+    query = Notification.query.filter(Notification.user_id == user_id)
+    if before_id:
+        query = query.filter(Notification.id < before_id)
+    return query.order_by(Notification.id.desc()).limit(limit).all()
+
+
+def newer_than(user_id, since, limit=POLL_LIMIT):
+    return Notification.query.filter(Notification.user_id == user_id, Notification.id > since)\
+        .order_by(Notification.id).limit(limit).all()
+
+
+# ==================== HUB (LONG-POLL) ====================
+
+class _AsyncWaiter:
+    """Echivalentul threading.Event pentru o cerere servită în bucla asyncio"""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+
+    def set(self):
+        # Apelat din thread-ul care face commit-ul sau din thread-ul hub-ului
+        self.loop.call_soon_threadsafe(self.event.set)
+
+    def clear(self):
+        self.event.clear()
+
+    async def wait(self, timeout):
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+class NotificationHub:
+    """Ultima notificare + necititele per utilizator, și cererile long-poll în așteptare"""
+
+    def __init__(self):
+        self.app = None
+        self.poll_timeout = 25
+        self.counter_ttl = 30
+        self.scan_seconds = 2.0
+        self._lock = threading.Lock()
+        self._wake_scanner = threading.Event()
+        self._pid = None
+        self._latest = {}
+        self._unread = {}
+        self._waiters = {}
+        self._marks = deque()
+        self.stats = {'waits': 0, 'wakeups': 0, 'timeouts': 0, 'scans': 0, 'counter_loads': 0}
+
+    def init_app(self, app):
+        self.app = app
+        self.poll_timeout = app.config.get('NOTIFICATIONS_POLL_TIMEOUT', 25)
+        self.counter_ttl = app.config.get('NOTIFICATIONS_COUNTER_TTL', 30)
+        self.scan_seconds = app.config.get('NOTIFICATIONS_SCAN_SECONDS', 2.0)
+        app.extensions['notification_hub'] = self
+
+    # ---------- stare ----------
+
+    def cached_latest(self, user_id):
+        with self._lock:
+            return self._latest.get(user_id)
+
+    def remember_latest(self, user_id, latest):
+        """Reține id-ul citit din baza de date (fără a coborî sub unul publicat între timp)"""
+        with self._lock:
+            latest = max(latest or 0, self._latest.get(user_id, 0))
+            self._latest[user_id] = latest
+        return latest
+
+    def latest_id(self, user_id):
+        """Id-ul celei mai noi notificări a utilizatorului (interogare doar prima dată)"""
+        latest = self.cached_latest(user_id)
+        if latest is None:
+            latest = self.remember_latest(user_id, db.session.query(func.max(Notification.id))
+                                          .filter(Notification.user_id == user_id).scalar())
+        return latest
+
+    def cached_unread(self, user_id):
+        with self._lock:
+            cached = self._unread.get(user_id)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        return None
+
+    def remember_unread(self, user_id, counter):
+        count = counter.unread if counter else 0
+        with self._lock:
+            self._unread[user_id] = (count, time.monotonic() + self.counter_ttl)
+            self.stats['counter_loads'] += 1
+        return count
+
+    def unread(self, user_id):
+        count = self.cached_unread(user_id)
+        if count is None:
+            count = self.remember_unread(user_id, db.session.get(NotificationCounter, user_id))
+        return count
+
+    def published(self, changes):
+        """După commit: (user_id, notification_id | None) - notificare nouă sau marcare ca citit"""
+        with self._lock:
+            for user_id, notification_id in changes:
+                self._unread.pop(user_id, None)
+                if notification_id is not None:
+                    if notification_id > self._latest.get(user_id, 0):
+                        self._latest[user_id] = notification_id
+                    for waiter in self._waiters.get(user_id, ()):
+                        waiter.set()
+
+    # ---------- așteptare ----------
+
+    def _register(self, user_id, waiter):
+        self.ensure_started()
+        with self._lock:
+            self._waiters.setdefault(user_id, set()).add(waiter)
+            self.stats['waits'] += 1
+        self._wake_scanner.set()
+
+    def _unregister(self, user_id, waiter):
+        with self._lock:
+            waiters = self._waiters.get(user_id)
+            if waiters is not None:
+                waiters.discard(waiter)
+                if not waiters:
+                    del self._waiters[user_id]
+
+    def _check(self, user_id, since, remaining):
+        """Ultimul id dacă cererea trebuie să răspundă acum, altfel None"""
+        with self._lock:
+            latest = self._latest.get(user_id, 0)
+        if latest > since:
+            self.stats['wakeups'] += 1
+            return latest
+        if remaining <= 0:
+            self.stats['timeouts'] += 1
+            return latest
+        return None
+
+    def wait(self, user_id, since, timeout):
+        """Blochează până apare o notificare cu id > since sau expiră `timeout`; întoarce ultimul id"""
+        waiter = threading.Event()
+        self._register(user_id, waiter)
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                latest = self._check(user_id, since, remaining)
+                if latest is not None:
+                    return latest
+                waiter.wait(remaining)
+                waiter.clear()
+        finally:
+            self._unregister(user_id, waiter)
+
+    async def wait_async(self, user_id, since, timeout):
+        """Ca wait(), dar așteaptă în bucla asyncio, fără a bloca un thread"""
+        waiter = _AsyncWaiter()
+        self._register(user_id, waiter)
+        deadline = waiter.loop.time() + timeout
+        try:
+            while True:
+                waiter.clear()
+                remaining = deadline - waiter.loop.time()
+                latest = self._check(user_id, since, remaining)
+                if latest is not None:
+                    return latest
+                await waiter.wait(remaining)
+        finally:
+            self._unregister(user_id, waiter)
+
+    # ---------- notificările altor procese ----------
+
+    def ensure_started(self):
+        # Ca la scheduler: thread-ul nu supraviețuiește unui fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._marks = deque()
+            thread = threading.Thread(target=self._loop, name='notification-hub', daemon=True)
+            thread.start()
+            self._pid = os.getpid()
+
+    def _loop(self):
+        while True:
+            self._wake_scanner.wait(self.scan_seconds)
+            self._wake_scanner.clear()
+            if not self._waiters:
+                continue
+            with self.app.app_context():
+                try:
+                    self.scan()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Eroare la scanarea notificărilor: {str(e)}")
+
+    def scan(self):
+        """Citește notificările noi (din orice proces) și trezește destinatarii"""
+        now = time.monotonic()
+        if not self._marks:
+            start = db.session.query(func.max(Notification.id)).scalar() or 0
+            self._marks.append((now, start))
+        while len(self._marks) > 1 and self._marks[1][0] <= now - SETTLE_SECONDS:
+            self._marks.popleft()
+        since = self._marks[0][1]
+
+        rows = db.session.query(Notification.id, Notification.user_id)\
+            .filter(Notification.id > since).order_by(Notification.id).limit(SCAN_LIMIT).all()
+        db.session.commit()
+        if rows:
+            self._marks.append((now, rows[-1][0]))
+            self.published([(user_id, notification_id) for notification_id, user_id in rows])
+        self.stats['scans'] += 1
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, cached_users=len(self._latest),
+                        waiting=sum(len(waiters) for waiters in self._waiters.values()))
+
+
+notification_hub = NotificationHub()
+
+
+@event.listens_for(Session, 'after_commit')
+def _dispatch(session):
+    changes = session.info.pop(_PENDING_KEY, None)
+    if changes:
+        notification_hub.published(changes)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard(session, previous_transaction):
+    if not previous_transaction.nested:
+        session.info.pop(_PENDING_KEY, None)
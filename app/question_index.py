@@ -0,0 +1,307 @@
+"""Index în memorie pentru băncile de întrebări + asamblare de quiz-uri.
+
+Pentru fiecare bancă păstrăm id-urile întrebărilor grupate după
+(difficulty, question_type). Indexul unei bănci se construiește o singură
+dată (un singur SELECT pe bancă) și apoi este
+actualizat incremental din api_add_question_to_bank, deci eșantionarea nu
+mai citește tabela bank_questions - se încarcă doar întrebările alese, după id.
+
+Întrebările adăugate prin alte procese (workeri) nu trec prin
+add_question-ul acestui proces: la cel mult REFRESH_INTERVAL_SECONDS,
+folosirea unei bănci verifică (COUNT, MAX(id)) pe bancă și încarcă doar
+rândurile cu id mai mare decât ultimul văzut; dacă numărul nu se potrivește
+(rânduri șterse), banca este reconstruită.
+"""
+import random
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy import func, insert
+
+from app.models import db, BankQuestion, ClassStudent, Question, QuizSubmission
+
+# Tipurile de întrebări din bancă ce pot deveni întrebări de quiz
+QUIZ_QUESTION_TYPES = ('multiple_choice', 'true_false')
+MC_LETTERS = ('A', 'B', 'C', 'D')
+REFRESH_INTERVAL_SECONDS = 30
+
+TRUE_FALSE_ANSWERS = {
+    't': 'T', 'true': 'T', 'adevarat': 'T', 'adevărat': 'T',
+    'f': 'F', 'false': 'F', 'fals': 'F',
+}
+
+
+class AssemblyError(ValueError):
+    """Cererea de asamblare nu poate fi satisfăcută"""
+
+    def __init__(self, message, details=None):
+        super().__init__(message)
+        self.message = message
+        self.details = details
+
+
+# ==================== CONVERSIE BANCĂ -> QUIZ ====================
+
+def _mc_options(options):
+    """Normalizează opțiunile (dict sau listă) la {'A': ..., 'D': ...}"""
+    if isinstance(options, dict):
+        return {letter: options.get(letter) or options.get(letter.lower()) for letter in MC_LETTERS}
+    if isinstance(options, list):
+        padded = list(options[:len(MC_LETTERS)]) + [None] * len(MC_LETTERS)
+        return dict(zip(MC_LETTERS, padded))
+    return {}
+
+
+def to_question_row(bank_question):
+    """Câmpurile pentru Question, sau None dacă întrebarea nu e compatibilă cu un quiz"""
+    answer = (bank_question.correct_answer or '').strip()
+    row = {
+        'question_text': bank_question.text,
+        'question_type': bank_question.question_type,
+        'points': 10,
+        'source_bank_question_id': bank_question.id,
+    }
+
+    if bank_question.question_type == 'true_false':
+        letter = TRUE_FALSE_ANSWERS.get(answer.lower())
+        if not letter:
+            return None
+        row['correct_answer'] = letter
+        return row
+
+    if bank_question.question_type != 'multiple_choice':
+        return None
+
+    options = _mc_options(bank_question.options)
+    letter = answer.upper() if answer.upper() in MC_LETTERS else None
+    if letter is None:
+        # Răspunsul corect poate fi dat ca text al variantei
+        letter = next((k for k, v in options.items() if v and v.strip() == answer), None)
+    if not letter or not options.get(letter):
+        return None
+
+    row['correct_answer'] = letter
+    for key in MC_LETTERS:
+        row[f'option_{key.lower()}'] = options.get(key)
+    return row
+
+
+def _difficulty_of(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 1
+
+
+# ==================== INDEX ====================
+
+class _BankEntry:
+    """Indexul unei bănci + starea tabelei la ultima sincronizare"""
+
+    __slots__ = ('buckets', 'max_id', 'total', 'local_ids', 'checked_at')
+
+    def __init__(self, buckets, max_id, total):
+        self.buckets = buckets
+        self.max_id = max_id
+        self.total = total
+        # Id-uri > max_id adăugate deja de add_question în acest proces
+        self.local_ids = set()
+        self.checked_at = time.monotonic()
+
+
+class BankQuestionIndex:
+    """{bank_id: {(difficulty, question_type): [question_id, ...]}} partajat în proces"""
+
+    def __init__(self):
+        self._banks = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _state(bank_id):
+        """(numărul de rânduri, id-ul maxim) al băncii - o singură agregare pe index"""
+        total, max_id = db.session.query(func.count(BankQuestion.id), func.max(BankQuestion.id))\
+            .filter(BankQuestion.bank_id == bank_id).one()
+        return total, max_id or 0
+
+    @staticmethod
+    def _load(bank_id, buckets, after_id=0, up_to_id=None, skip=()):
+        # Încărcăm doar coloanele necesare, doar pentru întrebările compatibile cu quiz-urile
+        query = db.session.query(
+            BankQuestion.id, BankQuestion.text, BankQuestion.question_type, BankQuestion.difficulty,
+            BankQuestion.options, BankQuestion.correct_answer
+        ).filter(
+            BankQuestion.bank_id == bank_id,
+            BankQuestion.id > after_id,
+            BankQuestion.question_type.in_(QUIZ_QUESTION_TYPES)
+        )
+        if up_to_id is not None:
+            query = query.filter(BankQuestion.id <= up_to_id)
+        for q in query.order_by(BankQuestion.id).all():
+            if q.id not in skip and to_question_row(q) is not None:
+                buckets[(_difficulty_of(q.difficulty), q.question_type)].append(q.id)
+        return buckets
+
+    def _build(self, bank_id):
+        total, max_id = self._state(bank_id)
+        return _BankEntry(self._load(bank_id, defaultdict(list), up_to_id=max_id), max_id, total)
+
+    def _refresh(self, bank_id, entry):
+        """Aplică rândurile scrise de alte procese de la ultima sincronizare"""
+        total, max_id = self._state(bank_id)
+        if total == entry.total and max_id == entry.max_id:
+            entry.checked_at = time.monotonic()
+            return entry
+        new_rows = db.session.query(func.count(BankQuestion.id)).filter(
+            BankQuestion.bank_id == bank_id, BankQuestion.id > entry.max_id, BankQuestion.id <= max_id
+        ).scalar()
+        if entry.total + new_rows != total:
+            # Rânduri șterse între timp - reconstruim banca
+            return self._build(bank_id)
+        with self._lock:
+            self._load(bank_id, entry.buckets, after_id=entry.max_id, up_to_id=max_id, skip=entry.local_ids)
+            entry.local_ids = {qid for qid in entry.local_ids if qid > max_id}
+            entry.max_id, entry.total = max_id, total
+            entry.checked_at = time.monotonic()
+        return entry
+
+    def get(self, bank_id):
+        entry = self._banks.get(bank_id)
+        if entry is None:
+            built = self._build(bank_id)
+            with self._lock:
+                entry = self._banks.setdefault(bank_id, built)
+        elif time.monotonic() - entry.checked_at >= REFRESH_INTERVAL_SECONDS:
+            refreshed = self._refresh(bank_id, entry)
+            if refreshed is not entry:
+                with self._lock:
+                    self._banks[bank_id] = refreshed
+                entry = refreshed
+        return entry.buckets
+
+    def add_question(self, bank_question):
+        """Actualizare incrementală după inserarea unei întrebări"""
+        with self._lock:
+            entry = self._banks.get(bank_question.bank_id)
+            # Dacă banca nu e indexată încă, va fi construită complet la prima folosire
+            if entry is None:
+                return
+            # Rândul va fi numărat la următoarea sincronizare, dar nu adăugat a doua oară
+            entry.local_ids.add(bank_question.id)
+            if to_question_row(bank_question) is not None:
+                key = (_difficulty_of(bank_question.difficulty), bank_question.question_type)
+                entry.buckets[key].append(bank_question.id)
+
+    def invalidate(self, bank_id=None):
+        with self._lock:
+            if bank_id is None:
+                self._banks.clear()
+            else:
+                self._banks.pop(bank_id, None)
+
+    def counts(self, bank_id):
+        """Numărul de întrebări disponibile pe dificultate și tip"""
+        result = defaultdict(dict)
+        for (difficulty, question_type), ids in self.get(bank_id).items():
+            if ids:
+                result[str(difficulty)][question_type] = len(ids)
+        return dict(result)
+
+    def pool(self, bank_ids, difficulty, question_types):
+        """Id-urile candidate pentru o dificultate, din toate băncile cerute"""
+        ids = []
+        for bank_id in bank_ids:
+            buckets = self.get(bank_id)
+            for question_type in question_types:
+                ids.extend(buckets.get((difficulty, question_type), ()))
+        return ids
+
+
+bank_index = BankQuestionIndex()
+
+
+# ==================== ASAMBLARE ====================
+
+def distribution_to_counts(distribution, total):
+    """Transformă {dificultate: pondere sau număr} în {dificultate: număr}.
+
+    Ponderile sunt normalizate și rotunjite cu metoda restului cel mai mare,
+    astfel încât suma să fie exact `total`.
+    """
+    if not distribution:
+        raise AssemblyError('Distribuția de dificultate este obligatorie.')
+    try:
+        weights = {int(k): float(v) for k, v in distribution.items()}
+    except (TypeError, ValueError):
+        raise AssemblyError('Distribuție de dificultate invalidă.')
+    if any(w < 0 for w in weights.values()) or sum(weights.values()) <= 0:
+        raise AssemblyError('Distribuție de dificultate invalidă.')
+
+    weight_sum = sum(weights.values())
+    exact = {d: total * w / weight_sum for d, w in weights.items()}
+    counts = {d: int(v) for d, v in exact.items()}
+    remaining = total - sum(counts.values())
+    for d in sorted(exact, key=lambda d: exact[d] - counts[d], reverse=True)[:remaining]:
+        counts[d] += 1
+    return {d: c for d, c in counts.items() if c > 0}
+
+
+def seen_by_class(class_id):
+    """Id-urile întrebărilor din bancă deja văzute de studenții unei clase"""
+    rows = db.session.query(Question.source_bank_question_id)\
+        .join(QuizSubmission, QuizSubmission.quiz_id == Question.quiz_id)\
+        .join(ClassStudent, ClassStudent.student_id == QuizSubmission.user_id)\
+        .filter(ClassStudent.class_id == class_id,
+                Question.source_bank_question_id.isnot(None))\
+        .distinct().all()
+    return {row[0] for row in rows}
+
+
+def available_by_difficulty(bank_ids, question_types=QUIZ_QUESTION_TYPES, exclude_ids=None):
+    """{dificultate: număr de întrebări disponibile} pentru băncile date"""
+    exclude_ids = exclude_ids or set()
+    available = defaultdict(int)
+    for bank_id in bank_ids:
+        for (difficulty, question_type), ids in bank_index.get(bank_id).items():
+            if question_type in question_types:
+                available[difficulty] += sum(1 for qid in ids if qid not in exclude_ids)
+    return {d: n for d, n in available.items() if n > 0}
+
+
+def sample_questions(bank_ids, counts, question_types=QUIZ_QUESTION_TYPES, exclude_ids=None, rng=None):
+    """Alege id-uri de întrebări conform numărului cerut pe fiecare dificultate"""
+    rng = rng or random
+    exclude_ids = exclude_ids or set()
+    chosen = []
+    missing = {}
+
+    for difficulty, needed in sorted(counts.items()):
+        pool = [qid for qid in bank_index.pool(bank_ids, difficulty, question_types)
+                if qid not in exclude_ids]
+        if len(pool) < needed:
+            missing[str(difficulty)] = {'requested': needed, 'available': len(pool)}
+            continue
+        chosen.extend(rng.sample(pool, needed))
+
+    if missing:
+        raise AssemblyError('Nu sunt suficiente întrebări pentru distribuția cerută.', missing)
+    rng.shuffle(chosen)
+    return chosen
+
+
+def materialize_questions(quiz, question_ids):
+    """Creează întrebările quiz-ului dintr-un singur INSERT multi-row"""
+    bank_questions = {
+        q.id: q for q in BankQuestion.query.filter(BankQuestion.id.in_(question_ids)).all()
+    }
+    rows = []
+    for qid in question_ids:
+        bank_question = bank_questions.get(qid)
+        row = to_question_row(bank_question) if bank_question else None
+        if row is None:
+            continue
+        row.update(quiz_id=quiz.id, order=len(rows))
+        rows.append(row)
+    if rows:
+        db.session.execute(insert(Question), rows)
+    return len(rows)
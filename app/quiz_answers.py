@@ -0,0 +1,289 @@
+"""Răspunsurile normalizate ale quiz-urilor și analiza itemilor.
+
+Pe lângă QuizSubmission.answers (JSON), fiecare quiz trimis scrie câte un
+rând quiz_answers per întrebare din barem: (submission, întrebare, varianta
+aleasă, corect). Răspunsurile lipsă apar cu chosen = NULL. Quiz-urile trimise
+înainte de acest tabel se preiau cu job-ul 'answers.backfill' (sau
+`flask quiz backfill-answers`), în bucăți parcurse după id; baremul folosit
+este cel curent, deci întrebările șterse între timp nu mai apar. Pentru ele
+se scriu doar întrebările la care quiz-ul are un răspuns: întrebările nu au
+dată de creare, iar una adăugată după trimitere ar apărea altfel ca lăsată
+fără răspuns (greșită). Răspunsurile lipsă din quiz-urile vechi nu se
+înregistrează.
+
+analyze(quiz_id) citește răspunsurile unui quiz printr-un interval pe
+ix_quiz_answers_quiz, le așază în matrici submission × întrebare și
+calculează vectorizat, cu NumPy:
+
+  - dificultatea (p)      - proporția răspunsurilor corecte;
+  - discriminarea (D)     - p în grupul de sus minus p în grupul de jos
+                            (câte 27% din quiz-uri, după scorul total);
+  - corelația punct-biserială cu scorul restului quiz-ului;
+  - frecvența fiecărei variante (distractori), total și pe grupuri;
+  - fidelitatea quiz-ului (KR-20).
+"""
+import itertools
+import json
+
+import numpy as np
+from sqlalchemy import case, exists, insert, select
+
+from app import catalog
+from app.cache import cache
+from app.jobs import job_queue
+from app.models import db, Question, QuizAnswer, QuizSubmission
+
+CHUNK_SIZE = 1000
+GROUP_FRACTION = 0.27
+
+OPTIONS = ('A', 'B', 'C', 'D', 'T', 'F')
+_OPTION_CODES = {option: code for code, option in enumerate(OPTIONS)}
+
+
+def normalize(answer):
+    """Varianta aleasă, ca literă mare, sau None"""
+    if answer is None:
+        return None
+    answer = str(answer).strip().upper()[:1]
+    return answer or None
+
+
+def answer_rows(submission_id, quiz_id, answers, key, answered_only=False):
+    """Rândurile quiz_answers pentru un quiz corectat cu baremul `key`"""
+    rows = []
+    for question_id, (correct_answer, _) in key.items():
+        chosen = normalize(answers.get(str(question_id)))
+        if answered_only and chosen is None:
+            continue
+        rows.append({
+            'submission_id': submission_id,
+            'question_id': question_id,
+            'quiz_id': quiz_id,
+            'chosen': chosen,
+            'is_correct': chosen is not None and chosen == correct_answer
+        })
+    return rows
+
+
+def record(submission, answers, key):
+    """Scrie răspunsurile unui quiz trimis (submission are deja id); commit-ul rămâne la apelant"""
+    rows = answer_rows(submission.id, submission.quiz_id, answers, key)
+    if rows:
+        db.session.execute(insert(QuizAnswer.__table__), rows)
+    return len(rows)
+
+
+# ==================== PRELUAREA ISTORICULUI ====================
+
+def backfill_chunk(after_id=0, chunk_size=CHUNK_SIZE):
+    """Normalizează următoarele quiz-uri fără rânduri quiz_answers; întoarce (ultimul id, rânduri)"""
+    submissions = db.session.execute(
+        select(QuizSubmission.id, QuizSubmission.quiz_id, QuizSubmission.answers)
+        .where(QuizSubmission.id > after_id,
+               ~exists().where(QuizAnswer.submission_id == QuizSubmission.id))
+        .order_by(QuizSubmission.id)
+        .limit(chunk_size)
+    ).all()
+    if not submissions:
+        return None, 0
+
+    keys = catalog.answer_keys({quiz_id for _, quiz_id, _ in submissions})
+    rows = []
+    for submission_id, quiz_id, answers in submissions:
+        try:
+            answers = json.loads(answers or '{}')
+        except ValueError:
+            answers = {}
+        if not isinstance(answers, dict):
+            continue
+        # Baremul de acum poate conține întrebări adăugate după trimiterea quiz-ului
+        rows.extend(answer_rows(submission_id, quiz_id, answers, keys[quiz_id], answered_only=True))
+    if rows:
+        db.session.execute(insert(QuizAnswer.__table__), rows)
+    db.session.commit()
+    return submissions[-1].id, len(rows)
+
+
+@job_queue.task('answers.backfill')
+def backfill(after_id=0, chunk_size=CHUNK_SIZE):
+    """Normalizează toate quiz-urile trimise existente; întoarce numărul de rânduri scrise"""
+    written = 0
+    while after_id is not None:
+        after_id, count = backfill_chunk(after_id, chunk_size)
+        written += count
+    return written
+
+
+# ==================== ANALIZA ITEMILOR ====================
+
+def _load(quiz_id):
+    """Răspunsurile unui quiz ca matrice n × 4: submission, întrebare, cod variantă, corect"""
+    chosen = case(_OPTION_CODES, value=QuizAnswer.chosen, else_=-1)
+    result = db.session.connection().execute(
+        select(QuizAnswer.submission_id, QuizAnswer.question_id, chosen,
+               case((QuizAnswer.is_correct, 1), else_=0))
+        .where(QuizAnswer.quiz_id == quiz_id)
+    )
+    values = np.fromiter(itertools.chain.from_iterable(result), dtype=np.int64)
+    return values.reshape(-1, 4)
+
+
+def _rounded(values):
+    return [round(float(v), 3) if np.isfinite(v) else None for v in values]
+
+
+def _ratio(numerator, denominator):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return _rounded(numerator / denominator)
+
+
+def item_statistics(data, group_fraction=GROUP_FRACTION):
+    """Statisticile itemilor din matricea întoarsă de _load (fără bucle Python pe rânduri).
+
+    Nu orice quiz are rânduri pentru toate întrebările (quiz-uri preluate din
+    istoric, întrebări adăugate ulterior): celulele lipsă sunt excluse prin
+    `present`, iar scorul unui quiz este proporția corectă din întrebările
+    înregistrate pentru el.
+    """
+    submissions, submission_index = np.unique(data[:, 0], return_inverse=True)
+    questions, question_index = np.unique(data[:, 1], return_inverse=True)
+    shape = (len(submissions), len(questions))
+
+    correct = np.zeros(shape, dtype=np.int8)
+    correct[submission_index, question_index] = data[:, 3]
+    chosen = np.full(shape, -1, dtype=np.int8)
+    chosen[submission_index, question_index] = data[:, 2]
+    present = np.zeros(shape, dtype=bool)
+    present[submission_index, question_index] = True
+
+    answered = present.sum(axis=1)
+    right = correct.sum(axis=1)
+    score = right / answered  # fiecare quiz din date are cel puțin un rând
+    attempts = present.sum(axis=0)
+    difficulty = correct.sum(axis=0) / np.maximum(attempts, 1)
+
+    # Grupurile de sus / jos după scor; p pe grup doar din quiz-urile cu întrebarea înregistrată
+    group = max(1, int(round(len(submissions) * group_fraction)))
+    order = np.argsort(score, kind='stable')
+    lower, upper = order[:group], order[-group:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        discrimination = (correct[upper].sum(axis=0) / present[upper].sum(axis=0)
+                          - correct[lower].sum(axis=0) / present[lower].sum(axis=0))
+
+    # Corelația item - scorul restului quiz-ului (fără itemul însuși), pe quiz-urile
+    # care au întrebarea și cel puțin încă una
+    mask = present & (answered[:, None] > 1)
+    weight = mask.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rest = np.where(mask, (right[:, None] - correct) / (answered[:, None] - present), 0.0)
+        item = np.where(mask, correct, 0)
+        item_mean = item.sum(axis=0) / weight
+        rest_mean = rest.sum(axis=0) / weight
+        covariance = (item * rest).sum(axis=0) / weight - item_mean * rest_mean
+        item_var = (item * item).sum(axis=0) / weight - item_mean ** 2
+        rest_var = (rest * rest).sum(axis=0) / weight - rest_mean ** 2
+    point_biserial = _ratio(covariance, np.sqrt(np.clip(item_var, 0, None) * np.clip(rest_var, 0, None)))
+
+    # Distractori: câte quiz-uri au ales fiecare variantă, per întrebare
+    codes = np.arange(len(OPTIONS))
+    option_counts = (chosen[:, :, None] == codes).sum(axis=0)
+    upper_counts = (chosen[upper][:, :, None] == codes).sum(axis=0)
+    lower_counts = (chosen[lower][:, :, None] == codes).sum(axis=0)
+    omitted = ((chosen == -1) & present).sum(axis=0)
+
+    # KR-20 (fidelitatea quiz-ului), doar pe quiz-urile care au toate întrebările
+    k = len(questions)
+    complete = correct[answered == k]
+    reliability = None
+    if k > 1 and len(complete) > 1:
+        p = complete.mean(axis=0)
+        variance = complete.sum(axis=1).var()
+        if variance > 0:
+            reliability = round(float(k / (k - 1) * (1 - (p * (1 - p)).sum() / variance)), 3)
+
+    return {
+        'submissions': len(submissions),
+        'group_size': group,
+        'mean_score': round(float(score.mean()), 3),
+        'reliability_kr20': reliability,
+        'question_ids': questions.tolist(),
+        'attempts': attempts.tolist(),
+        'difficulty': [round(float(v), 3) for v in difficulty],
+        'discrimination': _rounded(discrimination),
+        'point_biserial': point_biserial,
+        'option_counts': option_counts.tolist(),
+        'upper_counts': upper_counts.tolist(),
+        'lower_counts': lower_counts.tolist(),
+        'omitted': omitted.tolist()
+    }
+
+
+def _flags(difficulty, discrimination):
+    flags = []
+    if difficulty < 0.2:
+        flags.append('too_hard')
+    elif difficulty > 0.9:
+        flags.append('too_easy')
+    if discrimination is None:
+        pass  # întrebarea lipsește din unul dintre grupuri
+    elif discrimination < 0:
+        flags.append('negative_discrimination')
+    elif discrimination < 0.2:
+        flags.append('low_discrimination')
+    return flags
+
+
+@cache.memoize(ttl=60, tags=lambda quiz_id: (f'quiz:{quiz_id}',), key=lambda quiz_id: f'item_analysis:{quiz_id}')
+def analyze(quiz_id):
+    """Analiza itemilor unui quiz (dict pentru API); quiz-urile noi apar după cel mult TTL"""
+    data = _load(quiz_id)
+    if not len(data):
+        return {'submissions': 0, 'reliability_kr20': None, 'mean_score': None, 'questions': []}
+
+    stats = item_statistics(data)
+    questions = {q.id: q for q in Question.query.filter(Question.id.in_(stats['question_ids']))}
+
+    items = []
+    for i, question_id in enumerate(stats['question_ids']):
+        question = questions.get(question_id)
+        if question is None:
+            continue
+        if question.question_type == 'true_false':
+            letters = ('T', 'F')
+        else:
+            letters = tuple(letter for letter, text in zip('ABCD', (
+                question.option_a, question.option_b, question.option_c, question.option_d)) if text)
+        correct_answer = question.correct_answer.upper()
+        attempts = stats['attempts'][i]
+        items.append({
+            'question_id': question_id,
+            'order': question.order,
+            'question_text': question.question_text,
+            'correct_answer': correct_answer,
+            'attempts': attempts,
+            'difficulty': stats['difficulty'][i],
+            'discrimination': stats['discrimination'][i],
+            'point_biserial': stats['point_biserial'][i],
+            'omitted': stats['omitted'][i],
+            'options': [{
+                'option': letter,
+                'is_correct': letter == correct_answer,
+                'count': stats['option_counts'][i][_OPTION_CODES[letter]],
+                'share': round(stats['option_counts'][i][_OPTION_CODES[letter]] / attempts, 3) if attempts else None,
+                'upper': stats['upper_counts'][i][_OPTION_CODES[letter]],
+                'lower': stats['lower_counts'][i][_OPTION_CODES[letter]]
+            } for letter in letters],
+            'flags': _flags(stats['difficulty'][i], stats['discrimination'][i])
+        })
+        # Distractor ales mai des de grupul de sus decât de cel de jos
+        if any(not option['is_correct'] and option['upper'] > option['lower'] for option in items[-1]['options']):
+            items[-1]['flags'].append('misleading_distractor')
+    items.sort(key=lambda item: (item['order'] or 0, item['question_id']))
+
+    return {
+        'submissions': stats['submissions'],
+        'group_size': stats['group_size'],
+        'mean_score': stats['mean_score'],
+        'reliability_kr20': stats['reliability_kr20'],
+        'questions': items
+    }
@@ -0,0 +1,55 @@
+"""Quiz-uri precompilate pentru pagina /quiz/<id> și /api/quiz/<id>.
+
+compiled(quiz_id) construiește o singură dată, pentru toți elevii, tot ce
+nu ține de utilizator: metadatele quiz-ului, titlul lecției, întrebările în
+ordine (fără răspunsurile corecte și explicații) și fragmentul HTML cu
+cardurile întrebărilor. Rezultatul stă în cache (app/cache.py) sub tag-ul
+'quiz:<id>' - invalidat la commit-urile pe Quiz / Question - și sub
+'lessons', pentru titlul lecției. O clasă întreagă care deschide același
+quiz costă astfel o compilare, nu câte una per elev.
+
+`version` este un hash al conținutului: identic în toate procesele pentru
+același quiz, servește ca ETag pentru /api/quiz/<id>.
+"""
+import hashlib
+import json
+
+from flask import render_template
+
+from app.cache import cache
+from app.models import db, Quiz, Question
+
+
+def _quiz_data(quiz, lesson, total_questions):
+    return {
+        'id': quiz.id,
+        'lesson_id': quiz.lesson_id,
+        'lesson_title': lesson.title if lesson else None,
+        'title': quiz.title,
+        'description': quiz.description,
+        'passing_score': quiz.passing_score,
+        'time_limit_minutes': quiz.time_limit_minutes,
+        'max_attempts': quiz.max_attempts,
+        'points_reward': quiz.points_reward,
+        'total_questions': total_questions
+    }
+
+
+@cache.memoize(tags=lambda quiz_id: (f'quiz:{quiz_id}', 'lessons'), key=lambda quiz_id: f'quiz_payload:{quiz_id}')
+def compiled(quiz_id):
+    """Payload-ul quiz-ului (dict) sau None dacă quiz-ul nu există"""
+    quiz = db.session.get(Quiz, quiz_id)
+    if quiz is None:
+        return None
+
+    questions = Question.query.filter_by(quiz_id=quiz_id).order_by(Question.order, Question.id).all()
+    data = {
+        'quiz': _quiz_data(quiz, quiz.lesson, len(questions)),
+        # to_dict() fără include_correct_answer: baremul nu ajunge la client
+        'questions': [question.to_dict() for question in questions]
+    }
+    data['version'] = hashlib.sha1(
+        json.dumps(data, sort_keys=True, default=str).encode()
+    ).hexdigest()[:16]
+    data['html'] = render_template('_quiz_questions.html', questions=data['questions'])
+    return data
@@ -0,0 +1,143 @@
+"""Procesarea asincronă a unui quiz trimis.
+
+Request-ul /api/quiz/<id>/submit face doar corectarea și inserarea
+QuizSubmission. Restul rulează în job-uri:
+
+  quiz.apply_submission  - puncte, UserProgress, UserStats, Lesson.completions,
+                           coada de recapitulare (app/review.py), progresul
+                           în clase (app/class_progress.py); o singură
+                           tranzacție, idempotentă după submission id prin
+                           QuizSubmission.processed_at
+  quiz.award             - badge-uri și recompense (idempotente prin natura lor:
+                           verifică ce a fost deja acordat)
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from app import user_stats, review, class_progress
+from app.jobs import job_queue
+from app.ledger import apply_points
+from app.models import db, AdminSetting, Badge, User, UserBadge, Lesson, QuizSubmission, UserProgress
+
+REQUEUE_SINCE_KEY = 'quiz_pipeline.requeue_since'
+
+
+def enqueue_submission(submission_id):
+    job_queue.enqueue('quiz.apply_submission', key=f'submission:{submission_id}',
+                      submission_id=submission_id)
+
+
+@job_queue.task('quiz.apply_submission')
+def apply_submission(submission_id):
+    """Aplică efectele unui quiz trimis (o singură dată per submission)"""
+    # Revendicare atomică: doar primul worker care setează processed_at continuă
+    claimed = db.session.execute(
+        update(QuizSubmission)
+        .where(QuizSubmission.id == submission_id, QuizSubmission.processed_at.is_(None))
+        .values(processed_at=datetime.utcnow())
+    ).rowcount
+    if not claimed:
+        db.session.rollback()
+        return
+
+    submission = QuizSubmission.query.get(submission_id)
+
+    # Puncte - UPDATE atomic + intrare în registru
+    if submission.points_earned:
+        apply_points(submission.user_id, submission.points_earned, 'quiz', submission.id)
+
+    progress = UserProgress.query.filter_by(
+        user_id=submission.user_id,
+        lesson_id=submission.lesson_id
+    ).first()
+
+    completed = False
+    if progress:
+        progress.quiz_attempts += 1
+        progress.best_score = max(progress.best_score, submission.score)
+        progress.last_accessed = datetime.utcnow()
+
+        if submission.passed and progress.status != 'completed':
+            previous_status = progress.status
+            progress.status = 'completed'
+            progress.completed_at = datetime.utcnow()
+            progress.progress_percentage = 100
+            user_stats.lesson_completed(submission.user_id, previous_status)
+            completed = True
+
+            # Incrementează completions la lecție
+            db.session.execute(
+                update(Lesson)
+                .where(Lesson.id == submission.lesson_id)
+                .values(completions=Lesson.completions + 1)
+            )
+
+    if submission.passed:
+        user_stats.quiz_passed(submission.user_id, submission.submitted_at.date())
+
+    # Întrebările greșite revin mâine în recapitulare, cele corecte mai târziu
+    review.record_submission(submission)
+
+    # Contoarele elevului în clasele profesorului lecției
+    class_progress.quiz_submitted(submission, db.session.get(Lesson, submission.lesson_id), completed)
+
+    db.session.commit()
+
+    job_queue.enqueue('quiz.award', key=f'award:{submission.user_id}', user_id=submission.user_id)
+
+
+@job_queue.task('quiz.award')
+def award(user_id):
+    """Verifică badge-urile și recompensele după actualizarea progresului"""
+    from app.routes import check_and_award_badges, check_and_award_rewards
+
+    user = User.query.get(user_id)
+    if not user:
+        return
+    check_and_award_badges(user)
+    check_and_award_rewards(user)
+
+
+def requeue_since():
+    """Momentul de la care quiz-urile trec prin procesarea asincronă.
+
+    Quiz-urile mai vechi au fost aplicate sincron, înainte de coloana
+    processed_at, și au processed_at NULL: nu trebuie repuse în coadă (ar primi
+    a doua oară punctele, progresul etc.). Momentul este înregistrat o singură
+    dată, la prima pornire a aplicației cu procesarea asincronă (admin_settings).
+    """
+    value = db.session.query(AdminSetting.value).filter(AdminSetting.key == REQUEUE_SINCE_KEY).scalar()
+    if value is None:
+        try:
+            with db.session.begin_nested():
+                db.session.add(AdminSetting(
+                    key=REQUEUE_SINCE_KEY, value=datetime.utcnow().isoformat(),
+                    description='Quiz-urile mai vechi au fost procesate sincron; nu se repun în coadă.'
+                ))
+        except IntegrityError:
+            pass  # Înregistrat între timp de alt proces
+        db.session.commit()
+        value = db.session.query(AdminSetting.value).filter(AdminSetting.key == REQUEUE_SINCE_KEY).scalar()
+    return datetime.fromisoformat(value)
+
+
+def requeue_unprocessed(older_than_seconds=60, limit=1000):
+    """Repune în coadă quiz-urile neprocesate (ex. după o repornire a procesului)"""
+    cutoff = datetime.utcnow() - timedelta(seconds=older_than_seconds)
+    ids = [row[0] for row in db.session.query(QuizSubmission.id)
+           .filter(QuizSubmission.processed_at.is_(None),
+                   QuizSubmission.submitted_at >= requeue_since(),
+                   QuizSubmission.submitted_at <= cutoff)
+           .order_by(QuizSubmission.id).limit(limit).all()]
+    for submission_id in ids:
+        enqueue_submission(submission_id)
+    return len(ids)
+
+
+def badges_since(user_id, moment):
+    """Badge-urile câștigate de la `moment` încoace (acordate de job-ul quiz.award sau de pagina de rezultate)"""
+    return Badge.query.join(UserBadge, UserBadge.badge_id == Badge.id)\
+        .filter(UserBadge.user_id == user_id, UserBadge.earned_at >= moment)\
+        .order_by(UserBadge.earned_at).all()
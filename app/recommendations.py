@@ -0,0 +1,252 @@
+"""Recomandări de lecții calculate în batch (co-completare, SciPy sparse).
+
+Un elev "a parcurs" o lecție dacă UserProgress are status 'completed' sau
+dacă a promovat quiz-ul lecției. Din aceste perechi, build() calculează:
+
+  1. matricea de co-completare C = Xᵀ·X (lecții × lecții), unde X este
+     matricea binară elevi × lecții. Elevii sunt citiți pe intervale de id
+     (USER_BLOCK elevi, indexurile pe user_id ale celor două tabele), iar
+     fiecare bloc adaugă Xᵀ·X la C - memoria depinde de mărimea blocului și
+     de numărul de lecții, nu de numărul total de rânduri;
+  2. similaritatea cosinus C[i, j] / √(C[i, i]·C[j, j]), păstrând doar
+     perechile cu cel puțin MIN_CO_COMPLETIONS elevi comuni și primele
+     TOP_K_SIMILAR lecții publicate per lecție -> lesson_similarities;
+  3. într-o a doua trecere pe aceleași blocuri, scorurile candidaților
+     X_bloc · S (fără lecțiile deja începute) și primele TOP_K_USER per
+     elev -> lesson_recommendations.
+
+Tabelele sunt citite de /api/lessons/recommended și /api/lessons/<id>/similar
+cu câte o singură interogare. Job-ul rulează zilnic prin scheduler (sau cu
+`flask recommendations build`); până la prima rulare, elevii văd lecțiile
+cele mai parcurse.
+"""
+import itertools
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import joinedload
+
+from app.jobs import job_queue
+from app.models import (
+    db, Lesson, UserProgress, QuizSubmission, LessonSimilarity, LessonRecommendation
+)
+from app.scheduler import scheduler
+
+USER_BLOCK = 50000
+TOP_K_SIMILAR = 10
+TOP_K_USER = 20
+MIN_CO_COMPLETIONS = 2
+WRITE_BATCH = 5000
+READ_BATCH = 20000
+
+
+# ==================== CITIREA DATELOR ====================
+
+def _pairs(statement):
+    """(user_id, lesson_id) dintr-o interogare, ca doi vectori int64"""
+    # Conexiunea Core (fără încărcarea ORM), cu cursor pe server unde driver-ul îl suportă;
+    # fromiter consumă rândurile pe rând, fără o listă intermediară de obiecte Python
+    result = db.session.connection().execution_options(stream_results=True, yield_per=READ_BATCH)\
+        .execute(statement)
+    values = np.fromiter(itertools.chain.from_iterable(result), dtype=np.int64)
+    return values[0::2], values[1::2]
+
+
+def _completed(lo, hi):
+    progress = _pairs(select(UserProgress.user_id, UserProgress.lesson_id).where(
+        UserProgress.user_id >= lo, UserProgress.user_id < hi, UserProgress.status == 'completed'))
+    passed = _pairs(select(QuizSubmission.user_id, QuizSubmission.lesson_id).where(
+        QuizSubmission.user_id >= lo, QuizSubmission.user_id < hi, QuizSubmission.passed == True
+    ).distinct())
+    return np.concatenate([progress[0], passed[0]]), np.concatenate([progress[1], passed[1]])
+
+
+def _started(lo, hi):
+    return _pairs(select(UserProgress.user_id, UserProgress.lesson_id).where(
+        UserProgress.user_id >= lo, UserProgress.user_id < hi))
+
+
+def _user_blocks(block_size):
+    bounds = [
+        db.session.query(func.min(model.user_id), func.max(model.user_id)).one()
+        for model in (UserProgress, QuizSubmission)
+    ]
+    lows = [low for low, _ in bounds if low is not None]
+    highs = [high for _, high in bounds if high is not None]
+    if not lows:
+        return
+    for lo in range(min(lows), max(highs) + 1, block_size):
+        yield lo, lo + block_size
+
+
+def _matrix(users, lessons, lo, hi, columns):
+    """Matricea binară (hi - lo) × lecții pentru perechile date"""
+    index = np.searchsorted(columns, lessons)
+    known = (index < len(columns))
+    known[known] = columns[index[known]] == lessons[known]
+    matrix = sp.csr_matrix(
+        (np.ones(known.sum(), np.float32), (users[known] - lo, index[known])),
+        shape=(hi - lo, len(columns))
+    )
+    # Aceeași lecție poate apărea de două ori (progres + quiz): rămâne 1
+    matrix.data[:] = 1
+    return matrix
+
+
+def _top_k(row_data, row_indices, k):
+    if len(row_data) > k:
+        keep = np.argpartition(-row_data, k - 1)[:k]
+        row_data, row_indices = row_data[keep], row_indices[keep]
+    order = np.argsort(-row_data, kind='stable')
+    return row_data[order], row_indices[order]
+
+
+# ==================== CALCUL ====================
+
+def similarity_matrix(co, published, min_common=MIN_CO_COMPLETIONS, k=TOP_K_SIMILAR):
+    """Primele k lecții similare (cosinus) per lecție, ca matrice CSR lecții × lecții"""
+    co = co.tocsr()
+    counts = co.diagonal()
+    co.setdiag(0)
+    co.data[co.data < min_common] = 0
+    co.eliminate_zeros()
+
+    norms = np.sqrt(np.maximum(counts, 1))
+    similarity = sp.diags(1 / norms) @ co @ sp.diags(1 / norms)
+    # Se recomandă doar lecții publicate
+    similarity = (similarity @ sp.diags(published.astype(np.float32))).tocsr()
+    similarity.eliminate_zeros()
+
+    rows, cols, values = [], [], []
+    for row in range(similarity.shape[0]):
+        start, end = similarity.indptr[row], similarity.indptr[row + 1]
+        if start == end:
+            continue
+        data, indices = _top_k(similarity.data[start:end], similarity.indices[start:end], k)
+        rows.append(np.full(len(data), row))
+        cols.append(indices)
+        values.append(data)
+    if not rows:
+        return sp.csr_matrix(similarity.shape, dtype=np.float32)
+    return sp.csr_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))),
+                         shape=similarity.shape, dtype=np.float32)
+
+
+def _write(model, rows):
+    # INSERT Core pe tabel (executemany), fără evidența ORM a obiectelor
+    for start in range(0, len(rows), WRITE_BATCH):
+        db.session.execute(insert(model.__table__), rows[start:start + WRITE_BATCH])
+
+
+def build(block_size=USER_BLOCK):
+    """Recalculează lesson_similarities și lesson_recommendations; întoarce un raport"""
+    started = time.perf_counter()
+    lessons = db.session.execute(select(Lesson.id, Lesson.status).order_by(Lesson.id)).all()
+    columns = np.array([lesson_id for lesson_id, _ in lessons], dtype=np.int64)
+    published = np.array([status == 'published' for _, status in lessons], dtype=bool)
+    blocks = list(_user_blocks(block_size))
+
+    # 1. Co-completarea, bloc cu bloc
+    co = sp.csr_matrix((len(columns), len(columns)), dtype=np.float32)
+    pairs = 0
+    for lo, hi in blocks:
+        users, lesson_ids = _completed(lo, hi)
+        pairs += len(users)
+        if len(users):
+            matrix = _matrix(users, lesson_ids, lo, hi, columns)
+            co = co + (matrix.T @ matrix)
+    db.session.rollback()
+
+    # 2. Lecțiile similare
+    similarity = similarity_matrix(co, published)
+    coo = similarity.tocoo()
+    ranks = {}
+    similar_rows = []
+    for row, col, score in sorted(zip(coo.row, coo.col, coo.data), key=lambda item: (item[0], -item[2])):
+        ranks[row] = ranks.get(row, 0) + 1
+        similar_rows.append({'lesson_id': int(columns[row]), 'similar_lesson_id': int(columns[col]),
+                             'score': round(float(score), 4), 'rank': ranks[row]})
+    db.session.execute(delete(LessonSimilarity))
+    _write(LessonSimilarity, similar_rows)
+    db.session.commit()
+
+    # 3. Candidații per elev
+    recommended_users = 0
+    recommendations = 0
+    for lo, hi in blocks:
+        users, lesson_ids = _completed(lo, hi)
+        rows = []
+        if len(users):
+            scores = (_matrix(users, lesson_ids, lo, hi, columns) @ similarity).tocsr()
+            seen = _matrix(*_started(lo, hi), lo, hi, columns) + _matrix(users, lesson_ids, lo, hi, columns)
+            scores = (scores - scores.multiply(seen.astype(bool))).tocsr()
+            scores.eliminate_zeros()
+            for row in np.flatnonzero(np.diff(scores.indptr)):
+                start, end = scores.indptr[row], scores.indptr[row + 1]
+                data, indices = _top_k(scores.data[start:end], scores.indices[start:end], TOP_K_USER)
+                rows.extend({'user_id': int(lo + row), 'lesson_id': int(columns[col]),
+                             'score': round(float(score), 4), 'rank': rank}
+                            for rank, (col, score) in enumerate(zip(indices, data), start=1))
+                recommended_users += 1
+        db.session.execute(delete(LessonRecommendation).where(
+            LessonRecommendation.user_id >= lo, LessonRecommendation.user_id < hi))
+        _write(LessonRecommendation, rows)
+        db.session.commit()
+        recommendations += len(rows)
+
+    return {
+        'lessons': len(columns),
+        'completions': pairs,
+        'similar_pairs': len(similar_rows),
+        'users': recommended_users,
+        'recommendations': recommendations,
+        'seconds': round(time.perf_counter() - started, 2)
+    }
+
+
+@job_queue.task('recommendations.build')
+def build_job():
+    report = build()
+    print(f"Recomandări recalculate: {report}")
+
+
+@scheduler.every(86400, 'recommendations.build')
+def schedule_build():
+    # Calculul durează minute: rulează în coada de job-uri, nu în thread-ul scheduler-ului
+    job_queue.enqueue('recommendations.build', key='recommendations.build')
+
+
+# ==================== CITIRE ====================
+
+def for_user(user_id, limit=10):
+    """Lecțiile recomandate unui elev: [(lecție, scor)], într-o singură interogare"""
+    return db.session.execute(
+        select(Lesson, LessonRecommendation.score)
+        .join(LessonRecommendation, LessonRecommendation.lesson_id == Lesson.id)
+        .options(joinedload(Lesson.professor))
+        .where(LessonRecommendation.user_id == user_id, Lesson.status == 'published')
+        .order_by(LessonRecommendation.rank)
+        .limit(limit)
+    ).all()
+
+
+def similar_to(lesson_id, limit=TOP_K_SIMILAR):
+    """Lecțiile similare unei lecții: [(lecție, scor)]"""
+    return db.session.execute(
+        select(Lesson, LessonSimilarity.score)
+        .join(LessonSimilarity, LessonSimilarity.similar_lesson_id == Lesson.id)
+        .options(joinedload(Lesson.professor))
+        .where(LessonSimilarity.lesson_id == lesson_id, Lesson.status == 'published')
+        .order_by(LessonSimilarity.rank)
+        .limit(limit)
+    ).all()
+
+
+def popular(user_id, limit=10):
+    """Rezervă pentru elevii fără recomandări: cele mai parcurse lecții neîncepute"""
+    started = select(UserProgress.lesson_id).where(UserProgress.user_id == user_id)
+    return [(lesson, None) for lesson in Lesson.query.options(joinedload(Lesson.professor))
+            .filter(Lesson.status == 'published', Lesson.id.not_in(started))
+            .order_by(Lesson.completions.desc(), Lesson.id).limit(limit)]
@@ -0,0 +1,254 @@
+"""Recapitulare cu repetiție spațiată (SM-2), construită din istoricul quiz-urilor.
+
+Fiecare întrebare la care a răspuns un elev are un rând ReviewItem cu starea
+SM-2 (ușurință, interval, repetiții) și momentul următoarei recapitulări
+(due_at). Starea se actualizează:
+
+  - din quiz-urile corectate (quiz.apply_submission, în aceeași tranzacție):
+    răspuns corect -> calitate 4, greșit sau lipsă -> calitate 1;
+  - din răspunsurile date în recapitulare (/api/review/<id>/answer).
+
+due(user_id) citește coada unui elev printr-un interval pe indexul
+(user_id, due_at), limitat la `limit` rânduri. Istoricul existent se preia
+cu job-ul 'review.backfill' (sau `flask review backfill`), în bucăți de
+CHUNK_SIZE quiz-uri parcurse după id; reluarea lui e sigură, pentru că
+fiecare rând reține ultimul submission aplicat.
+
+SM-2 depinde de ordinea răspunsurilor, deci istoricul trebuie aplicat înaintea
+quiz-urilor noi: actualizarea din quiz.apply_submission rulează doar după ce
+backfill-ul a terminat (marcajul LIVE_UPDATES_KEY din admin_settings). Până
+atunci, quiz-urile noi sunt preluate tot de backfill, care parcurge id-urile
+până la capăt. Pe o bază fără quiz-uri, marcajul se pune la pornire.
+"""
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app import catalog
+from app.jobs import job_queue
+from app.models import db, AdminSetting, Question, QuizSubmission, ReviewItem
+
+CHUNK_SIZE = 500
+LIVE_UPDATES_KEY = 'review.live_updates'
+
+QUALITY_CORRECT = 4
+QUALITY_WRONG = 1
+MIN_EASINESS = 1.3
+
+
+def schedule(item, quality, now):
+    """Aplică un răspuns de calitate 0-5 asupra stării SM-2 a rândului"""
+    if quality < 3:
+        # Greșeală: învățarea o ia de la capăt, întrebarea revine mâine
+        item.repetitions = 0
+        item.interval_days = 1
+        item.lapses = (item.lapses or 0) + 1
+    else:
+        item.repetitions = (item.repetitions or 0) + 1
+        if item.repetitions == 1:
+            item.interval_days = 1
+        elif item.repetitions == 2:
+            item.interval_days = 6
+        else:
+            item.interval_days = round(item.interval_days * item.easiness)
+
+    easiness = item.easiness if item.easiness is not None else 2.5
+    item.easiness = max(MIN_EASINESS, easiness + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    item.due_at = now + timedelta(days=item.interval_days)
+    item.last_reviewed_at = now
+    item.last_quality = quality
+
+
+def _new_item(user_id, question_id, quiz_id):
+    return ReviewItem(user_id=user_id, question_id=question_id, quiz_id=quiz_id,
+                      easiness=2.5, interval_days=0, repetitions=0, lapses=0)
+
+
+def _apply_submission(items, submission, key):
+    """Actualizează `items` ({(user_id, question_id): ReviewItem}) cu un quiz corectat cu baremul `key`"""
+    if not key:
+        return 0
+    answers = json.loads(submission.answers or '{}')
+    applied = 0
+    for question_id, (correct_answer, _) in key.items():
+        item = items.get((submission.user_id, question_id))
+        if item is None:
+            item = items[(submission.user_id, question_id)] = _new_item(
+                submission.user_id, question_id, submission.quiz_id)
+            db.session.add(item)
+        elif item.last_submission_id is not None and item.last_submission_id >= submission.id:
+            continue
+
+        answer = answers.get(str(question_id))
+        correct = bool(answer) and answer.upper() == correct_answer
+        schedule(item, QUALITY_CORRECT if correct else QUALITY_WRONG, submission.submitted_at)
+        item.last_submission_id = submission.id
+        applied += 1
+    return applied
+
+
+def _load_items(user_ids, question_ids):
+    if not user_ids or not question_ids:
+        return {}
+    rows = db.session.scalars(select(ReviewItem).where(
+        ReviewItem.user_id.in_(user_ids), ReviewItem.question_id.in_(question_ids)
+    ))
+    return {(item.user_id, item.question_id): item for item in rows}
+
+
+def record_submission(submission):
+    """Programează întrebările unui quiz corectat; commit-ul rămâne la apelant.
+
+    Cât timp istoricul nu a fost preluat, nu face nimic: quiz-ul va fi aplicat
+    de backfill, în ordinea id-urilor.
+    """
+    if not live_updates_enabled():
+        return 0
+    key = catalog.answer_key(submission.quiz_id)
+    items = _load_items([submission.user_id], list(key))
+    return _apply_submission(items, submission, key)
+
+
+# ==================== COADA ====================
+
+def due(user_id, limit=20, now=None):
+    """Întrebările de recapitulat acum: (rânduri, mai_sunt)"""
+    now = now or datetime.utcnow()
+    rows = db.session.scalars(
+        select(ReviewItem)
+        .where(ReviewItem.user_id == user_id, ReviewItem.due_at <= now)
+        .order_by(ReviewItem.due_at)
+        .limit(limit + 1)
+    ).all()
+    return rows[:limit], len(rows) > limit
+
+
+def next_items(user_id, limit=20, now=None):
+    """Coada de azi, cu textul întrebărilor (fără răspunsuri)"""
+    items, has_more = due(user_id, limit, now)
+    questions = {q.id: q for q in Question.query.filter(
+        Question.id.in_([item.question_id for item in items]))} if items else {}
+    return [
+        dict(questions[item.question_id].to_dict(), review=item.to_dict())
+        for item in items if item.question_id in questions
+    ], has_more
+
+
+def answer(user_id, question_id, user_answer, quality=None, now=None):
+    """Corectează un răspuns din recapitulare; întoarce (corect, întrebarea, rândul) sau None.
+
+    quality - autoevaluarea elevului pentru un răspuns corect (3 greu, 4 bine, 5 ușor)
+    """
+    now = now or datetime.utcnow()
+    item = db.session.get(ReviewItem, (user_id, question_id))
+    if item is None:
+        return None
+    question = db.session.get(Question, question_id)
+    if question is None:
+        return None
+
+    correct = bool(user_answer) and user_answer.upper() == question.correct_answer.upper()
+    if correct:
+        quality = quality if quality in (3, 4, 5) else QUALITY_CORRECT
+    else:
+        quality = QUALITY_WRONG
+    schedule(item, quality, now)
+    return correct, question, item
+
+
+def get_summary(user_id, now=None):
+    """Câte întrebări sunt de recapitulat azi și câte sunt urmărite în total"""
+    now = now or datetime.utcnow()
+    end_of_day = datetime.combine(now.date(), datetime.max.time())
+    base = db.session.query(db.func.count()).select_from(ReviewItem).filter(ReviewItem.user_id == user_id)
+    return {
+        'due_now': base.filter(ReviewItem.due_at <= now).scalar(),
+        'due_today': base.filter(ReviewItem.due_at <= end_of_day).scalar(),
+        'total': base.scalar()
+    }
+
+
+# ==================== PRELUAREA ISTORICULUI ====================
+
+def live_updates_enabled():
+    """Marcajul e citit cu blocare partajată (FOR SHARE), ținută până la commit-ul
+    apelantului: finish_backfill() îl poate schimba doar după ce tranzacțiile
+    care l-au văzut oprit s-au încheiat, deci le vede quiz-urile."""
+    value = db.session.query(AdminSetting.value).filter(AdminSetting.key == LIVE_UPDATES_KEY)\
+        .with_for_update(read=True).scalar()
+    return value == 'on'
+
+
+def _set_live_updates():
+    setting = AdminSetting.query.filter_by(key=LIVE_UPDATES_KEY).with_for_update().first()
+    if setting is None:
+        db.session.add(AdminSetting(
+            key=LIVE_UPDATES_KEY, value='on',
+            description='Istoricul a fost preluat; quiz-urile noi actualizează direct recapitularea.'
+        ))
+    else:
+        setting.value = 'on'
+    db.session.flush()
+
+
+def init_live_updates():
+    """La pornire: pe o bază fără quiz-uri nu există istoric de preluat"""
+    if db.session.query(AdminSetting.id).filter(AdminSetting.key == LIVE_UPDATES_KEY).scalar() is not None:
+        return
+    if db.session.query(QuizSubmission.id).first() is None:
+        try:
+            _set_live_updates()
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()  # Înregistrat între timp de alt proces
+
+
+def backfill_chunk(after_id=0, chunk_size=CHUNK_SIZE, commit=True):
+    """Aplică următoarele `chunk_size` quiz-uri cu id > after_id; întoarce (ultimul id, aplicate)"""
+    submissions = QuizSubmission.query.filter(QuizSubmission.id > after_id)\
+        .order_by(QuizSubmission.id).limit(chunk_size).all()
+    if not submissions:
+        return None, 0
+
+    keys = catalog.answer_keys({s.quiz_id for s in submissions})
+    question_ids = set().union(*keys.values())
+    items = _load_items({s.user_id for s in submissions}, question_ids)
+
+    applied = sum(_apply_submission(items, submission, keys[submission.quiz_id]) for submission in submissions)
+    if commit:
+        db.session.commit()
+    return submissions[-1].id, applied
+
+
+def finish_backfill(after_id, chunk_size=CHUNK_SIZE):
+    """Pornește actualizarea directă și aplică, în aceeași tranzacție, quiz-urile
+    trimise între timp (după `after_id`); întoarce numărul de actualizări.
+
+    Blocarea exclusivă a marcajului așteaptă tranzacțiile quiz.apply_submission
+    în curs și le ține pe cele noi până la commit, deci niciun quiz nu este
+    aplicat direct înaintea celor mai vechi decât el.
+    """
+    _set_live_updates()
+    applied = 0
+    while after_id is not None:
+        after_id, count = backfill_chunk(after_id, chunk_size, commit=False)
+        applied += count
+    db.session.commit()
+    return applied
+
+
+@job_queue.task('review.backfill')
+def backfill(after_id=0, chunk_size=CHUNK_SIZE):
+    """Preia toate quiz-urile existente în coada de recapitulare; întoarce numărul de actualizări"""
+    applied = 0
+    while True:
+        last_id, count = backfill_chunk(after_id, chunk_size)
+        applied += count
+        # Sesiunea nu acumulează obiectele tuturor bucăților
+        db.session.expunge_all()
+        if last_id is None:
+            break
+        after_id = last_id
+    return applied + finish_backfill(after_id, chunk_size)
@@ -1,12 +1,34 @@
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for, session, flash
+from flask import Blueprint, render_template, request, jsonify, redirect, url_for, session, flash, Response, stream_with_context, current_app, abort
 from flask_login import login_user, logout_user, login_required, current_user
 from app.models import (
     db, User, Meeting, Lesson, Quiz, Question, QuizSubmission, Badge, UserBadge,
     UserProgress, Reward, Class, ClassStudent, Feedback, QuestionBank, BankQuestion,
     SubscriptionPlan, Subscription, Payment, ProfessorPayment, AdminSetting
 )
+from app.course_pack import import_pack, export_pack, PackRecordError
+from app.question_index import (
+    bank_index, AssemblyError, distribution_to_counts, seen_by_class,
+    sample_questions, materialize_questions, available_by_difficulty, QUIZ_QUESTION_TYPES
+)
+from app.search import search_lessons, lesson_index
+from app.dedup import near_duplicates, minhash, signature_bytes, cluster_bank
+from app.quiz_pipeline import enqueue_submission, badges_since
+from app.jobs import job_queue
+from app.scheduling import meeting_index, meeting_interval
+from app.scheduler import scheduler
+from app.fragment_cache import deferred
+from app.cache import cache
+from app.json_provider import stream_json_object, iter_json_lines, iter_query_batches
+from app.leaderboard_stream import leaderboard_hub
+from app import user_grid, user_stats, catalog, quiz_payload, quiz_answers, class_progress, class_roster
+from app import notifications, review, recommendations
+from app.notifications import notification_hub
+from app import maintenance  # înregistrează job-urile programate
+from app.warmup import get_state as warmup_state
+from app.ledger import apply_points, InsufficientPoints, history as points_history, audit as points_audit
 from datetime import datetime, timezone, timedelta
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, text
+from sqlalchemy.orm import selectinload
 import re
 import json
 import random
@@ -74,7 +96,8 @@ def profile():
 @login_required
 def professors_page():
     """Pagina cu lista de profesori"""
-    professors = User.query.filter_by(role='professor', is_available=True).all()
+    # Interogarea rulează doar dacă fragmentul cu lista nu e în cache
+    professors = deferred(User.query.filter_by(role='professor', is_available=True).all)
     return render_template('professors.html', professors=professors)
 
 @main.route('/meetings')
@@ -102,10 +125,16 @@ def lessons_page():
     if level_filter != 'all':
         query = query.filter_by(level=level_filter)
     
-    # Ordonează după dată (cele mai noi primele)
-    lessons = query.order_by(Lesson.created_at.desc()).all()
+    # Ordonează după dată (cele mai noi primele); rulează doar la randarea fragmentului
+    lessons = deferred(query.order_by(Lesson.created_at.desc()).all)
+    
+    # Recomandările sunt per elev, deci rămân în afara fragmentului din cache
+    recommended = []
+    if level_filter == 'all' and current_user.role == 'user':
+        recommended = deferred(lambda: [lesson for lesson, _ in recommendations.for_user(current_user.id, 4)])
     
-    return render_template('lessons.html', lessons=lessons, current_level=level_filter)
+    return render_template('lessons.html', lessons=lessons, current_level=level_filter,
+                           recommended=recommended)
 
 
 @main.route('/my-lessons')
@@ -115,7 +144,7 @@ def my_lessons():
     if current_user.role != 'professor':
         return redirect(url_for('main.dashboard'))
 
-    lessons = Lesson.query.filter_by(professor_id=current_user.id).order_by(Lesson.created_at.desc()).all()
+    lessons = deferred(Lesson.query.filter_by(professor_id=current_user.id).order_by(Lesson.created_at.desc()).all)
     return render_template('my_lessons.html', lessons=lessons)
 
 
@@ -138,13 +167,18 @@ def lesson_detail(lesson_id):
             started_at=datetime.utcnow()
         )
         db.session.add(progress)
+        user_stats.lesson_started(current_user.id)
+        class_progress.lesson_visited(current_user.id, lesson, started=True)
         db.session.commit()
     else:
         # Actualizează ultima accesare
         progress.last_accessed = datetime.utcnow()
-        if progress.status == 'not_started':
+        started = progress.status == 'not_started'
+        if started:
             progress.status = 'in_progress'
             progress.started_at = datetime.utcnow()
+            user_stats.lesson_started(current_user.id)
+        class_progress.lesson_visited(current_user.id, lesson, started=started)
         db.session.commit()
     
     # Găsește quiz-ul pentru lecția curentă
@@ -166,8 +200,11 @@ def lesson_detail(lesson_id):
 @login_required
 def quiz_page(quiz_id):
     """Pagina pentru a lua un quiz"""
-    quiz = Quiz.query.get_or_404(quiz_id)
-    lesson = quiz.lesson
+    # Quiz-ul compilat (metadate + întrebări + HTML) e comun tuturor elevilor
+    payload = quiz_payload.compiled(quiz_id)
+    if payload is None:
+        abort(404)
+    quiz = payload['quiz']
     
     # Verifică numărul de încercări
     attempts = QuizSubmission.query.filter_by(
@@ -175,18 +212,14 @@ def quiz_page(quiz_id):
         quiz_id=quiz_id
     ).count()
     
-    if attempts >= quiz.max_attempts:
+    if attempts >= quiz['max_attempts']:
         return redirect(url_for('main.lesson_detail', 
-                              lesson_id=lesson.id,
+                              lesson_id=quiz['lesson_id'],
                               error='max_attempts'))
     
-    # Obține întrebările
-    questions = Question.query.filter_by(quiz_id=quiz_id).order_by(Question.order).all()
-    
     return render_template('quiz.html', 
                          quiz=quiz, 
-                         lesson=lesson,
-                         questions=questions,
+                         payload=payload,
                          attempt_number=attempts + 1)
 
 @main.route('/quiz/<int:quiz_id>/results/<int:submission_id>')
@@ -206,12 +239,12 @@ def quiz_results(quiz_id, submission_id):
     questions = Question.query.filter_by(quiz_id=quiz_id).order_by(Question.order).all()
     user_answers = json.loads(submission.answers)
     
-    # Găsește badge-urile câștigate (dacă există)
-    new_badges = []
+    # Badge-urile câștigate de la trimitere (job-ul quiz.award le poate fi acordat deja)
     if submission.passed:
-        new_badges = check_and_award_badges(current_user)
+        check_and_award_badges(current_user)
         # Verifică și acordă recompense
         check_and_award_rewards(current_user)
+    new_badges = badges_since(current_user.id, submission.submitted_at)
     
     return render_template('quiz_results.html',
                          submission=submission,
@@ -247,13 +280,15 @@ def classroom_detail(class_id):
         
         # Verifică permisiuni
         is_professor = cls.professor_id == current_user.id
-        is_student = any(cs.student_id == current_user.id for cs in cls.students)
+        is_student = not is_professor and class_roster.is_member(class_id, current_user.id)
         
         if not is_professor and not is_student:
             flash('Nu ai permisiunea să vizualizezi această clasă!', 'error')
             return redirect(url_for('main.professor_dashboard'))
         
-        return render_template('classroom_detail.html', cls=cls, is_professor=is_professor)
+        # Lista studenților se încarcă pe pagini din /api/classes/<id>/students
+        return render_template('classroom_detail.html', cls=cls, is_professor=is_professor,
+                               student_count=cls.student_count())
     except Exception as e:
         print(f"Eroare: {str(e)}")
         return "Not Found", 404
@@ -355,9 +390,13 @@ def api_register():
             new_user.specialization = data.get('specialization', 'Gramatică și Vocabular')
             new_user.is_available = True
         
-        new_user.points = 150
+        new_user.points = 0
         
         db.session.add(new_user)
+        db.session.flush()
+        
+        # Punctele de bun venit trec prin registrul de puncte
+        apply_points(new_user.id, 150, 'signup')
         db.session.commit()
         
         return jsonify({
@@ -402,6 +441,7 @@ def api_login():
 
 @main.route('/api/professors', methods=['GET'])
 @login_required
+@cache.cached_route(tags=('professors',))
 def api_get_professors():
     """Obține lista de profesori disponibili"""
     try:
@@ -416,6 +456,48 @@ def api_get_professors():
         print(f"Eroare la obținerea profesorilor: {str(e)}")
         return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
 
+@main.route('/api/professors/free-slots', methods=['GET'])
+@login_required
+def api_get_free_slots():
+    """Următoarele intervale libere la profesorii disponibili"""
+    try:
+        count = min(max(request.args.get('count', 10, type=int), 1), 100)
+        duration_minutes = request.args.get('duration', 60, type=int)
+        professor_id = request.args.get('professor_id', type=int)
+        start_str = request.args.get('from')
+        
+        if not 15 <= duration_minutes <= 180:
+            return jsonify({'success': False, 'error': 'Durata trebuie să fie între 15 și 180 de minute!'}), 400
+        
+        try:
+            start = max(datetime.fromisoformat(start_str), datetime.now()) if start_str else datetime.now()
+        except ValueError:
+            return jsonify({'success': False, 'error': 'Format de dată invalid!'}), 400
+        
+        query = db.session.query(User.id, User.first_name, User.last_name)\
+            .filter(User.role == 'professor', User.is_available == True)
+        if professor_id:
+            query = query.filter(User.id == professor_id)
+        names = {row.id: f"{row.first_name} {row.last_name}" for row in query.all()}
+        
+        slots = meeting_index.free_slots(sorted(names), count, duration_minutes, start)
+        
+        return jsonify({
+            'success': True,
+            'slots': [
+                {
+                    'professor_id': pid,
+                    'professor_name': names[pid],
+                    'start': slot_start.isoformat(),
+                    'end': (slot_start + timedelta(minutes=duration_minutes)).isoformat()
+                } for slot_start, pid in slots
+            ]
+        }), 200
+        
+    except Exception as e:
+        print(f"Eroare la căutarea intervalelor libere: {str(e)}")
+        return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
+
 # ==================== API ENDPOINTS - MEETINGS ====================
 
 @main.route('/api/meetings/create', methods=['POST'])
@@ -428,11 +510,15 @@ def api_create_meeting():
         professor_id = data.get('professor_id')
         meeting_date_str = data.get('meeting_date')  # Format: "2025-11-25T14:30"
         student_message = data.get('message', '').strip()
+        duration_minutes = data.get('duration_minutes', 60)
         
         # Validare
         if not professor_id or not meeting_date_str:
             return jsonify({'success': False, 'error': 'Profesorul și data sunt obligatorii!'}), 400
         
+        if not isinstance(duration_minutes, int) or not 15 <= duration_minutes <= 180:
+            return jsonify({'success': False, 'error': 'Durata trebuie să fie între 15 și 180 de minute!'}), 400
+        
         # Verifică punctele utilizatorului
         if not current_user.can_request_feedback():
             return jsonify({
@@ -458,20 +544,52 @@ def api_create_meeting():
         if meeting_date <= datetime.now():
             return jsonify({'success': False, 'error': 'Data întâlnirii trebuie să fie în viitor!'}), 400
         
+        # Verifică dacă profesorul are deja o întâlnire în acest interval: indexul respinge
+        # rapid, apoi verificarea din baza de date, sub blocarea profesorului, decide
+        interval = meeting_interval(meeting_date, duration_minutes)
+        conflict = meeting_index.find_conflict(professor.id, *interval) \
+            or meeting_index.db_conflict(professor.id, *interval)
+        if conflict:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'error': 'Profesorul are deja o întâlnire programată în acest interval!',
+                'conflict': {
+                    'meeting_date': conflict.meeting_date.isoformat(),
+                    'duration_minutes': conflict.duration_minutes
+                }
+            }), 409
+        
         # Creează întâlnirea
         new_meeting = Meeting(
             student_id=current_user.id,
             professor_id=professor_id,
             meeting_date=meeting_date,
+            duration_minutes=duration_minutes,
             student_message=student_message,
             status='pending',
             points_cost=500
         )
         
-        # Scade punctele
-        current_user.deduct_points_for_feedback()
-        
         db.session.add(new_meeting)
+        db.session.flush()
+        
+        # Scade punctele (atomic - cererile concurente nu pot trece de sold)
+        try:
+            apply_points(current_user.id, -new_meeting.points_cost, 'meeting_hold', new_meeting.id)
+        except InsufficientPoints:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'error': f'Nu ai suficiente puncte! Ai nevoie de 500 puncte. Ai doar {current_user.points} puncte.'
+            }), 400
+        
+        notifications.notify(
+            professor.id, 'meeting_requested',
+            f'{current_user.get_full_name()} a cerut o întâlnire pe {meeting_date:%d.%m.%Y %H:%M}',
+            actor_id=current_user.id, reference_id=new_meeting.id
+        )
+        
         db.session.commit()
         
         return jsonify({
@@ -491,7 +609,8 @@ def api_create_meeting():
 def api_respond_meeting(meeting_id):
     """Profesorul răspunde la o cerere de întâlnire"""
     try:
-        meeting = Meeting.query.get(meeting_id)
+        # Blocăm rândul întâlnirii până la commit: două răspunsuri simultane nu pot returna punctele de două ori
+        meeting = db.session.get(Meeting, meeting_id, with_for_update=True)
         
         if not meeting:
             return jsonify({'success': False, 'error': 'Întâlnire inexistentă!'}), 404
@@ -500,6 +619,10 @@ def api_respond_meeting(meeting_id):
         if meeting.professor_id != current_user.id:
             return jsonify({'success': False, 'error': 'Nu ai permisiunea să răspunzi la această cerere!'}), 403
         
+        if meeting.status != 'pending':
+            db.session.rollback()
+            return jsonify({'success': False, 'error': 'Această cerere a primit deja un răspuns!'}), 400
+        
         data = request.get_json()
         action = data.get('action')  # 'confirm' sau 'reject'
         response_message = data.get('message', '').strip()
@@ -515,13 +638,19 @@ def api_respond_meeting(meeting_id):
             meeting.professor_response = response_message or 'Din păcate, nu pot confirma această întâlnire.'
             
             # Returnează punctele studentului
-            student = User.query.get(meeting.student_id)
-            student.points += meeting.points_cost
+            apply_points(meeting.student_id, meeting.points_cost, 'meeting_refund', meeting.id)
             
             message = 'Cerere respinsă. Punctele au fost returnate studentului.'
         else:
             return jsonify({'success': False, 'error': 'Acțiune invalidă!'}), 400
         
+        verb = 'a confirmat' if meeting.status == 'confirmed' else 'a respins'
+        notifications.notify(
+            meeting.student_id, f'meeting_{meeting.status}',
+            f'{current_user.get_full_name()} {verb} întâlnirea din {meeting.meeting_date:%d.%m.%Y %H:%M}',
+            actor_id=current_user.id, reference_id=meeting.id
+        )
+        
         db.session.commit()
         
         return jsonify({
@@ -541,16 +670,18 @@ def api_get_meetings():
     """Obține toate întâlnirile utilizatorului curent"""
     try:
         if current_user.role == 'professor':
-            meetings = Meeting.query.filter_by(professor_id=current_user.id)\
-                .order_by(Meeting.meeting_date.desc()).all()
+            query = Meeting.query.filter_by(professor_id=current_user.id)
         else:
-            meetings = Meeting.query.filter_by(student_id=current_user.id)\
-                .order_by(Meeting.meeting_date.desc()).all()
+            query = Meeting.query.filter_by(student_id=current_user.id)
         
-        return jsonify({
-            'success': True,
-            'meetings': [meeting.to_dict() for meeting in meetings]
-        }), 200
+        # Loturi keyset citite complet, fiecare cu utilizatorii lui (un SELECT ... IN per lot)
+        meetings = iter_query_batches(
+            query, (Meeting.meeting_date,), Meeting.id,
+            options=(selectinload(Meeting.student), selectinload(Meeting.professor))
+        )
+        
+        return stream_json_object('meetings', meetings, tail=lambda count: {'success': True},
+                                  serialize=Meeting.to_dict)
         
     except Exception as e:
         print(f"Eroare la obținerea întâlnirilor: {str(e)}")
@@ -561,7 +692,7 @@ def api_get_meetings():
 def api_cancel_meeting(meeting_id):
     """Anulează o întâlnire"""
     try:
-        meeting = Meeting.query.get(meeting_id)
+        meeting = db.session.get(Meeting, meeting_id, with_for_update=True)
         
         if not meeting:
             return jsonify({'success': False, 'error': 'Întâlnire inexistentă!'}), 404
@@ -578,9 +709,16 @@ def api_cancel_meeting(meeting_id):
         meeting.status = 'cancelled'
         
         # Returnează punctele dacă e anulată de student sau profesor
-        if meeting.status == 'pending' or meeting.status == 'confirmed':
-            student = User.query.get(meeting.student_id)
-            student.points += meeting.points_cost
+        if previous_status == 'pending' or previous_status == 'confirmed':
+            apply_points(meeting.student_id, meeting.points_cost, 'meeting_refund', meeting.id)
+        
+        # Anunță cealaltă parte
+        other_id = meeting.professor_id if current_user.id == meeting.student_id else meeting.student_id
+        notifications.notify(
+            other_id, 'meeting_cancelled',
+            f'{current_user.get_full_name()} a anulat întâlnirea din {meeting.meeting_date:%d.%m.%Y %H:%M}',
+            actor_id=current_user.id, reference_id=meeting.id
+        )
         
         db.session.commit()
         
@@ -601,6 +739,88 @@ def api_current_user():
     """Returnează informații despre utilizatorul curent"""
     return jsonify({'success': True, 'user': current_user.to_dict()}), 200
 
+# ==================== API ENDPOINTS - NOTIFICĂRI ====================
+
+@main.route('/api/notifications', methods=['GET'])
+@login_required
+def api_get_notifications():
+    """Ultimele notificări (paginare după id: ?before_id=) + numărul de necitite"""
+    try:
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        before_id = request.args.get('before_id', type=int)
+        
+        items = notifications.recent(current_user.id, limit, before_id)
+        
+        return jsonify({
+            'success': True,
+            'notifications': [n.to_dict() for n in items],
+            'unread': notification_hub.unread(current_user.id),
+            'last_id': notification_hub.latest_id(current_user.id),
+            'has_more': len(items) == limit
+        }), 200
+        
+    except Exception as e:
+        print(f"Eroare la obținerea notificărilor: {str(e)}")
+        return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
+
+@main.route('/api/notifications/poll', methods=['GET'])
+@login_required
+def api_poll_notifications():
+    """Long-poll: răspunde când apar notificări cu id > since (sau la expirare)"""
+    try:
+        since = request.args.get('since', 0, type=int)
+        timeout = request.args.get('timeout', notification_hub.poll_timeout, type=float)
+        timeout = min(max(timeout, 0), notification_hub.poll_timeout)
+        user_id = current_user.id
+        
+        latest = notification_hub.latest_id(user_id)
+        if latest <= since and timeout > 0:
+            # Conexiunea la baza de date se eliberează cât timp cererea așteaptă
+            db.session.close()
+            latest = notification_hub.wait(user_id, since, timeout)
+        
+        items = notifications.newer_than(user_id, since) if latest > since else []
+        
+        return jsonify({
+            'success': True,
+            'notifications': [n.to_dict() for n in items],
+            'unread': notification_hub.unread(user_id),
+            'last_id': max(latest, since)
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"Eroare la long-poll notificări: {str(e)}")
+        return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
+
+@main.route('/api/notifications/read', methods=['POST'])
+@login_required
+def api_read_notifications():
+    """Marchează ca citite notificările date ({ids: [...]}) sau toate ({all: true})"""
+    try:
+        data = request.get_json() or {}
+        
+        if data.get('all'):
+            ids = None
+        else:
+            ids = data.get('ids')
+            if not isinstance(ids, list) or not ids or not all(isinstance(i, int) for i in ids):
+                return jsonify({'success': False, 'error': 'Lista de notificări este invalidă!'}), 400
+        
+        changed = notifications.mark_read(current_user.id, ids)
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'marked': changed,
+            'unread': notification_hub.unread(current_user.id)
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"Eroare la marcarea notificărilor: {str(e)}")
+        return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
+
 # ==================== API ENDPOINTS - LECȚII ====================
 
 @main.route('/api/lessons', methods=['GET'])
@@ -611,28 +831,99 @@ def api_get_lessons():
         level = request.args.get('level', 'all')
         category = request.args.get('category', 'all')
         
-        # Query de bază
-        query = Lesson.query.filter_by(status='published')
+        # Lista de rânduri stă în cache (tag 'lessons'), gata serializată
+        lessons = catalog.published_lessons(level, category)
         
-        # Filtrare după nivel
-        if level != 'all':
-            query = query.filter_by(level=level)
+        return jsonify({
+            'success': True,
+            'lessons': lessons,
+            'count': len(lessons)
+        }), 200
         
-        # Filtrare după categorie
-        if category != 'all':
-            query = query.filter_by(category=category)
+    except Exception as e:
+        print(f"Eroare la obținerea lecțiilor: {str(e)}")
+        return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
+
+@main.route('/api/lessons/recommended', methods=['GET'])
+@login_required
+def api_recommended_lessons():
+    """Lecțiile recomandate elevului curent (calculate în batch din co-completări)"""
+    try:
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 20)
         
-        # Ordonare
-        lessons = query.order_by(Lesson.created_at.desc()).all()
+        rows = recommendations.for_user(current_user.id, limit)
+        source = 'personalized'
+        if not rows:
+            # Încă nu există recomandări (elev nou sau job-ul n-a rulat)
+            rows = recommendations.popular(current_user.id, limit)
+            source = 'popular'
         
         return jsonify({
             'success': True,
-            'lessons': [lesson.to_dict() for lesson in lessons],
-            'count': len(lessons)
+            'source': source,
+            'lessons': [dict(lesson.to_dict(), score=score) for lesson, score in rows]
         }), 200
         
     except Exception as e:
-        print(f"Eroare la obținerea lecțiilor: {str(e)}")
+        print(f"Eroare la obținerea recomandărilor: {str(e)}")
+        return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
+
+@main.route('/api/lessons/<int:lesson_id>/similar', methods=['GET'])
+@login_required
+def api_similar_lessons(lesson_id):
+    """Lecțiile parcurse de elevii care au parcurs și lecția dată"""
+    try:
+        limit = min(max(request.args.get('limit', 5, type=int), 1), 10)
+        rows = recommendations.similar_to(lesson_id, limit)
+        
+        return jsonify({
+            'success': True,
+            'lessons': [dict(lesson.to_dict(), score=score) for lesson, score in rows]
+        }), 200
+        
+    except Exception as e:
+        print(f"Eroare la obținerea lecțiilor similare: {str(e)}")
+        return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
+
+@main.route('/api/lessons/search', methods=['GET'])
+@login_required
+def api_search_lessons():
+    """Căutare full-text în lecțiile publicate (titlu, descriere, conținut)"""
+    try:
+        q = request.args.get('q', '').strip()
+        level = request.args.get('level', 'all')
+        category = request.args.get('category', 'all')
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+        
+        if len(q) > 200:
+            return jsonify({'success': False, 'error': 'Căutarea este prea lungă!'}), 400
+        
+        if q:
+            results, total, facets = search_lessons(
+                q,
+                level=None if level == 'all' else level,
+                category=None if category == 'all' else category,
+                page=page,
+                per_page=per_page
+            )
+        else:
+            # Fără text - doar facet-urile pentru tot catalogul (din cache)
+            lesson_index.ensure_fresh()
+            results, total, facets = [], 0, lesson_index.facets()
+        
+        return jsonify({
+            'success': True,
+            'query': q,
+            'results': results,
+            'total': total,
+            'page': page,
+            'per_page': per_page,
+            'facets': facets
+        }), 200
+        
+    except Exception as e:
+        print(f"Eroare la căutarea lecțiilor: {str(e)}")
         return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
 
 @main.route('/api/lessons/<int:lesson_id>', methods=['GET'])
@@ -697,6 +988,7 @@ def api_create_lesson():
         )
         
         db.session.add(new_lesson)
+        class_progress.lessons_changed(current_user.id)
         db.session.commit()
         
         return jsonify({
@@ -710,8 +1002,92 @@ def api_create_lesson():
         print(f"Eroare la crearea lecției: {str(e)}")
         return jsonify({'success': False, 'error': 'A apărut o eroare la crearea lecției.'}), 500
 
+# ==================== API ENDPOINTS - PACHETE DE CURS ====================
+
+@main.route('/api/course-pack/import', methods=['POST'])
+@login_required
+def api_import_course_pack():
+    """Importă lecții, quiz-uri și întrebări dintr-un pachet JSONL sau zip"""
+    try:
+        if current_user.role not in ['professor', 'admin']:
+            return jsonify({'success': False, 'error': 'Doar profesorii pot importa lecții!'}), 403
+        
+        # Pachetul poate veni ca fișier (multipart) sau direct în body (JSONL)
+        upload = request.files.get('pack')
+        if upload:
+            stream, filename = upload.stream, upload.filename
+        else:
+            stream, filename = request.stream, None
+        
+        batch_size = min(max(request.args.get('batch_size', 500, type=int), 1), 5000)
+        dry_run = request.args.get('dry_run', 'false').lower() == 'true'
+        
+        report = import_pack(
+            stream,
+            professor_id=current_user.id,
+            filename=filename,
+            allow_professor_override=current_user.role == 'admin',
+            batch_size=batch_size,
+            dry_run=dry_run
+        )
+        
+        return jsonify({
+            'success': True,
+            'message': 'Validare finalizată.' if dry_run else 'Import finalizat.',
+            'dry_run': dry_run,
+            'report': report.to_dict()
+        }), 200
+        
+    except PackRecordError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': e.message}), 400
+    except Exception as e:
+        db.session.rollback()
+        print(f"Eroare la importul pachetului: {str(e)}")
+        return jsonify({'success': False, 'error': 'A apărut o eroare la import.'}), 500
+
+
+@main.route('/api/course-pack/export', methods=['GET'])
+@login_required
+def api_export_course_pack():
+    """Exportă lecțiile (cu quiz-uri și întrebări) ca flux JSONL"""
+    if current_user.role not in ['professor', 'admin']:
+        return jsonify({'success': False, 'error': 'Doar profesorii pot exporta lecții!'}), 403
+    
+    # Profesorii își exportă doar lecțiile proprii; adminul poate filtra opțional
+    if current_user.role == 'professor':
+        professor_id = current_user.id
+    else:
+        professor_id = request.args.get('professor_id', type=int)
+    status = request.args.get('status')
+    
+    return Response(
+        stream_with_context(export_pack(professor_id=professor_id, status=status)),
+        mimetype='application/x-ndjson',
+        headers={'Content-Disposition': 'attachment; filename=course-pack.jsonl'}
+    )
+
 # ==================== API ENDPOINTS - QUIZ ====================
 
+@main.route('/api/quiz/<int:quiz_id>')
+@login_required
+def api_get_quiz(quiz_id):
+    """Quiz-ul cu întrebările, fără răspunsuri; ETag = versiunea compilată"""
+    payload = quiz_payload.compiled(quiz_id)
+    if payload is None:
+        return jsonify({'success': False, 'error': 'Quiz inexistent!'}), 404
+    
+    response = jsonify({
+        'success': True,
+        'version': payload['version'],
+        'quiz': payload['quiz'],
+        'questions': payload['questions']
+    })
+    response.set_etag(payload['version'])
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+
 @main.route('/api/quiz/<int:quiz_id>/submit', methods=['POST'])
 @login_required
 def api_submit_quiz(quiz_id):
@@ -734,17 +1110,17 @@ def api_submit_quiz(quiz_id):
         answers = data.get('answers', {})  # Format: {"1": "A", "2": "B", ...}
         time_taken = data.get('time_taken_seconds', 0)
         
-        # Obține întrebările
-        questions = Question.query.filter_by(quiz_id=quiz_id).all()
+        # Baremul quiz-ului: {question_id: (răspuns corect, puncte)}
+        key = catalog.answer_key(quiz_id)
         
         # Calculează scorul
-        total_points = sum(q.points for q in questions)
+        total_points = sum(points for _, points in key.values())
         earned_points = 0
         
-        for question in questions:
-            user_answer = answers.get(str(question.id))
-            if user_answer and user_answer.upper() == question.correct_answer.upper():
-                earned_points += question.points
+        for question_id, (correct_answer, points) in key.items():
+            user_answer = answers.get(str(question_id))
+            if user_answer and user_answer.upper() == correct_answer:
+                earned_points += points
         
         # Scor procentual
         score_percentage = (earned_points / total_points * 100) if total_points > 0 else 0
@@ -767,34 +1143,14 @@ def api_submit_quiz(quiz_id):
         )
         
         db.session.add(submission)
-        
-        # Adaugă puncte utilizatorului
-        current_user.points += points_reward
-        
-        # Actualizează progresul
-        progress = UserProgress.query.filter_by(
-            user_id=current_user.id,
-            lesson_id=quiz.lesson_id
-        ).first()
-        
-        if progress:
-            progress.quiz_attempts += 1
-            progress.best_score = max(progress.best_score, score_percentage)
-            
-            if passed and progress.status != 'completed':
-                progress.status = 'completed'
-                progress.completed_at = datetime.utcnow()
-                progress.progress_percentage = 100
-                
-                # Incrementează completions la lecție
-                lesson = Lesson.query.get(quiz.lesson_id)
-                if lesson:
-                    lesson.completions += 1
-        
+        db.session.flush()  # ID-ul pentru răspunsurile normalizate
+        quiz_answers.record(submission, answers, key)
         db.session.commit()
         
-        # Verifică badge-uri
-        new_badges = check_and_award_badges(current_user)
+        total_user_points = current_user.points + points_reward
+        
+        # Punctele, progresul, badge-urile și recompensele se procesează în fundal
+        enqueue_submission(submission.id)
         
         return jsonify({
             'success': True,
@@ -802,8 +1158,10 @@ def api_submit_quiz(quiz_id):
             'score': score_percentage,
             'points_earned': points_reward,
             'passed': passed,
-            'total_points': current_user.points,
-            'new_badges': [b.to_dict() for b in new_badges],
+            'total_points': total_user_points,
+            # Cu job-urile rulate imediat (JOB_WORKERS=0) badge-urile sunt deja acordate;
+            # altfel pagina de rezultate le afișează pe cele câștigate de la trimitere
+            'new_badges': [badge.to_dict() for badge in badges_since(current_user.id, submission.submitted_at)],
             'message': 'Felicitări! Ai promovat!' if passed else 'Mai încearcă o dată!'
         }), 200
         
@@ -812,6 +1170,24 @@ def api_submit_quiz(quiz_id):
         print(f"Eroare la submit quiz: {str(e)}")
         return jsonify({'success': False, 'error': 'A apărut o eroare la evaluarea quiz-ului.'}), 500
 
+@main.route('/api/progress/summary', methods=['GET'])
+@login_required
+def api_get_progress_summary():
+    """Rezumatul progresului (puncte, lecții, badge-uri, serie) din rândul user_stats"""
+    try:
+        stats = user_stats.get_stats(current_user.id)
+        
+        return jsonify({
+            'success': True,
+            'stats': dict(stats.to_dict(), total_points=current_user.points)
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"Eroare la obținerea rezumatului progresului: {str(e)}")
+        return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
+
+
 @main.route('/api/progress', methods=['GET'])
 @login_required
 def api_get_progress():
@@ -819,10 +1195,10 @@ def api_get_progress():
     try:
         progress_list = UserProgress.query.filter_by(user_id=current_user.id).all()
         
-        # Statistici generale
+        # Statistici generale (contoarele din user_stats)
+        stats = user_stats.get_stats(current_user.id).to_dict()
         total_lessons = Lesson.query.filter_by(status='published').count()
-        completed_lessons = len([p for p in progress_list if p.status == 'completed'])
-        in_progress_lessons = len([p for p in progress_list if p.status == 'in_progress'])
+        completed_lessons = stats['completed_lessons']
         
         # Badge-uri
         user_badges = UserBadge.query.filter_by(user_id=current_user.id).all()
@@ -832,45 +1208,15 @@ def api_get_progress():
         recent_submissions = QuizSubmission.query.filter_by(user_id=current_user.id)\
             .order_by(QuizSubmission.submitted_at.desc())\
             .limit(5).all()
-
-        # Streak (zile consecutive) — considerăm doar quiz-urile promovate ca activitate
-        passed_subs = QuizSubmission.query.filter_by(user_id=current_user.id, passed=True)\
-            .order_by(QuizSubmission.submitted_at.desc()).all()
-
-        passed_dates = set()
-        for s in passed_subs:
-            dt = s.submitted_at
-            if not dt:
-                continue
-            # normalize to UTC date when tz-aware
-            try:
-                if dt.tzinfo is not None:
-                    d = dt.astimezone(timezone.utc).date()
-                else:
-                    d = dt.date()
-            except Exception:
-                d = dt.date()
-            passed_dates.add(d)
-
-        # count consecutive days ending today (UTC)
-        consecutive_days = 0
-        today = datetime.now(timezone.utc).date()
-        cur = today
-        while cur in passed_dates:
-            consecutive_days += 1
-            cur = cur - timedelta(days=1)
         
         return jsonify({
             'success': True,
-            'stats': {
-                'total_points': current_user.points,
-                'total_lessons': total_lessons,
-                'completed_lessons': completed_lessons,
-                'in_progress_lessons': in_progress_lessons,
-                'completion_rate': round((completed_lessons / total_lessons * 100), 1) if total_lessons > 0 else 0,
-                'total_badges': len(badges),
-                'consecutive_days': consecutive_days
-            },
+            'stats': dict(
+                stats,
+                total_points=current_user.points,
+                total_lessons=total_lessons,
+                completion_rate=round((completed_lessons / total_lessons * 100), 1) if total_lessons > 0 else 0
+            ),
             'progress': [p.to_dict() for p in progress_list],
             'badges': badges,
             'recent_quizzes': [
@@ -887,6 +1233,7 @@ def api_get_progress():
         }), 200
         
     except Exception as e:
+        db.session.rollback()
         print(f"Eroare la obținerea progresului: {str(e)}")
         return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
 
@@ -895,8 +1242,8 @@ def check_and_award_badges(user):
     """Verifică și acordă badge-uri utilizatorului"""
     new_badges = []
     
-    # Obține toate badge-urile
-    all_badges = Badge.query.all()
+    # Obține toate badge-urile (catalog din memorie)
+    all_badges = catalog.badges()
     
     # Obține badge-urile deja câștigate
     earned_badge_ids = [ub.badge_id for ub in UserBadge.query.filter_by(user_id=user.id).all()]
@@ -933,10 +1280,66 @@ def check_and_award_badges(user):
             new_badges.append(badge)
     
     if new_badges:
+        user_stats.badges_awarded(user.id, len(new_badges))
         db.session.commit()
     
     return new_badges
 
+# ==================== API ENDPOINTS - RECAPITULARE ====================
+
+@main.route('/api/review/next', methods=['GET'])
+@login_required
+def api_review_next():
+    """Întrebările de recapitulat acum (repetiție spațiată, din quiz-urile anterioare)"""
+    try:
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 50)
+        items, has_more = review.next_items(current_user.id, limit)
+        
+        return jsonify({
+            'success': True,
+            'items': items,
+            'has_more': has_more,
+            'summary': review.get_summary(current_user.id)
+        }), 200
+        
+    except Exception as e:
+        print(f"Eroare la coada de recapitulare: {str(e)}")
+        return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
+
+
+@main.route('/api/review/<int:question_id>/answer', methods=['POST'])
+@login_required
+def api_review_answer(question_id):
+    """Răspuns la o întrebare din recapitulare; reprogramează întrebarea"""
+    try:
+        data = request.get_json() or {}
+        user_answer = data.get('answer')
+        if not user_answer:
+            return jsonify({'success': False, 'error': 'Răspunsul este obligatoriu!'}), 400
+        
+        quality = data.get('quality')
+        result = review.answer(current_user.id, question_id, str(user_answer),
+                               quality=quality if isinstance(quality, int) else None)
+        if result is None:
+            return jsonify({'success': False, 'error': 'Întrebarea nu este în recapitularea ta!'}), 404
+        
+        correct, question, item = result
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'correct': correct,
+            'correct_answer': question.correct_answer,
+            'explanation': question.explanation,
+            'review': item.to_dict()
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"Eroare la răspunsul din recapitulare: {str(e)}")
+        return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
+
+
 # ==================== API ENDPOINTS - CLASAMENTE ====================
 
 @main.route('/api/leaderboard/global', methods=['GET'])
@@ -994,8 +1397,25 @@ def api_global_leaderboard():
         print(f"Eroare la obținerea clasamentului: {str(e)}")
         return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
 
+@main.route('/api/leaderboard/stream', methods=['GET'])
+@login_required
+def api_leaderboard_stream():
+    """Clasament în timp real (SSE): top N + rangul propriu, doar modificările"""
+    top = request.args.get('top', 25, type=int)
+    user_id = current_user.id
+    
+    subscription = leaderboard_hub.subscribe(user_id, top)
+    # Conexiunea la baza de date se eliberează: stream-ul nu mai rulează interogări
+    db.session.close()
+    
+    response = Response(subscription.events(leaderboard_hub.heartbeat), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @main.route('/api/leaderboard/professors', methods=['GET'])
 @login_required
+@cache.cached_route(tags=('professors', 'lessons'))
 def api_professors_leaderboard():
     """Clasament profesori după rating și lecții create"""
     try:
@@ -1055,6 +1475,29 @@ def api_professors_leaderboard():
         print(f"Eroare la clasamentul profesorilor: {str(e)}")
         return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
 
+# ==================== API ENDPOINTS - PUNCTE ====================
+
+@main.route('/api/points/history', methods=['GET'])
+@login_required
+def api_points_history():
+    """Istoricul punctelor utilizatorului (paginare după before_id)"""
+    try:
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+        before_id = request.args.get('before_id', type=int)
+        
+        entries = points_history(current_user.id, limit=limit, before_id=before_id)
+        
+        return jsonify({
+            'success': True,
+            'entries': entries,
+            'points': current_user.points,
+            'next_before_id': entries[-1]['id'] if len(entries) == limit else None
+        }), 200
+        
+    except Exception as e:
+        print(f"Eroare la istoricul punctelor: {str(e)}")
+        return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
+
 # ==================== API ENDPOINTS - RECOMPENSE ====================
 
 @main.route('/api/rewards', methods=['GET'])
@@ -1069,7 +1512,8 @@ def api_get_rewards():
             'success': True,
             'rewards': [r.to_dict() for r in rewards],
             'total': len(rewards),
-            'pending': len([r for r in rewards if r.status == 'pending' and not r.is_expired()])
+            # Recompensele expirate sunt marcate periodic (app.maintenance)
+            'pending': len([r for r in rewards if r.status == 'pending'])
         }), 200
         
     except Exception as e:
@@ -1110,7 +1554,8 @@ def api_generate_rewards():
 def api_claim_reward(reward_id):
     """Revendică o recompensă"""
     try:
-        reward = Reward.query.get(reward_id)
+        # Rândul recompensei rămâne blocat până la commit (o singură revendicare)
+        reward = db.session.get(Reward, reward_id, with_for_update=True)
         
         if not reward:
             return jsonify({'success': False, 'error': 'Recompensă inexistentă!'}), 404
@@ -1130,7 +1575,7 @@ def api_claim_reward(reward_id):
         if reward.claim():
             # Aplică recompensa
             if reward.reward_type == 'bonus_points':
-                current_user.points += reward.value
+                apply_points(current_user.id, reward.value, 'reward', reward.id)
             elif reward.reward_type == 'premium_trial':
                 current_user.premium = True
                 # TODO: Setează data expirării trial-ului
@@ -1314,6 +1759,7 @@ def api_add_student_to_class(class_id):
                 }), 403
         
         class_student = ClassStudent(class_id=class_id, student_id=student.id)
+        class_progress.enrolled(class_student, cls.professor_id)
         db.session.add(class_student)
         db.session.commit()
         
@@ -1380,6 +1826,7 @@ def api_join_class(class_id):
                 }), 403
         
         class_student = ClassStudent(class_id=class_id, student_id=current_user.id)
+        class_progress.enrolled(class_student, cls.professor_id)
         db.session.add(class_student)
         db.session.commit()
         
@@ -1446,17 +1893,19 @@ def api_get_class_detail(class_id):
         
         # Verifică permisiuni
         is_professor = cls.professor_id == current_user.id
-        is_student = any(cs.student_id == current_user.id for cs in cls.students)
+        is_student = not is_professor and class_roster.is_member(class_id, current_user.id)
         
         if not is_professor and not is_student:
             return jsonify({'success': False, 'error': 'Nu ai permisiunea!'}), 403
         
-        students = [cs.to_dict() for cs in cls.students]
+        # Prima pagină din lista clasei; restul prin /api/classes/<id>/students?cursor=...
+        rows, next_cursor = class_roster.roster_page(class_id)
         
         return jsonify({
             'success': True,
             'class': cls.to_dict(),
-            'students': students,
+            'students': [class_roster.row_to_dict(row, detailed=is_professor) for row in rows],
+            'next_cursor': next_cursor,
             'is_professor': is_professor
         }), 200
         
@@ -1464,6 +1913,74 @@ def api_get_class_detail(class_id):
         print(f"Eroare la detalii clasă: {str(e)}")
         return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
 
+@main.route('/api/classes/<int:class_id>/students', methods=['GET'])
+@login_required
+def api_get_class_students(class_id):
+    """Studenții clasei, paginați keyset (sort: name / points / progress / joined_at, order, cursor, q)"""
+    try:
+        cls = Class.query.get(class_id)
+        if not cls:
+            return jsonify({'success': False, 'error': 'Clasă inexistentă!'}), 404
+        
+        # Studenții clasei văd lista redusă; rezultatele doar profesorul clasei și adminii
+        detailed = cls.professor_id == current_user.id or current_user.role == 'admin'
+        if not detailed and not class_roster.is_member(class_id, current_user.id):
+            return jsonify({'success': False, 'error': 'Nu ai permisiunea!'}), 403
+        
+        sort = request.args.get('sort', 'name')
+        order = request.args.get('order', 'asc')
+        cursor = request.args.get('cursor') or None
+        q = request.args.get('q', '').strip()[:100]
+        per_page = request.args.get('per_page', class_roster.DEFAULT_PER_PAGE, type=int)
+        per_page = max(1, min(per_page, class_roster.MAX_PER_PAGE))
+        
+        if sort not in class_roster.SORTS or order not in class_roster.ORDERS:
+            return jsonify({'success': False, 'error': 'Sortare invalidă!'}), 400
+        
+        try:
+            rows, next_cursor = class_roster.roster_page(class_id, sort, order, cursor, per_page, q)
+        except class_roster.InvalidCursor as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        result = {
+            'success': True,
+            'students': [class_roster.row_to_dict(row, detailed) for row in rows],
+            'next_cursor': next_cursor,
+            'sort': sort,
+            'order': order,
+            'per_page': per_page
+        }
+        # Totalul doar pentru prima pagină (paginile următoare nu-l mai recalculează)
+        if cursor is None:
+            result['total'] = class_roster.count_students(class_id, q)
+        
+        return jsonify(result), 200
+        
+    except Exception as e:
+        print(f"Eroare la lista clasei: {str(e)}")
+        return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
+
+@main.route('/api/classes/<int:class_id>/stats', methods=['GET'])
+@login_required
+def api_get_class_stats(class_id):
+    """Statisticile clasei: medii, distribuții și elevii în risc (din contoarele class_students)"""
+    try:
+        cls = Class.query.get(class_id)
+        if not cls:
+            return jsonify({'success': False, 'error': 'Clasă inexistentă!'}), 404
+        
+        if cls.professor_id != current_user.id and current_user.role != 'admin':
+            return jsonify({'success': False, 'error': 'Nu ai permisiunea!'}), 403
+        
+        return jsonify({
+            'success': True,
+            'stats': class_progress.class_stats(cls)
+        }), 200
+        
+    except Exception as e:
+        print(f"Eroare la statisticile clasei: {str(e)}")
+        return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
+
 @main.route('/api/classes/<int:class_id>/feedback', methods=['GET'])
 @login_required
 def api_get_class_feedback(class_id):
@@ -1575,22 +2092,42 @@ def api_add_question_to_bank(bank_id):
         if not text:
             return jsonify({'success': False, 'error': 'Text obligatoriu!'}), 400
         
+        signature = minhash(text)
+        
         question = BankQuestion(
             bank_id=bank_id,
             text=text,
             question_type=question_type,
             options=data.get('options'),
             correct_answer=data.get('correct_answer'),
-            difficulty=difficulty
+            difficulty=difficulty,
+            minhash=signature_bytes(signature)
         )
         
         db.session.add(question)
         db.session.commit()
         
+        # Actualizează indexul băncii (dificultate / tip)
+        bank_index.add_question(question)
+        
+        # Caută întrebări aproape identice în băncile profesorului
+        matches = near_duplicates.find(current_user.id, signature, exclude_id=question.id)[:5]
+        near_duplicates.add(current_user.id, question.id, bank_id, signature)
+        
+        duplicates = []
+        if matches:
+            texts = dict(db.session.query(BankQuestion.id, BankQuestion.text)
+                         .filter(BankQuestion.id.in_([m[0] for m in matches])).all())
+            duplicates = [
+                {'id': qid, 'bank_id': match_bank_id, 'similarity': round(score, 2), 'text': texts.get(qid)}
+                for qid, match_bank_id, score in matches
+            ]
+        
         return jsonify({
             'success': True,
-            'message': 'Întrebare adăugată!',
-            'question': question.to_dict()
+            'message': 'Întrebare adăugată!' if not duplicates else 'Întrebare adăugată! Atenție: există întrebări foarte asemănătoare.',
+            'question': question.to_dict(),
+            'near_duplicates': duplicates
         }), 201
         
     except Exception as e:
@@ -1619,6 +2156,181 @@ def api_get_question_banks():
         return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
 
 
+@main.route('/api/question-banks/<int:bank_id>/index', methods=['GET'])
+@login_required
+def api_get_question_bank_index(bank_id):
+    """Numărul de întrebări disponibile pe dificultate și tip (din index)"""
+    try:
+        bank = QuestionBank.query.get(bank_id)
+        if not bank:
+            return jsonify({'success': False, 'error': 'Bancă inexistentă!'}), 404
+        
+        if bank.professor_id != current_user.id:
+            return jsonify({'success': False, 'error': 'Nu ai permisiunea!'}), 403
+        
+        return jsonify({
+            'success': True,
+            'bank_id': bank_id,
+            'counts': bank_index.counts(bank_id)
+        }), 200
+        
+    except Exception as e:
+        print(f"Eroare: {str(e)}")
+        return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
+
+
+@main.route('/api/question-banks/<int:bank_id>/duplicates', methods=['GET'])
+@login_required
+def api_get_bank_duplicates(bank_id):
+    """Grupează întrebările aproape identice dintr-o bancă"""
+    try:
+        bank = QuestionBank.query.get(bank_id)
+        if not bank:
+            return jsonify({'success': False, 'error': 'Bancă inexistentă!'}), 404
+        
+        if bank.professor_id != current_user.id:
+            return jsonify({'success': False, 'error': 'Nu ai permisiunea!'}), 403
+        
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+        
+        clusters = cluster_bank(bank_id)
+        shown = clusters[:limit]
+        
+        # Textele se încarcă doar pentru clusterele returnate
+        ids = [qid for cluster in shown for qid in cluster]
+        texts = dict(db.session.query(BankQuestion.id, BankQuestion.text)
+                     .filter(BankQuestion.id.in_(ids)).all()) if ids else {}
+        
+        return jsonify({
+            'success': True,
+            'bank_id': bank_id,
+            'total_clusters': len(clusters),
+            'duplicate_questions': sum(len(c) - 1 for c in clusters),
+            'clusters': [
+                {
+                    'representative_id': cluster[0],
+                    'size': len(cluster),
+                    'questions': [{'id': qid, 'text': texts.get(qid)} for qid in cluster]
+                } for cluster in shown
+            ]
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"Eroare la detectarea duplicatelor: {str(e)}")
+        return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
+
+
+@main.route('/api/quizzes/<int:quiz_id>/analytics', methods=['GET'])
+@login_required
+def api_quiz_analytics(quiz_id):
+    """Profesor: dificultatea, discriminarea și distractorii fiecărei întrebări din quiz"""
+    try:
+        quiz = Quiz.query.get(quiz_id)
+        if not quiz:
+            return jsonify({'success': False, 'error': 'Quiz inexistent!'}), 404
+        
+        if current_user.role != 'admin' and quiz.lesson.professor_id != current_user.id:
+            return jsonify({'success': False, 'error': 'Nu ai permisiunea!'}), 403
+        
+        return jsonify({
+            'success': True,
+            'quiz': {'id': quiz.id, 'title': quiz.title, 'lesson_id': quiz.lesson_id},
+            'analytics': quiz_answers.analyze(quiz_id)
+        }), 200
+        
+    except Exception as e:
+        print(f"Eroare la analiza quiz-ului: {str(e)}")
+        return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
+
+
+@main.route('/api/quizzes/assemble', methods=['POST'])
+@login_required
+def api_assemble_quiz():
+    """Construiește un quiz pentru o lecție din întrebări alese aleator din bănci"""
+    try:
+        if current_user.role != 'professor':
+            return jsonify({'success': False, 'error': 'Doar profesorii pot crea quiz-uri!'}), 403
+        
+        data = request.get_json()
+        lesson_id = data.get('lesson_id')
+        bank_ids = data.get('bank_ids') or []
+        count = data.get('count')
+        title = data.get('title', '').strip()
+        question_types = data.get('question_types') or list(QUIZ_QUESTION_TYPES)
+        exclude_class_id = data.get('exclude_seen_by_class')
+        
+        # Validare
+        if not lesson_id or not bank_ids or not count:
+            return jsonify({'success': False, 'error': 'Lecția, băncile și numărul de întrebări sunt obligatorii!'}), 400
+        
+        try:
+            bank_ids = sorted({int(b) for b in bank_ids})
+            count = int(count)
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'error': 'Date invalide!'}), 400
+        
+        if count < 1 or count > 200:
+            return jsonify({'success': False, 'error': 'Numărul de întrebări trebuie să fie între 1 și 200!'}), 400
+        
+        if any(t not in QUIZ_QUESTION_TYPES for t in question_types):
+            return jsonify({'success': False, 'error': 'Tip de întrebare invalid!'}), 400
+        
+        lesson = Lesson.query.get(lesson_id)
+        if not lesson or lesson.professor_id != current_user.id:
+            return jsonify({'success': False, 'error': 'Lecție inexistentă sau fără permisiune!'}), 404
+        
+        owned = QuestionBank.query.filter(
+            QuestionBank.id.in_(bank_ids),
+            QuestionBank.professor_id == current_user.id
+        ).count()
+        if owned != len(bank_ids):
+            return jsonify({'success': False, 'error': 'Nu ai permisiunea pentru toate băncile!'}), 403
+        
+        exclude_ids = set()
+        if exclude_class_id:
+            cls = Class.query.get(exclude_class_id)
+            if not cls or cls.professor_id != current_user.id:
+                return jsonify({'success': False, 'error': 'Clasă inexistentă!'}), 404
+            exclude_ids = seen_by_class(cls.id)
+        
+        # Implicit: proporțional cu întrebările disponibile pe fiecare dificultate
+        distribution = data.get('difficulty_distribution') or \
+            available_by_difficulty(bank_ids, question_types, exclude_ids)
+        counts = distribution_to_counts(distribution, count)
+        question_ids = sample_questions(bank_ids, counts, question_types, exclude_ids)
+        
+        quiz = Quiz(
+            lesson_id=lesson.id,
+            title=title or f'Quiz - {lesson.title}'[:200],
+            description=data.get('description'),
+            passing_score=data.get('passing_score', 70),
+            time_limit_minutes=data.get('time_limit_minutes'),
+            max_attempts=data.get('max_attempts', 3),
+            points_reward=data.get('points_reward', 50)
+        )
+        db.session.add(quiz)
+        db.session.flush()  # Generează ID-ul quiz-ului pentru întrebări
+        
+        total_questions = materialize_questions(quiz, question_ids)
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': f'Quiz creat cu {total_questions} întrebări!',
+            'quiz': quiz.to_dict(),
+            'distribution': {str(d): c for d, c in counts.items()}
+        }), 201
+        
+    except AssemblyError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': e.message, 'details': e.details}), 400
+    except Exception as e:
+        db.session.rollback()
+        print(f"Eroare la asamblarea quiz-ului: {str(e)}")
+        return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
+
+
 # ==================== API ENDPOINTS - SPRINT 5: FEEDBACK ====================
 
 @main.route('/api/feedback/send', methods=['POST'])
@@ -1661,6 +2373,14 @@ def api_send_feedback():
         )
         
         db.session.add(feedback)
+        db.session.flush()
+        
+        notifications.notify(
+            student.id, 'feedback_received',
+            f'Feedback nou de la {current_user.get_full_name()}: {title}',
+            actor_id=current_user.id, reference_id=feedback.id
+        )
+        
         db.session.commit()
         
         return jsonify({
@@ -1732,7 +2452,7 @@ def api_mark_feedback_read(feedback_id):
 @main.route('/pricing')
 def pricing():
     """Pagina publică cu planuri de abonament"""
-    plans = SubscriptionPlan.query.filter_by(is_active=True).order_by(SubscriptionPlan.price).all()
+    plans = deferred(catalog.active_plans)
     user_subscription = None
     
     if current_user.is_authenticated:
@@ -1814,8 +2534,8 @@ def admin_users():
         flash('Acces refuzat!', 'error')
         return redirect(url_for('main.dashboard'))
     
-    users = User.query.all()
-    return render_template('admin_users.html', users=users)
+    # Lista se încarcă paginat din /api/admin/users
+    return render_template('admin_users.html')
 
 
 @main.route('/admin/settings')
@@ -1838,8 +2558,7 @@ def admin_settings():
 def api_get_subscription_plans():
     """Obține toate planurile de abonament active"""
     try:
-        plans = SubscriptionPlan.query.filter_by(is_active=True)\
-            .order_by(SubscriptionPlan.price).all()
+        plans = catalog.active_plans()
         
         return jsonify({
             'success': True,
@@ -2166,38 +2885,182 @@ def api_admin_statistics():
         return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
 
 
+@main.route('/api/admin/maintenance', methods=['GET'])
+@login_required
+def api_admin_maintenance():
+    """Admin: Starea job-urilor de întreținere (durată, rânduri modificate)"""
+    if current_user.role != 'admin':
+        return jsonify({'success': False, 'error': 'Doar admin!'}), 403
+    
+    return jsonify({'success': True, 'scheduler': scheduler.get_stats()}), 200
+
+
+@main.route('/api/admin/maintenance/<task_name>/run', methods=['POST'])
+@login_required
+def api_admin_run_maintenance(task_name):
+    """Admin: Rulează imediat un job de întreținere"""
+    try:
+        if current_user.role != 'admin':
+            return jsonify({'success': False, 'error': 'Doar admin!'}), 403
+        
+        if task_name not in scheduler.tasks:
+            return jsonify({'success': False, 'error': 'Job inexistent!'}), 404
+        
+        rows = scheduler.run_task(task_name)
+        
+        return jsonify({
+            'success': True,
+            'rows': rows,
+            'task': scheduler.get_stats()['tasks'][task_name]
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"Eroare la rularea job-ului {task_name}: {str(e)}")
+        return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
+
+
+@main.route('/api/admin/cache', methods=['GET'])
+@login_required
+def api_admin_cache():
+    """Admin: Statisticile cache-ului (hit / miss / evacuări)"""
+    if current_user.role != 'admin':
+        return jsonify({'success': False, 'error': 'Doar admin!'}), 403
+    
+    return jsonify({'success': True, 'cache': cache.get_stats()}), 200
+
+
+@main.route('/api/admin/review/backfill', methods=['POST'])
+@login_required
+def api_admin_review_backfill():
+    """Admin: Preia quiz-urile existente în coada de recapitulare (job în fundal)"""
+    if current_user.role != 'admin':
+        return jsonify({'success': False, 'error': 'Doar admin!'}), 403
+    
+    job = job_queue.enqueue('review.backfill', key='review.backfill')
+    return jsonify({
+        'success': True,
+        'queued': job is not None,
+        'message': 'Preluarea istoricului a pornit.' if job else 'Preluarea istoricului rulează deja.'
+    }), 202
+
+
+@main.route('/api/admin/answers/backfill', methods=['POST'])
+@login_required
+def api_admin_answers_backfill():
+    """Admin: Normalizează răspunsurile quiz-urilor trimise înainte de quiz_answers (job în fundal)"""
+    if current_user.role != 'admin':
+        return jsonify({'success': False, 'error': 'Doar admin!'}), 403
+    
+    job = job_queue.enqueue('answers.backfill', key='answers.backfill')
+    return jsonify({
+        'success': True,
+        'queued': job is not None,
+        'message': 'Normalizarea răspunsurilor a pornit.' if job else 'Normalizarea răspunsurilor rulează deja.'
+    }), 202
+
+
+@main.route('/api/admin/points/audit', methods=['GET'])
+@login_required
+def api_admin_points_audit():
+    """Admin: Utilizatorii al căror sold diferă de registrul de puncte"""
+    try:
+        if current_user.role != 'admin':
+            return jsonify({'success': False, 'error': 'Doar admin!'}), 403
+        
+        mismatches = points_audit()
+        
+        return jsonify({
+            'success': True,
+            'mismatches': [
+                {'user_id': user_id, 'points': points, 'expected': expected}
+                for user_id, points, expected in mismatches
+            ],
+            'total': len(mismatches)
+        }), 200
+        
+    except Exception as e:
+        print(f"Eroare la auditul punctelor: {str(e)}")
+        return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
+
+
 @main.route('/api/admin/users', methods=['GET'])
 @login_required
 def api_admin_get_users():
-    """Admin: Obține toți utilizatorii"""
+    """Admin: Utilizatori paginați keyset (sort, order, cursor, role, q)"""
     try:
         if current_user.role != 'admin':
             return jsonify({'success': False, 'error': 'Doar admin!'}), 403
         
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 50, type=int)
+        sort = request.args.get('sort', 'created_at')
+        order = request.args.get('order', 'desc')
+        cursor = request.args.get('cursor') or None
         role_filter = request.args.get('role', 'all')
+        q = request.args.get('q', '').strip()[:100]
+        per_page = request.args.get('per_page', user_grid.DEFAULT_PER_PAGE, type=int)
+        per_page = max(1, min(per_page, user_grid.MAX_PER_PAGE))
         
-        query = User.query
-        if role_filter != 'all':
-            query = query.filter_by(role=role_filter)
+        if sort not in user_grid.SORTS or order not in user_grid.ORDERS:
+            return jsonify({'success': False, 'error': 'Sortare invalidă!'}), 400
+        if role_filter != 'all' and role_filter not in user_grid.ROLES:
+            return jsonify({'success': False, 'error': 'Rol invalid!'}), 400
+        role = None if role_filter == 'all' else role_filter
         
-        total = query.count()
-        users = query.limit(per_page).offset((page - 1) * per_page).all()
+        try:
+            rows, next_cursor = user_grid.users_page(sort, order, cursor, per_page, role, q)
+        except user_grid.InvalidCursor as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         
-        return jsonify({
+        result = {
             'success': True,
-            'users': [u.to_dict() for u in users],
-            'total': total,
-            'page': page,
+            'users': [user_grid.row_to_dict(row) for row in rows],
+            'next_cursor': next_cursor,
+            'sort': sort,
+            'order': order,
             'per_page': per_page
-        }), 200
+        }
+        # Totalul doar pentru prima pagină (paginile următoare nu-l mai recalculează)
+        if cursor is None:
+            result['total'] = user_grid.count_users(role, q)
+        
+        return jsonify(result), 200
         
     except Exception as e:
         print(f"Eroare: {str(e)}")
         return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
 
 
+@main.route('/api/admin/users/export', methods=['GET'])
+@login_required
+def api_admin_export_users():
+    """Admin: Export utilizatori (CSV sau JSONL), trimis în flux"""
+    if current_user.role != 'admin':
+        return jsonify({'success': False, 'error': 'Doar admin!'}), 403
+    
+    export_format = request.args.get('format', 'csv')
+    role_filter = request.args.get('role', 'all')
+    q = request.args.get('q', '').strip()[:100]
+    
+    if export_format not in ('csv', 'jsonl'):
+        return jsonify({'success': False, 'error': 'Format invalid! (csv sau jsonl)'}), 400
+    if role_filter != 'all' and role_filter not in user_grid.ROLES:
+        return jsonify({'success': False, 'error': 'Rol invalid!'}), 400
+    
+    rows = user_grid.export_rows(None if role_filter == 'all' else role_filter, q)
+    if export_format == 'csv':
+        body = user_grid.iter_csv(rows)
+        mimetype = 'text/csv'
+    else:
+        body = iter_json_lines(rows, serialize=user_grid.row_to_dict)
+        mimetype = 'application/x-ndjson'
+    
+    filename = f"utilizatori-{datetime.now().strftime('%Y%m%d-%H%M')}.{export_format}"
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
 @main.route('/api/admin/users/<int:user_id>/suspend', methods=['POST'])
 @login_required
 def api_admin_suspend_user(user_id):
@@ -2318,4 +3181,41 @@ def api_admin_approve_payment(payment_id):
     except Exception as e:
         db.session.rollback()
         print(f"Eroare: {str(e)}")
-        return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
\ No newline at end of file
+        return jsonify({'success': False, 'error': 'A apărut o eroare.'}), 500
+
+
+# ==================== HEALTH CHECKS ====================
+
+def _database_ok():
+    try:
+        db.session.execute(text('SELECT 1'))
+        db.session.commit()
+        return True
+    except Exception as e:
+        db.session.rollback()
+        print(f"Eroare la verificarea bazei de date: {str(e)}")
+        return False
+
+
+@main.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness: procesul răspunde și baza de date e accesibilă"""
+    database = _database_ok()
+    return jsonify({
+        'status': 'ok' if database else 'error',
+        'database': database,
+        'warmed': warmup_state(current_app).ready
+    }), 200 if database else 503
+
+
+@main.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness: baza de date e accesibilă și cache-urile au fost încălzite"""
+    database = _database_ok()
+    warmup = warmup_state(current_app)
+    ready = database and warmup.ready
+    return jsonify({
+        'status': 'ready' if ready else 'not_ready',
+        'database': database,
+        'warmup': warmup.to_dict()
+    }), 200 if ready else 503
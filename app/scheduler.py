@@ -0,0 +1,172 @@
+"""Job-uri periodice în proces, rulate de un singur lider.
+
+Fiecare proces al aplicației pornește (la primul request) un thread care,
+la fiecare SCHEDULER_TICK secunde, încearcă să obțină sau să reînnoiască
+lease-ul din tabela scheduler_locks. Doar procesul care deține lease-ul
+rulează job-urile ajunse la termen; dacă liderul dispare, lease-ul expiră
+după SCHEDULER_LOCK_TTL secunde și este preluat de alt proces.
+
+Job-urile se înregistrează cu @scheduler.every(secunde, 'nume') și întorc
+numărul de rânduri modificate; durata și rândurile sunt raportate în
+get_stats().
+"""
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from app.models import db, SchedulerLock
+
+
+class LeaderLock:
+    """Lease într-o tabelă: un singur proces îl deține până la expires_at"""
+
+    def __init__(self, name, ttl=60):
+        self.name = name
+        self.ttl = ttl
+
+    def acquire(self, owner):
+        """Obține sau reînnoiește lease-ul; True dacă `owner` este liderul"""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl)
+        renewed = db.session.execute(
+            update(SchedulerLock)
+            .where(SchedulerLock.name == self.name,
+                   or_(SchedulerLock.owner == owner, SchedulerLock.expires_at < now))
+            .values(owner=owner, expires_at=expires_at)
+        ).rowcount
+        if renewed:
+            db.session.commit()
+            return True
+        try:
+            db.session.execute(insert(SchedulerLock).values(name=self.name, owner=owner, expires_at=expires_at))
+            db.session.commit()
+            return True
+        except IntegrityError:
+            # Rândul există și e deținut de alt proces
+            db.session.rollback()
+            return False
+
+    def release(self, owner):
+        db.session.execute(
+            delete(SchedulerLock).where(SchedulerLock.name == self.name, SchedulerLock.owner == owner)
+        )
+        db.session.commit()
+
+
+class ScheduledTask:
+    __slots__ = ('name', 'interval', 'func', 'next_run', 'stats')
+
+    def __init__(self, name, interval, func):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.next_run = 0.0
+        self.stats = {'runs': 0, 'errors': 0, 'rows_total': 0, 'last_rows': None,
+                      'last_duration_ms': None, 'last_run_at': None, 'last_error': None}
+
+
+class Scheduler:
+    """Registrul job-urilor periodice + thread-ul care le rulează"""
+
+    def __init__(self, lock_name='maintenance'):
+        self.tasks = {}
+        self.app = None
+        self.enabled = False
+        self.tick = 10
+        self.lock = LeaderLock(lock_name)
+        self.owner = None
+        self.is_leader = False
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('SCHEDULER_ENABLED', True)
+        self.tick = app.config.get('SCHEDULER_TICK', 10)
+        self.lock.ttl = app.config.get('SCHEDULER_LOCK_TTL', 60)
+        app.extensions['scheduler'] = self
+        if self.enabled:
+            app.before_request(self.ensure_started)
+
+    def every(self, seconds, name):
+        """Decorator pentru înregistrarea unui job periodic"""
+        def decorator(func):
+            self.tasks[name] = ScheduledTask(name, seconds, func)
+            return func
+        return decorator
+
+    def ensure_started(self):
+        # Ca la coada de job-uri: thread-ul nu supraviețuiește unui fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self.owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+            self.is_leader = False
+            thread = threading.Thread(target=self._loop, name='scheduler', daemon=True)
+            thread.start()
+            self._pid = os.getpid()
+
+    def _loop(self):
+        while True:
+            with self.app.app_context():
+                try:
+                    self.run_pending()
+                except Exception as e:
+                    db.session.rollback()
+                    self.is_leader = False
+                    print(f"Eroare în scheduler: {str(e)}")
+            time.sleep(self.tick)
+
+    def run_pending(self):
+        """Rulează job-urile ajunse la termen, dacă procesul curent este liderul"""
+        self.is_leader = self.lock.acquire(self.owner)
+        if not self.is_leader:
+            return
+        now = time.monotonic()
+        for task in self.tasks.values():
+            if task.next_run <= now:
+                self.run_task(task.name)
+                task.next_run = time.monotonic() + task.interval
+
+    def run_task(self, name):
+        """Rulează imediat un job și îi actualizează statisticile; întoarce rândurile modificate"""
+        task = self.tasks[name]
+        started = time.perf_counter()
+        rows = None
+        try:
+            rows = task.func() or 0
+        except Exception as e:
+            db.session.rollback()
+            task.stats['errors'] += 1
+            task.stats['last_error'] = str(e)
+            print(f"Job programat {name} eșuat: {str(e)}")
+        else:
+            task.stats['rows_total'] += rows
+            task.stats['last_error'] = None
+        task.stats['runs'] += 1
+        task.stats['last_rows'] = rows
+        task.stats['last_duration_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        task.stats['last_run_at'] = datetime.utcnow().isoformat()
+        return rows
+
+    def get_stats(self):
+        return {
+            'enabled': self.enabled,
+            'owner': self.owner,
+            'is_leader': self.is_leader,
+            'tasks': {
+                name: dict(task.stats, interval_seconds=task.interval)
+                for name, task in self.tasks.items()
+            }
+        }
+
+
+scheduler = Scheduler()
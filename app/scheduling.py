@@ -0,0 +1,243 @@
+"""Index de intervale pentru întâlnirile profesorilor.
+
+Pentru fiecare profesor păstrăm întâlnirile active (pending / confirmed)
+ca listă de intervale [start, end) sortată după start. Cum întâlnirile
+unui profesor nu se suprapun, un conflict se verifică doar cu vecinii
+poziției găsite prin căutare binară - O(log n).
+
+Indexul este actualizat după commit (app.events) la creare / răspuns /
+anulare. Modificările făcute de alte procese (întâlniri noi, reprogramări,
+schimbări de status) sunt preluate la sync() citind rândurile cu updated_at
+după ultima sincronizare (indexul ix_meetings_updated). Watermark-ul vine
+doar din aceste citiri - nu din commit-urile proprii - și fereastra se
+suprapune cu SYNC_OVERLAP, pentru tranzacțiile comise după ce am citit.
+
+Indexul servește sugestiile și respingerea rapidă; la creare, verificarea
+autoritară se face în baza de date (db_conflict), sub blocarea rândului
+profesorului, în tranzacția care inserează întâlnirea.
+"""
+import bisect
+import heapq
+import threading
+from datetime import datetime, timedelta
+
+from app.events import on_commit
+from app.models import db, Meeting, User
+
+ACTIVE_STATUSES = ('pending', 'confirmed')
+SLOT_MINUTES = 30
+WORKDAY_START_HOUR = 9
+WORKDAY_END_HOUR = 18
+SEARCH_HORIZON_DAYS = 14
+SYNC_OVERLAP = timedelta(minutes=5)
+# Întâlnirile care încep cu mai mult de atât înainte nu se mai pot suprapune
+MAX_MEETING_DURATION = timedelta(days=1)
+
+
+def meeting_interval(start, duration_minutes):
+    return start, start + timedelta(minutes=duration_minutes or 60)
+
+
+class ProfessorSchedule:
+    """Intervalele active ale unui profesor, sortate după start"""
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.ids = []
+        self.start_by_id = {}
+
+    def __len__(self):
+        return len(self.starts)
+
+    def add(self, meeting_id, start, end):
+        self.remove(meeting_id)
+        i = bisect.bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.ids.insert(i, meeting_id)
+        self.start_by_id[meeting_id] = start
+
+    def remove(self, meeting_id):
+        start = self.start_by_id.pop(meeting_id, None)
+        if start is None:
+            return
+        i = bisect.bisect_left(self.starts, start)
+        while self.ids[i] != meeting_id:
+            i += 1
+        del self.starts[i], self.ends[i], self.ids[i]
+
+    def conflict(self, start, end):
+        """Id-ul unei întâlniri care se suprapune cu [start, end) sau None"""
+        i = bisect.bisect_left(self.starts, end)
+        # Intervalul cu start-ul imediat înainte de `end` e singurul candidat
+        if i > 0 and self.ends[i - 1] > start:
+            return self.ids[i - 1]
+        return None
+
+    def next_free(self, start, duration):
+        """Primul moment >= start în care încape o întâlnire de durata dată"""
+        while True:
+            end = start + duration
+            i = bisect.bisect_left(self.starts, end)
+            if i == 0 or self.ends[i - 1] <= start:
+                return start
+            start = self.ends[i - 1]
+
+
+def _round_up(moment, minutes=SLOT_MINUTES):
+    moment = moment.replace(second=0, microsecond=0)
+    extra = moment.minute % minutes
+    return moment + timedelta(minutes=minutes - extra) if extra else moment
+
+
+def _align_to_workday(moment, duration):
+    """Mută momentul în intervalul de lucru (grila de SLOT_MINUTES)"""
+    moment = _round_up(moment)
+    day_start = moment.replace(hour=WORKDAY_START_HOUR, minute=0)
+    day_end = moment.replace(hour=WORKDAY_END_HOUR, minute=0)
+    if moment < day_start:
+        return day_start
+    if moment + duration > day_end:
+        return day_start + timedelta(days=1)
+    return moment
+
+
+class MeetingIntervalIndex:
+    """{professor_id: ProfessorSchedule} pentru întâlnirile active"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._schedules = {}
+        self._professor_by_id = {}
+        self._ready = False
+        self._watermark = None
+
+    def _apply(self, meeting_id, professor_id, start, duration, status):
+        previous = self._professor_by_id.pop(meeting_id, None)
+        if previous is not None and previous in self._schedules:
+            self._schedules[previous].remove(meeting_id)
+        if status in ACTIVE_STATUSES:
+            schedule = self._schedules.setdefault(professor_id, ProfessorSchedule())
+            schedule.add(meeting_id, *meeting_interval(start, duration))
+            self._professor_by_id[meeting_id] = professor_id
+
+    def _load(self, since=None):
+        """Citește întâlnirile active (prima dată) sau toate cele modificate după `since`"""
+        query = db.session.query(
+            Meeting.id, Meeting.professor_id, Meeting.meeting_date, Meeting.duration_minutes,
+            Meeting.status, Meeting.updated_at
+        )
+        if since is None:
+            # Doar întâlnirile care nu s-au terminat (durata maximă uzuală < 1 zi)
+            query = query.filter(Meeting.status.in_(ACTIVE_STATUSES),
+                                 Meeting.meeting_date >= datetime.now() - MAX_MEETING_DURATION)
+        else:
+            # Și cele devenite inactive, ca să fie scoase din index
+            query = query.filter(Meeting.updated_at >= since - SYNC_OVERLAP)
+        watermark = since
+        for row in query.order_by(Meeting.id).all():
+            self._apply(row.id, row.professor_id, row.meeting_date, row.duration_minutes, row.status)
+            if row.updated_at and (watermark is None or row.updated_at > watermark):
+                watermark = row.updated_at
+        return watermark
+
+    def sync(self):
+        """Construiește indexul la prima folosire, apoi preia modificările altor procese"""
+        with self._lock:
+            if not self._ready:
+                started = datetime.utcnow()
+                self._load()
+                self._watermark = started
+                self._ready = True
+            else:
+                self._watermark = self._load(since=self._watermark)
+
+    def apply_changes(self, changes):
+        if not self._ready:
+            return
+        with self._lock:
+            for change in changes:
+                data = change.data
+                status = 'deleted' if change.op == 'delete' else data['status']
+                self._apply(change.id, data['professor_id'], data['meeting_date'],
+                            data['duration_minutes'], status)
+
+    def find_conflict(self, professor_id, start, end):
+        """Întâlnirea activă care se suprapune cu [start, end) sau None.
+
+        Un conflict găsit în index este confirmat după cheia primară, pentru
+        cazul în care întâlnirea a fost anulată între timp de alt proces.
+        """
+        self.sync()
+        while True:
+            with self._lock:
+                schedule = self._schedules.get(professor_id)
+                meeting_id = schedule.conflict(start, end) if schedule else None
+            if meeting_id is None:
+                return None
+            meeting = db.session.get(Meeting, meeting_id)
+            if meeting and meeting.status in ACTIVE_STATUSES:
+                return meeting
+            with self._lock:
+                schedule.remove(meeting_id)
+
+    def db_conflict(self, professor_id, start, end):
+        """Verificarea autoritară, în baza de date, pentru tranzacția care creează întâlnirea.
+
+        Blochează rândul profesorului (SELECT ... FOR UPDATE) până la commit,
+        deci două cereri concurente pentru același profesor se serializează:
+        a doua vede întâlnirea inserată de prima.
+        """
+        db.session.query(User.id).filter(User.id == professor_id).with_for_update().one()
+        candidates = db.session.query(Meeting).filter(
+            Meeting.professor_id == professor_id,
+            Meeting.status.in_(ACTIVE_STATUSES),
+            Meeting.meeting_date < end,
+            Meeting.meeting_date > start - MAX_MEETING_DURATION
+        ).order_by(Meeting.meeting_date).all()
+        for meeting in candidates:
+            if meeting_interval(meeting.meeting_date, meeting.duration_minutes)[1] > start:
+                return meeting
+        return None
+
+    def free_slots(self, professor_ids, count, duration_minutes=60, start=None):
+        """Următoarele `count` intervale libere, (start, professor_id), ordonate după start"""
+        self.sync()
+        duration = timedelta(minutes=duration_minutes)
+        start = start or datetime.now()
+        horizon = start + timedelta(days=SEARCH_HORIZON_DAYS)
+
+        def slots_for(professor_id):
+            schedule = self._schedules.get(professor_id) or ProfessorSchedule()
+            moment = _align_to_workday(start, duration)
+            while moment < horizon:
+                with self._lock:
+                    free = schedule.next_free(moment, duration)
+                aligned = _align_to_workday(free, duration)
+                if aligned != free:
+                    moment = aligned
+                    continue
+                yield free, professor_id
+                moment = free + duration
+
+        merged = heapq.merge(*(slots_for(pid) for pid in professor_ids))
+        return [slot for _, slot in zip(range(count), merged)]
+
+
+meeting_index = MeetingIntervalIndex()
+
+
+def _meeting_snapshot(meeting):
+    return {
+        'professor_id': meeting.professor_id,
+        'meeting_date': meeting.meeting_date,
+        'duration_minutes': meeting.duration_minutes,
+        'status': meeting.status,
+    }
+
+
+@on_commit(Meeting, fields=('status', 'meeting_date', 'duration_minutes', 'professor_id'),
+           snapshot=_meeting_snapshot)
+def _sync_meeting_index(changes):
+    meeting_index.apply_changes(changes)
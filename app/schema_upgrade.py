@@ -0,0 +1,101 @@
+"""Aducerea unei baze de date existente la schema modelelor.
+
+db.create_all() creează doar tabelele care lipsesc: nu adaugă coloane sau
+indexuri în tabelele existente. Coloanele noi din tabelele existente sunt
+listate în UPGRADE_COLUMNS și adăugate de `flask db upgrade-columns` cu
+ALTER TABLE ... ADD COLUMN (definiția vine din model, inclusiv DEFAULT-ul de
+server și cheia străină); apoi sunt create indexurile modelelor care lipsesc.
+Comanda inspectează schema înainte de fiecare pas, deci poate fi rulată
+oricând, de câte ori e nevoie.
+
+O coloană NOT NULL adăugată unei tabele cu rânduri are nevoie de
+server_default - altfel ALTER-ul ar eșua pe rândurile existente.
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import AddConstraint, CreateColumn
+
+from app.models import db
+
+# (tabel, coloană) - coloane adăugate unor tabele care existau deja
+UPGRADE_COLUMNS = (
+    # Procesarea asincronă a quiz-urilor: rândurile vechi rămân NULL (vezi quiz_pipeline.requeue_since)
+    ('quiz_submissions', 'processed_at'),
+    # Quiz-uri asamblate din bănci de întrebări
+    ('questions', 'source_bank_question_id'),
+    # Semnătura MinHash pentru detectarea duplicatelor; calculată la următoarea construire a indexului
+    ('bank_questions', 'minhash'),
+    # Contoarele de progres în clase; pornesc de la 0, recalculate de `flask classes rebuild`
+    ('class_students', 'lessons_started'),
+    ('class_students', 'lessons_completed'),
+    ('class_students', 'quizzes_taken'),
+    ('class_students', 'quizzes_passed'),
+    ('class_students', 'score_sum'),
+    ('class_students', 'last_activity_at'),
+)
+
+# Comanda de rulat după ce unei tabele i s-au adăugat coloane (date derivate de recalculat)
+FOLLOW_UP = {
+    'class_students': 'flask classes rebuild',
+}
+
+
+def _column(table_name, column_name):
+    column = db.metadata.tables[table_name].c[column_name]
+    if not column.nullable and column.server_default is None:
+        raise RuntimeError(f'{table_name}.{column_name} este NOT NULL fără server_default')
+    return column
+
+
+def missing_columns(connection):
+    """Coloanele din UPGRADE_COLUMNS absente din tabelele existente"""
+    inspector = inspect(connection)
+    tables = set(inspector.get_table_names())
+    existing = {}
+    missing = []
+    for table_name, column_name in UPGRADE_COLUMNS:
+        if table_name not in tables:
+            continue  # create_all o creează complet
+        if table_name not in existing:
+            existing[table_name] = {column['name'] for column in inspector.get_columns(table_name)}
+        if column_name not in existing[table_name]:
+            missing.append(_column(table_name, column_name))
+    return missing
+
+
+def missing_indexes(connection):
+    """Indexurile modelelor absente din tabelele existente"""
+    inspector = inspect(connection)
+    tables = set(inspector.get_table_names())
+    missing = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        names = {index['name'] for index in inspector.get_indexes(table.name)}
+        columns = {column['name'] for column in inspector.get_columns(table.name)}
+        # Indexurile pe coloane încă neadăugate așteaptă coloana (o intrare în UPGRADE_COLUMNS)
+        missing.extend(index for index in sorted(table.indexes, key=lambda i: i.name)
+                       if index.name not in names and all(column.name in columns for column in index.columns))
+    return missing
+
+
+def add_column(connection, column):
+    preparer = connection.dialect.identifier_preparer
+    definition = CreateColumn(column).compile(dialect=connection.dialect)
+    connection.execute(text(f'ALTER TABLE {preparer.format_table(column.table)} ADD COLUMN {definition}'))
+    # SQLite nu poate adăuga constrângeri unei tabele existente
+    if connection.dialect.name != 'sqlite':
+        for foreign_key in column.foreign_keys:
+            connection.execute(AddConstraint(foreign_key.constraint))
+
+
+def upgrade():
+    """Adaugă coloanele și indexurile lipsă; întoarce (coloane, indexuri) adăugate, ca nume"""
+    with db.engine.begin() as connection:
+        columns = missing_columns(connection)
+        for column in columns:
+            add_column(connection, column)
+    with db.engine.begin() as connection:
+        indexes = missing_indexes(connection)
+        for index in indexes:
+            index.create(bind=connection)
+    return [f'{column.table.name}.{column.name}' for column in columns], [index.name for index in indexes]
@@ -0,0 +1,269 @@
+"""Căutare full-text în lecții (index inversat în memorie, scor BM25).
+
+Indexul acoperă titlul, descrierea și conținutul lecțiilor publicate, cu
+ponderi diferite pe câmpuri. Se construiește la prima căutare și apoi e
+actualizat incremental:
+  - în procesul curent, după fiecare commit care modifică o lecție (app.events);
+  - pentru modificările făcute de alte procese, periodic, recitind doar
+    lecțiile cu updated_at mai nou decât ultima sincronizare.
+Facet-urile (nivel, categorie) sunt menținute odată cu indexul.
+"""
+import heapq
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from markupsafe import escape
+
+from app.events import on_commit
+from app.models import db, Lesson
+
+# Ponderile câmpurilor (BM25F simplificat)
+FIELD_WEIGHTS = {'title': 3.0, 'description': 2.0, 'content': 1.0}
+K1 = 1.2
+B = 0.75
+
+REFRESH_INTERVAL_SECONDS = 30
+SNIPPET_RADIUS = 80
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+TAG_RE = re.compile(r'<[^>]+>')
+STOPWORDS = frozenset((
+    'a', 'an', 'the', 'of', 'to', 'in', 'on', 'and', 'or', 'is', 'are',
+    'si', 'sau', 'de', 'la', 'in', 'cu', 'pe', 'un', 'o', 'al', 'ale',
+))
+
+INDEXED_FIELDS = ('title', 'description', 'content', 'level', 'category', 'status')
+
+
+def fold(text):
+    """Litere mici, fără diacritice (ă -> a, ș -> s)"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def strip_html(text):
+    return TAG_RE.sub(' ', text or '')
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(fold(text or '')) if t not in STOPWORDS]
+
+
+def _lesson_snapshot(lesson):
+    return {field: getattr(lesson, field) for field in INDEXED_FIELDS}
+
+
+class LessonSearchIndex:
+    """Index inversat: termen -> {lesson_id: tf ponderat}"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._ready = False
+        self._postings = defaultdict(dict)
+        self._docs = {}  # lesson_id -> (lungime ponderată, level, category, termeni)
+        self._total_length = 0.0
+        self._facets = {'level': Counter(), 'category': Counter()}
+        self._watermark = None
+        self._last_refresh = 0.0
+
+    # ---------- întreținere ----------
+
+    def _add(self, lesson_id, data):
+        if data['status'] != 'published':
+            return
+        weighted = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            text = data[field] or ''
+            if field == 'content':
+                text = strip_html(text)
+            for term in tokenize(text):
+                weighted[term] += weight
+        length = sum(weighted.values())
+        for term, tf in weighted.items():
+            self._postings[term][lesson_id] = tf
+        category = data['category'] or ''
+        self._docs[lesson_id] = (length, data['level'], category, tuple(weighted))
+        self._total_length += length
+        self._facets['level'][data['level']] += 1
+        self._facets['category'][category] += 1
+
+    def _remove(self, lesson_id):
+        doc = self._docs.pop(lesson_id, None)
+        if doc is None:
+            return
+        length, level, category, terms = doc
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(lesson_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= length
+        self._facets['level'][level] -= 1
+        self._facets['category'][category] -= 1
+        for counter in self._facets.values():
+            for key in [k for k, v in counter.items() if v <= 0]:
+                del counter[key]
+
+    def upsert(self, lesson_id, data):
+        with self._lock:
+            self._remove(lesson_id)
+            self._add(lesson_id, data)
+
+    def remove(self, lesson_id):
+        with self._lock:
+            self._remove(lesson_id)
+
+    def _load(self, since=None):
+        """Citește lecțiile (toate sau doar cele modificate după `since`)"""
+        columns = [Lesson.id, Lesson.updated_at] + [getattr(Lesson, f) for f in INDEXED_FIELDS]
+        query = db.session.query(*columns)
+        if since is None:
+            query = query.filter(Lesson.status == 'published')
+        else:
+            query = query.filter(Lesson.updated_at >= since)
+        watermark = since
+        for row in query.order_by(Lesson.id).yield_per(1000):
+            data = {field: getattr(row, field) for field in INDEXED_FIELDS}
+            self.upsert(row.id, data)
+            if row.updated_at and (watermark is None or row.updated_at > watermark):
+                watermark = row.updated_at
+        return watermark
+
+    def ensure_fresh(self):
+        """Construiește indexul la nevoie și aplică modificările altor procese"""
+        now = time.monotonic()
+        if self._ready and now - self._last_refresh < REFRESH_INTERVAL_SECONDS:
+            return
+        with self._lock:
+            if not self._ready:
+                started = datetime.utcnow()
+                watermark = self._load()
+                self._watermark = watermark or started
+                self._ready = True
+            elif now - self._last_refresh >= REFRESH_INTERVAL_SECONDS:
+                self._watermark = self._load(since=self._watermark) or self._watermark
+            self._last_refresh = time.monotonic()
+
+    def apply_changes(self, changes):
+        if not self._ready:
+            return
+        for change in changes:
+            if change.op == 'delete':
+                self.remove(change.id)
+            else:
+                self.upsert(change.id, change.data)
+
+    # ---------- interogare ----------
+
+    def facets(self, lesson_ids=None):
+        with self._lock:
+            if lesson_ids is None:
+                return {name: dict(counter) for name, counter in self._facets.items()}
+            levels, categories = Counter(), Counter()
+            for lesson_id in lesson_ids:
+                _, level, category, _ = self._docs[lesson_id]
+                levels[level] += 1
+                categories[category] += 1
+            return {'level': dict(levels), 'category': dict(categories)}
+
+    def search(self, query, level=None, category=None, limit=20, offset=0):
+        """Returnează (hits [(lesson_id, scor)], total, facets pentru rezultate)"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            n_docs = len(self._docs)
+            if not terms or not n_docs:
+                return [], 0, {'level': {}, 'category': {}}
+            avg_length = self._total_length / n_docs
+
+            scores = defaultdict(float)
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                for lesson_id, tf in postings.items():
+                    length = self._docs[lesson_id][0]
+                    norm = K1 * (1 - B + B * length / avg_length)
+                    scores[lesson_id] += idf * tf * (K1 + 1) / (tf + norm)
+
+            matched = scores.keys()
+            facets = self.facets(matched)
+            if level or category is not None:
+                matched = [
+                    lesson_id for lesson_id in matched
+                    if (not level or self._docs[lesson_id][1] == level)
+                    and (category is None or self._docs[lesson_id][2] == category)
+                ]
+            top = heapq.nlargest(offset + limit, matched, key=lambda i: (scores[i], -i))
+            return [(i, scores[i]) for i in top[offset:]], len(matched), facets
+
+
+lesson_index = LessonSearchIndex()
+
+
+@on_commit(Lesson, fields=INDEXED_FIELDS, snapshot=_lesson_snapshot)
+def _sync_lesson_index(changes):
+    lesson_index.apply_changes(changes)
+
+
+def highlight(text, terms, radius=SNIPPET_RADIUS):
+    """Fragment din text în jurul primei apariții, cu termenii marcați cu <mark>"""
+    text = ' '.join(strip_html(text).split())
+    if not text:
+        return ''
+    spans = [m.span() for m in TOKEN_RE.finditer(text) if fold(m.group()) in terms]
+    if not spans:
+        return str(escape(text[:2 * radius])) + ('…' if len(text) > 2 * radius else '')
+
+    start = max(0, spans[0][0] - radius)
+    end = min(len(text), spans[0][1] + radius)
+    parts = ['…' if start > 0 else '']
+    cursor = start
+    for s, e in spans:
+        if s < start or e > end:
+            continue
+        parts.append(str(escape(text[cursor:s])))
+        parts.append(f'<mark>{escape(text[s:e])}</mark>')
+        cursor = e
+    parts.append(str(escape(text[cursor:end])))
+    parts.append('…' if end < len(text) else '')
+    return ''.join(parts)
+
+
+def search_lessons(query, level=None, category=None, page=1, per_page=20):
+    """Caută lecții și încarcă din DB doar lecțiile de pe pagina cerută"""
+    lesson_index.ensure_fresh()
+    offset = (page - 1) * per_page
+    hits, total, facets = lesson_index.search(query, level, category, per_page, offset)
+
+    lessons = {}
+    if hits:
+        ids = [lesson_id for lesson_id, _ in hits]
+        lessons = {l.id: l for l in Lesson.query.filter(Lesson.id.in_(ids)).all()}
+
+    terms = set(tokenize(query))
+    results = []
+    for lesson_id, score in hits:
+        lesson = lessons.get(lesson_id)
+        if lesson is None:
+            continue
+        results.append({
+            'id': lesson.id,
+            'title': lesson.title,
+            'title_highlighted': highlight(lesson.title, terms, radius=len(lesson.title)),
+            'snippet': highlight(f'{lesson.description} {lesson.content}', terms),
+            'level': lesson.level,
+            'level_display': lesson.get_level_display(),
+            'category': lesson.category,
+            'difficulty': lesson.difficulty,
+            'duration_minutes': lesson.duration_minutes,
+            'score': round(score, 4)
+        })
+    return results, total, facets
@@ -3,12 +3,70 @@ let studentsPage = 1;
 let studentsPerPage = 25;
 let currentProfessorLevel = 'all';
 
+// Live updates (SSE) - top of the first page + own rank
+let liveTop = [];
+let liveTotal = null;
+let liveUserId = null;
+let liveRank = null;
+
 // Initialize
 document.addEventListener('DOMContentLoaded', function() {
     loadStudentsLeaderboard(1);
     loadProfessorsLeaderboard();
+    startLiveLeaderboard();
 });
 
+function startLiveLeaderboard() {
+    if (!window.EventSource) return;
+    
+    const source = new EventSource('/api/leaderboard/stream?top=' + studentsPerPage);
+    
+    source.addEventListener('snapshot', function(event) {
+        const data = JSON.parse(event.data);
+        liveTop = data.top;
+        liveTotal = data.total;
+        applyLiveRank(data.me);
+        renderLiveTop();
+    });
+    
+    source.addEventListener('delta', function(event) {
+        const data = JSON.parse(event.data);
+        data.top.forEach(function(row) {
+            liveTop[row[0] - 1] = row;
+        });
+        if (data.size !== undefined) liveTop.length = data.size;
+        if (data.total !== undefined) liveTotal = data.total;
+        if (data.me) applyLiveRank(data.me);
+        renderLiveTop();
+    });
+}
+
+function applyLiveRank(me) {
+    if (!me) return;
+    liveUserId = me.user_id;
+    liveRank = me.rank;
+    const userRankEl = document.getElementById('userRankNumber');
+    if (userRankEl) {
+        userRankEl.textContent = me.rank;
+    }
+}
+
+function renderLiveTop() {
+    // Other pages keep the data loaded by loadStudentsLeaderboard
+    if (studentsPage !== 1 || liveTotal === null) return;
+    
+    const leaderboard = liveTop.map(function(row) {
+        return {
+            user_id: row[1],
+            name: row[2],
+            points: row[3],
+            lessons_completed: row[4],
+            is_current_user: row[1] === liveUserId
+        };
+    });
+    displayStudentsLeaderboard(leaderboard, liveRank, liveTotal, 1, studentsPerPage);
+}
+
 
 function switchTab(tabName) {
     // Hide all tabs
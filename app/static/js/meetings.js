@@ -136,4 +136,11 @@ document.addEventListener('DOMContentLoaded', function() {
             closeResponseModal();
         }
     });
-});
\ No newline at end of file
+});
+// Notificări noi despre întâlniri (vezi notifications.js): lista de pe pagină e generată de server
+document.addEventListener('notifications:new', function(event) {
+    const meetingUpdates = event.detail.filter(n => n.kind.startsWith('meeting_'));
+    if (meetingUpdates.length && document.getElementById('message-container')) {
+        showMessage('Ai actualizări noi la întâlniri. <a href="/meetings">Reîncarcă pagina</a>', 'success');
+    }
+});
@@ -0,0 +1,115 @@
+// Notificări: clopoțel în meniu + long-poll pe /api/notifications/poll
+
+(function() {
+    const bell = document.getElementById('notificationsBell');
+    if (!bell) return;
+
+    const badge = document.getElementById('notificationsBadge');
+    const panel = document.getElementById('notificationsPanel');
+    const list = document.getElementById('notificationsList');
+
+    let lastId = 0;
+    let items = [];
+    let retryDelay = 1000;
+
+    function escapeHtml(text) {
+        const div = document.createElement('div');
+        div.textContent = text;
+        return div.innerHTML;
+    }
+
+    function setUnread(count) {
+        badge.textContent = count > 99 ? '99+' : count;
+        badge.style.display = count > 0 ? '' : 'none';
+    }
+
+    function render() {
+        if (!items.length) {
+            list.innerHTML = '<li class="notification-empty">Nu ai notificări.</li>';
+            return;
+        }
+        list.innerHTML = items.map(function(n) {
+            const date = new Date(n.created_at + 'Z').toLocaleString('ro-RO');
+            const text = escapeHtml(n.text);
+            const body = n.link ? `<a href="${n.link}">${text}</a>` : text;
+            return `<li class="notification-item${n.is_read ? '' : ' unread'}">
+                        <div>${body}</div>
+                        <small>${date}</small>
+                    </li>`;
+        }).join('');
+    }
+
+    async function load() {
+        const response = await fetch('/api/notifications?limit=20');
+        const data = await response.json();
+        if (!data.success) throw new Error(data.error);
+        items = data.notifications;
+        lastId = data.last_id;
+        setUnread(data.unread);
+        render();
+    }
+
+    async function poll() {
+        while (true) {
+            try {
+                const response = await fetch('/api/notifications/poll?since=' + lastId);
+                const data = await response.json();
+                if (!data.success) throw new Error(data.error);
+
+                if (data.notifications.length) {
+                    // Cele mai noi primele; lista afișată rămâne scurtă
+                    items = data.notifications.slice().reverse().concat(items).slice(0, 20);
+                    render();
+                    document.dispatchEvent(new CustomEvent('notifications:new', { detail: data.notifications }));
+                }
+                lastId = data.last_id;
+                setUnread(data.unread);
+                retryDelay = 1000;
+            } catch (error) {
+                // Server repornit / rețea căzută: reîncearcă tot mai rar
+                await new Promise(function(resolve) { setTimeout(resolve, retryDelay); });
+                retryDelay = Math.min(retryDelay * 2, 30000);
+            }
+        }
+    }
+
+    async function markAllRead() {
+        if (!items.some(function(n) { return !n.is_read; })) return;
+        try {
+            const response = await fetch('/api/notifications/read', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ all: true })
+            });
+            const data = await response.json();
+            if (data.success) {
+                items.forEach(function(n) { n.is_read = true; });
+                setUnread(data.unread);
+            }
+        } catch (error) {
+            console.error('Eroare:', error);
+        }
+    }
+
+    bell.addEventListener('click', function(event) {
+        event.preventDefault();
+        const open = panel.style.display === 'none';
+        panel.style.display = open ? '' : 'none';
+        if (open) {
+            markAllRead();
+        } else {
+            render();
+        }
+    });
+
+    document.addEventListener('click', function(event) {
+        if (panel.style.display !== 'none' && !panel.contains(event.target) && !bell.contains(event.target)) {
+            panel.style.display = 'none';
+            render();
+        }
+    });
+
+    load().then(poll).catch(function(error) {
+        console.error('Eroare la încărcarea notificărilor:', error);
+    });
+})();
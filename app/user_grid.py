@@ -0,0 +1,198 @@
+"""Grila de utilizatori din admin: paginare keyset, sortare, căutare, export.
+
+Paginile nu folosesc OFFSET: cursorul (opac, base64) ține valoarea coloanei
+de sortare și id-ul ultimului rând trimis, iar pagina următoare începe cu
+WHERE (col, id) > (valoare, id). Fiecare sortare are indexul ei compus cu
+id-ul - ix_users_points_id, ix_users_created_id, ix_users_role_id - deci o
+pagină costă la fel de puțin indiferent cât de departe e în listă.
+
+Sortarea după rol parcurge rolurile pe rând, în ordinea din ROLES (aceeași cu
+ordinea ENUM-ului în MySQL), cu câte o interogare (role = :rol, id > :id):
+comparația de tip < / > pe un ENUM nu urmează ordinea în care MySQL îl sortează.
+
+Exportul (CSV / JSONL) citește tabela printr-un cursor pe server
+(yield_per) și trimite rândurile pe bucăți, cu memorie constantă.
+"""
+import base64
+import binascii
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_, select
+
+from app.models import db, User
+
+SORTS = {
+    'id': User.id,
+    'points': User.points,
+    'created_at': User.created_at,
+    'role': User.role,
+}
+ROLES = ('user', 'professor', 'admin')
+ORDERS = ('asc', 'desc')
+
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 200
+EXPORT_CHUNK_ROWS = 1000
+
+# Doar coloanele afișate (fără parolă, bio etc.)
+GRID_COLUMNS = (
+    User.id, User.first_name, User.last_name, User.email, User.role,
+    User.points, User.premium, User.is_available, User.created_at,
+)
+EXPORT_FIELDS = tuple(column.key for column in GRID_COLUMNS)
+
+# Celule care ar fi interpretate ca formule în Excel / LibreOffice
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class InvalidCursor(ValueError):
+    """Cursor corupt sau emis pentru altă sortare"""
+
+
+# ==================== CURSOR ====================
+
+def encode_cursor(sort, order, row):
+    value = getattr(row, sort)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, order, value, row.id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, sort, order):
+    """(valoare, id) din cursor; InvalidCursor dacă nu corespunde sortării cerute"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        cursor_sort, cursor_order, value, last_id = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise InvalidCursor('Cursor invalid')
+
+    if cursor_sort != sort or cursor_order != order or not isinstance(last_id, int):
+        raise InvalidCursor('Cursorul nu corespunde sortării cerute')
+    if sort == 'created_at' and value is not None:
+        try:
+            value = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise InvalidCursor('Cursor invalid')
+    if sort == 'role' and value not in ROLES:
+        raise InvalidCursor('Cursor invalid')
+    return value, last_id
+
+
+# ==================== INTEROGĂRI ====================
+
+def _escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def prefix_search(query, q):
+    """Căutarea: fiecare cuvânt e prefix al emailului, prenumelui sau numelui (query are User în FROM)"""
+    for term in (q or '').split():
+        pattern = _escape_like(term) + '%'
+        query = query.where(or_(
+            User.email.like(pattern, escape='\\'),
+            User.first_name.like(pattern, escape='\\'),
+            User.last_name.like(pattern, escape='\\'),
+        ))
+    return query
+
+
+def _filtered(query, role=None, q=None):
+    """Filtrul pe rol + căutarea după prefix"""
+    if role:
+        query = query.where(User.role == role)
+    return prefix_search(query, q)
+
+
+def _after(column, value, last_id, descending):
+    """(column, id) strict după (value, last_id) în ordinea cerută"""
+    if descending:
+        return or_(column < value, and_(column == value, User.id < last_id))
+    return or_(column > value, and_(column == value, User.id > last_id))
+
+
+def count_users(role=None, q=None):
+    query = _filtered(select(db.func.count(User.id)), role, q)
+    return db.session.execute(query).scalar()
+
+
+def users_page(sort='created_at', order='desc', cursor=None, per_page=DEFAULT_PER_PAGE, role=None, q=None):
+    """O pagină din grilă: (rânduri, cursorul paginii următoare sau None)"""
+    descending = order == 'desc'
+    after = decode_cursor(cursor, sort, order) if cursor else None
+    id_order = User.id.desc() if descending else User.id.asc()
+    base = _filtered(select(*GRID_COLUMNS), role, q)
+
+    if sort == 'role':
+        rows = []
+        roles = ROLES[::-1] if descending else ROLES
+        if after:
+            roles = roles[roles.index(after[0]):]
+        for current_role in roles:
+            if role and current_role != role:
+                continue
+            query = base.where(User.role == current_role)
+            if after and after[0] == current_role:
+                query = query.where(User.id < after[1] if descending else User.id > after[1])
+            query = query.order_by(id_order).limit(per_page + 1 - len(rows))
+            rows.extend(db.session.execute(query).all())
+            if len(rows) > per_page:
+                break
+    else:
+        column = SORTS[sort]
+        query = base
+        if after and sort == 'id':
+            query = query.where(User.id < after[1] if descending else User.id > after[1])
+        elif after:
+            query = query.where(_after(column, after[0], after[1], descending))
+        ordering = [id_order] if sort == 'id' else [column.desc() if descending else column.asc(), id_order]
+        rows = db.session.execute(query.order_by(*ordering).limit(per_page + 1)).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(sort, order, rows[-1])
+    return rows, next_cursor
+
+
+def row_to_dict(row):
+    data = row._asdict()
+    if data['created_at'] is not None:
+        data['created_at'] = data['created_at'].isoformat()
+    return data
+
+
+# ==================== EXPORT ====================
+
+def export_rows(role=None, q=None):
+    """Toți utilizatorii filtrați, în ordinea id-ului, citiți pe server câte EXPORT_CHUNK_ROWS"""
+    query = _filtered(select(*GRID_COLUMNS), role, q).order_by(User.id)
+    yield from db.session.execute(query.execution_options(yield_per=EXPORT_CHUNK_ROWS))
+
+
+def _csv_value(value):
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_csv(rows):
+    """Generator de text CSV (cu BOM, ca Excel să citească diacriticele)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(EXPORT_FIELDS)
+    for number, row in enumerate(rows, start=1):
+        writer.writerow([_csv_value(value) for value in row])
+        if number % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
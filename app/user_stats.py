@@ -0,0 +1,157 @@
+"""Statisticile de progres per utilizator (tabela user_stats).
+
+/api/progress/summary citește un singur rând, după cheia primară, în loc să
+numere la fiecare cerere UserProgress, UserBadge și QuizSubmission. Rândul
+este actualizat în aceeași tranzacție cu datele din care provine:
+  - lesson_detail          - lecție începută (in_progress + 1);
+  - quiz.apply_submission  - lecție terminată (in_progress - 1, completed + 1)
+                             și ziua de activitate pentru serie (quiz promovat);
+  - check_and_award_badges - badge-uri noi.
+
+Actualizările sunt UPDATE-uri atomice (col = col + delta), fără citire
+prealabilă. Dacă rândul lipsește (utilizator de dinainte de tabelă), este
+reconstruit din datele existente, care includ deja modificarea curentă
+(apelantul face flush înainte). `flask stats rebuild` recalculează toate
+rândurile.
+"""
+from datetime import timedelta
+
+from sqlalchemy import case, func, insert, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from app.models import db, User, UserStats, UserProgress, UserBadge, QuizSubmission
+
+CHUNK_SIZE = 1000
+
+
+# ==================== RECONSTRUIRE ====================
+
+def compute(user_id):
+    """Valorile rândului, calculate din UserProgress / UserBadge / QuizSubmission"""
+    counts = dict(
+        db.session.query(UserProgress.status, func.count(UserProgress.id))
+        .filter(UserProgress.user_id == user_id,
+                UserProgress.status.in_(('completed', 'in_progress')))
+        .group_by(UserProgress.status)
+        .all()
+    )
+    total_badges = db.session.query(func.count(UserBadge.id)).filter(UserBadge.user_id == user_id).scalar()
+
+    # Seria se termină la ultima zi cu un quiz promovat
+    last_active_date = None
+    consecutive_days = 0
+    passed_at = db.session.query(QuizSubmission.submitted_at)\
+        .filter(QuizSubmission.user_id == user_id, QuizSubmission.passed.is_(True),
+                QuizSubmission.submitted_at.isnot(None))\
+        .order_by(QuizSubmission.submitted_at.desc())\
+        .yield_per(CHUNK_SIZE)
+    for (submitted_at,) in passed_at:
+        day = submitted_at.date()
+        if last_active_date is None:
+            last_active_date, consecutive_days = day, 1
+        elif day == last_active_date - timedelta(days=consecutive_days):
+            consecutive_days += 1
+        elif day < last_active_date - timedelta(days=consecutive_days - 1):
+            break
+
+    return {
+        'completed_lessons': counts.get('completed', 0),
+        'in_progress_lessons': counts.get('in_progress', 0),
+        'total_badges': total_badges,
+        'consecutive_days': consecutive_days,
+        'last_active_date': last_active_date,
+    }
+
+
+def rebuild(user_id):
+    """Recalculează rândul utilizatorului (îl creează dacă lipsește)"""
+    values = compute(user_id)
+    if not db.session.execute(update(UserStats).where(UserStats.user_id == user_id).values(**values)).rowcount:
+        _insert(user_id, values)
+
+
+def rebuild_all():
+    """Recalculează rândurile tuturor utilizatorilor, pe bucăți; întoarce numărul lor"""
+    count = 0
+    last_id = 0
+    while True:
+        user_ids = [row[0] for row in db.session.query(User.id).filter(User.id > last_id)
+                    .order_by(User.id).limit(CHUNK_SIZE)]
+        if not user_ids:
+            return count
+        for user_id in user_ids:
+            rebuild(user_id)
+        db.session.commit()
+        count += len(user_ids)
+        last_id = user_ids[-1]
+
+
+def _insert(user_id, values):
+    """INSERT într-un savepoint; False dacă rândul a fost creat între timp de altă tranzacție"""
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(UserStats).values(user_id=user_id, **values))
+        return True
+    except IntegrityError:
+        return False
+
+
+def _apply(user_id, statement):
+    """Execută UPDATE-ul pe rândul utilizatorului; dacă rândul lipsește, îl reconstruiește"""
+    if db.session.execute(statement).rowcount:
+        return
+    if db.session.get(UserStats, user_id) is not None:
+        # Rândul există, dar condiția UPDATE-ului nu s-a aplicat (ex. zi deja numărată)
+        return
+    db.session.flush()
+    if not _insert(user_id, compute(user_id)):
+        # Creat concurent, dintr-o stare care nu includea modificarea noastră
+        db.session.execute(statement)
+
+
+# ==================== EVENIMENTE ====================
+
+def _increment(user_id, **deltas):
+    values = {name: getattr(UserStats, name) + delta for name, delta in deltas.items()}
+    return update(UserStats).where(UserStats.user_id == user_id).values(**values)
+
+
+def lesson_started(user_id):
+    _apply(user_id, _increment(user_id, in_progress_lessons=1))
+
+
+def lesson_completed(user_id, previous_status):
+    deltas = {'completed_lessons': 1}
+    if previous_status == 'in_progress':
+        deltas['in_progress_lessons'] = -1
+    _apply(user_id, _increment(user_id, **deltas))
+
+
+def quiz_passed(user_id, day):
+    """Ziua `day` (UTC) devine ultima zi activă: seria crește dacă ziua precedentă era activă"""
+    statement = update(UserStats).where(
+        UserStats.user_id == user_id,
+        or_(UserStats.last_active_date.is_(None), UserStats.last_active_date < day)
+    ).values(
+        consecutive_days=case(
+            (UserStats.last_active_date == day - timedelta(days=1), UserStats.consecutive_days + 1),
+            else_=1
+        ),
+        last_active_date=day
+    )
+    _apply(user_id, statement)
+
+
+def badges_awarded(user_id, count):
+    if count:
+        _apply(user_id, _increment(user_id, total_badges=count))
+
+
+def get_stats(user_id):
+    """Rândul utilizatorului; creat la prima citire pentru conturile mai vechi decât tabela"""
+    stats = db.session.get(UserStats, user_id)
+    if stats is None:
+        rebuild(user_id)
+        db.session.commit()
+        stats = db.session.get(UserStats, user_id)
+    return stats
@@ -0,0 +1,112 @@
+"""Încălzirea cache-urilor din proces înainte de primele cereri.
+
+warm_up(app) rulează, în ordine, funcțiile înregistrate cu @warmer și
+marchează aplicația ca pregătită (/readyz). serve.py o apelează în procesul
+master, înainte de fork: worker-ii moștenesc cataloagele, indexurile și
+șabloanele compilate prin copy-on-write, fără să le reconstruiască fiecare.
+Un warmer care eșuează nu oprește pornirea - cache-ul respectiv se va
+construi la prima cerere - dar apare în raport și ține /readyz pe 503 dacă
+WARMUP_REQUIRED este activ.
+"""
+import time
+
+from app.models import db
+
+_warmers = []
+
+
+def warmer(name):
+    """Înregistrează o funcție de încălzire; întoarce un număr (elemente încărcate) sau None"""
+    def decorator(func):
+        _warmers.append((name, func))
+        return func
+    return decorator
+
+
+class WarmupState:
+    def __init__(self):
+        self.ready = False
+        self.started_at = None
+        self.duration_ms = None
+        self.steps = {}
+        self.errors = {}
+
+    def to_dict(self):
+        return {
+            'ready': self.ready,
+            'duration_ms': self.duration_ms,
+            'steps': self.steps,
+            'errors': self.errors
+        }
+
+
+def get_state(app):
+    return app.extensions.setdefault('warmup', WarmupState())
+
+
+def warm_up(app):
+    """Rulează toate funcțiile de încălzire; întoarce starea (WarmupState)"""
+    state = get_state(app)
+    state.started_at = time.time()
+    started = time.perf_counter()
+    with app.app_context():
+        for name, func in _warmers:
+            step_started = time.perf_counter()
+            try:
+                count = func(app)
+                db.session.commit()
+                state.steps[name] = {'items': count, 'ms': round((time.perf_counter() - step_started) * 1000, 1)}
+                state.errors.pop(name, None)
+            except Exception as e:
+                db.session.rollback()
+                state.errors[name] = str(e)
+                print(f"Eroare la încălzirea {name}: {str(e)}")
+        db.session.remove()
+        # Conexiunile deschise aici nu trebuie moștenite de worker-i
+        db.engine.dispose()
+    state.duration_ms = round((time.perf_counter() - started) * 1000, 1)
+    state.ready = not (state.errors and app.config.get('WARMUP_REQUIRED', False))
+    return state
+
+
+# ==================== FUNCȚII DE ÎNCĂLZIRE ====================
+
+@warmer('badges')
+def _badges(app):
+    from app import catalog
+    return len(catalog.badges())
+
+
+@warmer('plans')
+def _plans(app):
+    from app import catalog
+    return len(catalog.active_plans())
+
+
+@warmer('lesson_index')
+def _lesson_index(app):
+    from app.search import lesson_index
+    lesson_index.ensure_fresh()
+    return len(lesson_index._docs)
+
+
+@warmer('meeting_index')
+def _meeting_index(app):
+    from app.scheduling import meeting_index
+    meeting_index.sync()
+
+
+@warmer('leaderboard')
+def _leaderboard(app):
+    from app.leaderboard_stream import leaderboard_hub
+    leaderboard_hub.load()
+
+
+@warmer('templates')
+def _templates(app):
+    # Compilează toate șabloanele o singură dată (codul rezultat e partajat după fork)
+    count = 0
+    for name in app.jinja_env.list_templates(extensions=('html',)):
+        app.jinja_env.get_template(name)
+        count += 1
+    return count
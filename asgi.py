@@ -0,0 +1,9 @@
+from app import create_app
+from app.async_api import AsyncAPI
+from app.warmup import warm_up
+
+# Servire ASGI: endpoint-urile de citire rulează async, restul prin aplicația Flask
+#   uvicorn asgi:app --workers 4 --port 5000
+flask_app = create_app()
+warm_up(flask_app)
+app = AsyncAPI(flask_app)
@@ -0,0 +1,209 @@
+"""Benchmark: serverul WSGI sincron vs. asgi.py la multe conexiuni simultane.
+
+Pornește, pe rând, aplicația ca proces separat - `wsgi` (serverul cu thread
+per cerere din run.py) și `asgi` (uvicorn asgi:app, un worker) - și deschide
+--connections conexiuni keep-alive autentificate, care cer în buclă
+--endpoint timp de --duration secunde. Raportează cereri/s, latența p50/p99,
+erorile și memoria (RSS maxim) și numărul de thread-uri ale procesului server.
+
+    python benchmarks/asgi_concurrency.py --connections 1000 --duration 20
+"""
+import argparse
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ.setdefault('SCHEDULER_ENABLED', '0')
+
+WSGI_SERVER = (
+    'from werkzeug.serving import make_server; from run import app; '
+    'make_server("127.0.0.1", {port}, app, threaded=True).serve_forever()'
+)
+SERVERS = {
+    'wsgi': lambda port: [sys.executable, '-c', WSGI_SERVER.format(port=port)],
+    'asgi': lambda port: [sys.executable, '-m', 'uvicorn', 'asgi:app', '--port', str(port),
+                          '--workers', '1', '--backlog', '4096', '--log-level', 'warning'],
+}
+
+
+def seed(lessons):
+    """Date de test + cookie-ul de sesiune al unui student autentificat"""
+    from sqlalchemy import insert
+
+    from app import create_app
+    from app.models import db, User, Lesson
+
+    app = create_app()
+    with app.app_context():
+        if not User.query.filter_by(email='bench-student@example.com').first():
+            professor = User(first_name='Bench', last_name='Profesor', email='bench-prof@example.com',
+                             role='professor')
+            student = User(first_name='Bench', last_name='Student', email='bench-student@example.com')
+            for user in (professor, student):
+                user.set_password('secret1')
+                db.session.add(user)
+            db.session.flush()
+            db.session.execute(insert(Lesson), [
+                {'title': f'Lecția {i}', 'description': 'Descriere', 'content': 'Conținut ' * 50,
+                 'level': 'beginner', 'category': 'grammar', 'professor_id': professor.id,
+                 'status': 'published'}
+                for i in range(lessons)
+            ])
+            db.session.commit()
+
+    client = app.test_client()
+    client.post('/api/login', json={'email': 'bench-student@example.com', 'password': 'secret1'})
+    name = app.config['SESSION_COOKIE_NAME']
+    return f'{name}={client.get_cookie(name).value}'
+
+
+def process_stats(pid):
+    """RSS (KiB) și thread-uri ale procesului și ale copiilor lui"""
+    rss = threads = 0
+    pids = [pid]
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            pids += [int(child) for child in f.read().split()]
+    except OSError:
+        pass
+    for p in pids:
+        try:
+            with open(f'/proc/{p}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        rss += int(line.split()[1])
+                    elif line.startswith('Threads:'):
+                        threads += int(line.split()[1])
+        except OSError:
+            pass
+    return rss, threads
+
+
+async def connection(port, request, deadline, latencies, errors):
+    reader = writer = None
+    while time.monotonic() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            started = time.monotonic()
+            writer.write(request)
+            await writer.drain()
+            status = await reader.readline()
+            length = None
+            keep_alive = status.startswith(b'HTTP/1.1')
+            while (line := await reader.readline()) not in (b'\r\n', b''):
+                name, _, value = line.partition(b':')
+                if name.lower() == b'content-length':
+                    length = int(value)
+                elif name.lower() == b'connection' and value.strip().lower() == b'close':
+                    keep_alive = False
+            # Fără Content-Length (răspunsuri în flux, HTTP/1.0): corpul ține până la închidere
+            if length is None:
+                await reader.read()
+                keep_alive = False
+            else:
+                await reader.readexactly(length)
+            if b' 200 ' not in status:
+                errors.append(status)
+            latencies.append(time.monotonic() - started)
+            if not keep_alive:
+                writer.close()
+                reader = writer = None
+        except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+            errors.append(e)
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            await asyncio.sleep(0.05)
+    if writer is not None:
+        writer.close()
+
+
+async def load(port, request, connections, duration):
+    latencies, errors = [], []
+    deadline = time.monotonic() + duration
+    await asyncio.gather(*(connection(port, request, deadline, latencies, errors)
+                           for _ in range(connections)))
+    return latencies, errors
+
+
+def wait_ready(port, timeout=30):
+    import socket
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'serverul de pe portul {port} nu a pornit')
+
+
+def run(name, port, request, args):
+    server = subprocess.Popen(SERVERS[name](port), cwd=ROOT, env=os.environ.copy(),
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(port)
+        peak = {'rss': 0, 'threads': 0}
+        sampling = threading.Event()
+
+        def sample():
+            while not sampling.wait(0.2):
+                rss, threads = process_stats(server.pid)
+                peak['rss'] = max(peak['rss'], rss)
+                peak['threads'] = max(peak['threads'], threads)
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        latencies, errors = asyncio.run(load(port, request, args.connections, args.duration))
+        sampling.set()
+        sampler.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies.sort()
+    if not latencies:
+        print(f'{name}: niciun răspuns ({len(errors)} erori)')
+        return
+    print(f'{name}: {len(latencies) / args.duration:.0f} cereri/s, '
+          f'p50 {latencies[len(latencies) // 2] * 1000:.0f} ms, '
+          f'p99 {latencies[int(len(latencies) * 0.99)] * 1000:.0f} ms, {len(errors)} erori, '
+          f'RSS maxim {peak["rss"] / 1024:.0f} MiB, {peak["threads"]} thread-uri')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--connections', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--endpoint', default='/api/leaderboard/global?per_page=25')
+    parser.add_argument('--lessons', type=int, default=200)
+    parser.add_argument('--servers', default='wsgi,asgi')
+    parser.add_argument('--port', type=int, default=5601)
+    args = parser.parse_args()
+
+    # Fiecare conexiune e un descriptor de fișier, în ambele procese
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, args.connections * 2 + 256)), hard))
+
+    cookie = seed(args.lessons)
+    request = (f'GET {args.endpoint} HTTP/1.1\r\nHost: 127.0.0.1\r\n'
+               f'Cookie: {cookie}\r\n\r\n').encode()
+
+    print(f'{args.connections} conexiuni, {args.duration:.0f} s, GET {args.endpoint}')
+    for offset, name in enumerate(args.servers.split(',')):
+        run(name, args.port + offset, request, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Benchmark: serializarea listelor de Lesson.to_dict() - înainte / după.
+
+Compară provider-ul JSON implicit al Flask cu FastJSONProvider (orjson /
+ujson, dacă sunt instalate) și răspunsul construit integral cu cel trimis în
+flux (timp până la primul octet, memorie maximă).
+
+    python benchmarks/json_serialization.py --lessons 5000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ.setdefault('SCHEDULER_ENABLED', '0')
+
+from flask.json.provider import DefaultJSONProvider
+
+from app import create_app
+from app.json_provider import FastJSONProvider, stream_json_object
+from app.models import Lesson, User
+
+
+def make_lessons(count):
+    professor = User(id=1, first_name='Ana', last_name='Popescu', email='ana@example.com', role='professor',
+                     specialization='Gramatică și Vocabular')
+    return [
+        Lesson(id=i, title=f'Lecția {i}: Present Perfect vs Past Simple',
+               description='Diferențele dintre timpuri, cu exemple și exerciții. ' * 3,
+               content='<p>Conținutul lecției, cu explicații și exemple.</p>' * 20,
+               level=('beginner', 'intermediate', 'advanced')[i % 3], category='Grammar',
+               duration_minutes=30, difficulty=3, rating=4.5, total_ratings=12, views=100 + i,
+               completions=i % 50, status='published', professor=professor,
+               created_at=datetime(2025, 1, 1), updated_at=datetime(2025, 1, 2))
+        for i in range(1, count + 1)
+    ]
+
+
+def timed(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def measure_response(app, make_response):
+    """(ms până la primul octet, ms total, memorie maximă în KB)"""
+    with app.test_request_context():
+        tracemalloc.start()
+        started = time.perf_counter()
+        response = make_response()
+        chunks = iter(response.response)
+        first = next(chunks)
+        first_byte = time.perf_counter() - started
+        size = len(first) + sum(len(chunk) for chunk in chunks)
+        total = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return first_byte * 1000, total * 1000, peak / 1024, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lessons', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app()
+    lessons = make_lessons(args.lessons)
+    dicts = [lesson.to_dict() for lesson in lessons]
+    payload = {'success': True, 'lessons': dicts, 'count': len(dicts)}
+
+    default_provider = DefaultJSONProvider(app)
+    fast_provider = FastJSONProvider(app)
+
+    print(f'{args.lessons} lecții, backend rapid: {fast_provider.backend}')
+    with app.app_context():
+        before = timed(lambda: default_provider.response(payload), args.repeat)
+        after = timed(lambda: fast_provider.response(payload), args.repeat)
+        to_dict = timed(lambda: [lesson.to_dict() for lesson in lessons], args.repeat)
+    print(f'  Lesson.to_dict() pentru toată lista:       {to_dict:8.1f} ms')
+    print(f'  serializare provider implicit (json):      {before:8.1f} ms')
+    print(f'  serializare FastJSONProvider ({fast_provider.backend}): {after:8.1f} ms  ({before / after:.1f}x)')
+
+    app.json = default_provider
+    full = measure_response(app, lambda: default_provider.response(
+        {'success': True, 'lessons': [lesson.to_dict() for lesson in lessons], 'count': len(lessons)}))
+    app.json = fast_provider
+    streamed = measure_response(app, lambda: stream_json_object(
+        'lessons', iter(lessons), head={'success': True}, tail=lambda count: {'count': count},
+        serialize=Lesson.to_dict))
+
+    print('  răspuns complet (jsonify, json):          primul octet {:7.1f} ms, total {:7.1f} ms, '
+          'memorie maximă {:8.0f} KB, {} B'.format(*full))
+    print(f'  răspuns în flux ({fast_provider.backend}):'.ljust(44) + 'primul octet {:7.1f} ms, total {:7.1f} ms, '
+          'memorie maximă {:8.0f} KB, {} B'.format(*streamed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark: costul clasamentului live pentru multe conexiuni deschise.
+
+Creează --students studenți și --viewers abonamente la LeaderboardHub (fără
+HTTP), apoi aplică --updates modificări de puncte și măsoară timpul unui
+lot (poll + publicare către toți abonații), numărul de interogări per lot
+și cât de multe evenimente ajung în bufferele abonaților.
+
+    python benchmarks/leaderboard_fanout.py --students 20000 --viewers 5000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ.setdefault('SCHEDULER_ENABLED', '0')
+
+from sqlalchemy import event, insert
+
+from app import create_app
+from app.leaderboard_stream import leaderboard_hub
+from app.ledger import apply_points
+from app.models import db, User
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=20000)
+    parser.add_argument('--viewers', type=int, default=5000)
+    parser.add_argument('--updates', type=int, default=200)
+    parser.add_argument('--batch', type=int, default=10, help='modificări între două poll-uri')
+    args = parser.parse_args()
+
+    app = create_app()
+    rng = random.Random(7)
+    with app.app_context():
+        rows = [{'first_name': 'Student', 'last_name': str(i), 'email': f'bench{i}@example.com',
+                 'password': '-', 'role': 'user', 'points': rng.randint(0, 5000)}
+                for i in range(args.students)]
+        for start in range(0, len(rows), 5000):
+            db.session.execute(insert(User), rows[start:start + 5000])
+        db.session.commit()
+        user_ids = [row[0] for row in db.session.query(User.id)]
+
+        # Fără thread de fundal: poll-urile sunt rulate explicit mai jos
+        leaderboard_hub._pid = os.getpid()
+        started = time.perf_counter()
+        leaderboard_hub.load()
+        print(f'încărcare {args.students} studenți: {(time.perf_counter() - started) * 1000:.0f} ms')
+
+        subscriptions = [leaderboard_hub.subscribe(rng.choice(user_ids), 25) for _ in range(args.viewers)]
+        for subscription in subscriptions:
+            subscription.wait(0)
+
+        queries = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *a, **k: queries.append(1))
+        timings = []
+        events = 0
+        for batch in range(args.updates // args.batch):
+            for _ in range(args.batch):
+                apply_points(rng.choice(user_ids), rng.randint(1, 300), 'adjustment')
+            db.session.commit()
+            queries.clear()
+            started = time.perf_counter()
+            leaderboard_hub.poll()
+            timings.append((time.perf_counter() - started) * 1000)
+            poll_queries = len(queries)
+            events += sum(1 for subscription in subscriptions if subscription.wait(0) is not None)
+
+        timings.sort()
+        print(f'{args.viewers} conexiuni, {len(timings)} loturi de câte {args.batch} modificări')
+        print(f'  poll + publicare: median {timings[len(timings) // 2]:.1f} ms, '
+              f'max {timings[-1]:.1f} ms, {poll_queries} interogări / lot (indiferent de conexiuni)')
+        print(f'  evenimente livrate: {events} ({events / len(timings):.0f} / lot, '
+              f'{events / len(timings) / args.viewers * 100:.1f}% din conexiuni)')
+        print(f'  statistici hub: {leaderboard_hub.get_stats()}')
+
+
+if __name__ == '__main__':
+    main()
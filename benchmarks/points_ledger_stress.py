@@ -0,0 +1,124 @@
+"""Test de stres pentru registrul de puncte: fără actualizări pierdute.
+
+Mai multe thread-uri aplică simultan credite și debite pe aceiași
+utilizatori. La final, pentru fiecare utilizator, User.points trebuie să fie
+egal cu suma intrărilor din registru și cu suma operațiilor reușite, iar
+soldul nu trebuie să fi devenit negativ.
+
+Rulare (implicit pe o bază SQLite temporară; pentru MySQL setați DATABASE_URL):
+
+    python benchmarks/points_ledger_stress.py --threads 32 --ops 500
+
+Cu --naive, punctele sunt modificate prin read-modify-write (vechiul mod),
+pentru comparație: diferențele apar ca actualizări pierdute.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'stress.db')
+os.environ.setdefault('SCHEDULER_ENABLED', '0')
+os.environ.setdefault('JOB_WORKERS', '0')
+
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
+
+from app import create_app
+from app.ledger import apply_points, InsufficientPoints
+from app.models import db, User, PointsLedgerEntry
+
+
+def worker(app, user_ids, ops, naive, applied, errors, seed):
+    rng = random.Random(seed)
+    with app.app_context():
+        for _ in range(ops):
+            user_id = rng.choice(user_ids)
+            amount = rng.choice((5, 10, -7, 3, -20))
+            while True:
+                try:
+                    if naive:
+                        user = db.session.get(User, user_id)
+                        if amount < 0 and user.points < -amount:
+                            db.session.rollback()
+                            break
+                        user.points = user.points + amount
+                    else:
+                        apply_points(user_id, amount, 'adjustment')
+                    db.session.commit()
+                    applied[user_id].append(amount)
+                    break
+                except InsufficientPoints:
+                    db.session.rollback()
+                    break
+                except OperationalError:
+                    # SQLite: baza e blocată de alt writer - reîncercăm
+                    db.session.rollback()
+                    errors.append(1)
+                    time.sleep(0.001)
+        db.session.remove()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--ops', type=int, default=300, help='operații per thread')
+    parser.add_argument('--users', type=int, default=4)
+    parser.add_argument('--naive', action='store_true')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        user_ids = []
+        for i in range(args.users):
+            user = User(first_name='Stress', last_name=str(i), email=f'stress{i}-{time.time_ns()}@example.com',
+                        role='user', points=0)
+            user.set_password('stress')
+            db.session.add(user)
+            db.session.flush()
+            user_ids.append(user.id)
+        db.session.commit()
+
+    applied = {user_id: [] for user_id in user_ids}
+    errors = []
+    threads = [
+        threading.Thread(target=worker, args=(app, user_ids, args.ops, args.naive, applied, errors, seed))
+        for seed in range(args.threads)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    total_ops = sum(len(amounts) for amounts in applied.values())
+    print(f'{total_ops} operații reușite în {elapsed:.2f}s ({total_ops / elapsed:.0f} op/s), '
+          f'{len(errors)} reîncercări')
+
+    lost = 0
+    with app.app_context():
+        for user_id in user_ids:
+            points = db.session.get(User, user_id).points
+            ledger = db.session.query(func.coalesce(func.sum(PointsLedgerEntry.amount), 0))\
+                .filter(PointsLedgerEntry.user_id == user_id).scalar()
+            expected = sum(applied[user_id])
+            status = 'OK' if points == expected and (args.naive or points == ledger) and points >= 0 else 'DIFERENȚĂ'
+            if status != 'OK':
+                lost += 1
+            print(f'utilizator {user_id}: sold {points}, operații {expected}, registru {ledger} - {status}')
+
+    if lost:
+        print(f'❌ {lost} utilizatori cu actualizări pierdute')
+        sys.exit(1)
+    print('✅ Fără actualizări pierdute')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Durata și memoria job-ului de recomandări pe un volum mare de progres.
+
+Generează elevi, lecții și rânduri user_progress sintetice (fiecare elev
+parcurge lecții dintr-un "traseu" preferat, plus câteva aleatoare), apoi
+rulează recommendations.build() și raportează timpul pe etape și memoria
+maximă a procesului. Memoria trebuie să depindă de --block-size și de
+numărul de lecții, nu de numărul de rânduri.
+
+Rulare (implicit pe o bază SQLite temporară; pentru MySQL setați DATABASE_URL):
+
+    python benchmarks/recommendations_build.py --rows 1000000 --lessons 2000
+    python benchmarks/recommendations_build.py --rows 10000000 --block-size 50000
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'recommendations.db')
+os.environ.setdefault('SCHEDULER_ENABLED', '0')
+os.environ.setdefault('JOB_WORKERS', '0')
+
+import numpy as np
+from sqlalchemy import insert
+
+from app import create_app
+from app import recommendations
+from app.models import db, User, Lesson, UserProgress
+
+BATCH = 20000
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def generate(rows, lessons, per_user, seed):
+    """Perechile (user, lecție) unice: trasee de lecții consecutive + zgomot"""
+    rng = np.random.default_rng(seed)
+    users = max(rows // per_user, 1)
+    start = rng.integers(0, lessons, size=users)
+    offsets = np.arange(per_user)
+    picks = (start[:, None] + offsets[None, :]) % lessons
+    noise = rng.random(picks.shape) < 0.2
+    picks[noise] = rng.integers(0, lessons, size=noise.sum())
+    user_index = np.repeat(np.arange(users), per_user)
+    pairs = np.unique(user_index * lessons + picks.ravel())
+    return users, pairs // lessons, pairs % lessons
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000, help='rânduri user_progress')
+    parser.add_argument('--lessons', type=int, default=2000)
+    parser.add_argument('--per-user', type=int, default=20, help='lecții parcurse per elev')
+    parser.add_argument('--block-size', type=int, default=recommendations.USER_BLOCK)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        started = time.perf_counter()
+        users, user_index, lesson_index = generate(args.rows, args.lessons, args.per_user, args.seed)
+
+        professor_id = db.session.execute(insert(User).values(
+            first_name='Bench', last_name='Prof', email=f'bench-{time.time_ns()}@example.com',
+            password='x', role='professor')).inserted_primary_key[0]
+        first_user = None
+        for start in range(0, users, BATCH):
+            db.session.execute(insert(User), [
+                {'first_name': 'Elev', 'last_name': str(i), 'email': f'bench{i}-{time.time_ns()}@example.com',
+                 'password': 'x', 'role': 'user'}
+                for i in range(start, min(start + BATCH, users))
+            ])
+        first_user = professor_id + 1
+        db.session.execute(insert(Lesson), [
+            {'title': f'Lecția {i}', 'description': '-', 'content': '-', 'level': 'beginner',
+             'category': 'grammar', 'professor_id': professor_id, 'status': 'published'}
+            for i in range(args.lessons)
+        ])
+        first_lesson = db.session.query(db.func.min(Lesson.id)).scalar()
+        for start in range(0, len(user_index), BATCH):
+            db.session.execute(insert(UserProgress), [
+                {'user_id': first_user + int(u), 'lesson_id': first_lesson + int(l), 'status': 'completed'}
+                for u, l in zip(user_index[start:start + BATCH], lesson_index[start:start + BATCH])
+            ])
+        db.session.commit()
+        del user_index, lesson_index
+        print(f"Date generate: {users} elevi, {args.lessons} lecții, {args.rows} rânduri "
+              f"în {time.perf_counter() - started:.1f} s (memorie maximă {peak_rss_mb():.0f} MB)")
+
+        # Memoria maximă de până acum include generarea; build() o poate depăși doar prin blocuri și C
+        report = recommendations.build(args.block_size)
+        print(f"build(): {report['seconds']} s, {report['completions']} parcurgeri, "
+              f"{report['similar_pairs']} perechi similare, {report['recommendations']} recomandări "
+              f"pentru {report['users']} elevi")
+        print(f"Memorie maximă a procesului: {peak_rss_mb():.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
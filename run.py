@@ -1,8 +1,10 @@
 from app import create_app
+from app.warmup import warm_up
 
 app = create_app()
 
 if __name__ == '__main__':
+    warm_up(app)
     print("🚀 EnglishMaster pornește pe http://localhost:5000")
     print("📝 Pagini disponibile:")
     print("   - http://localhost:5000/")
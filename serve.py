@@ -0,0 +1,128 @@
+"""Server de producție: gunicorn prefork, cu aplicația preîncărcată și încălzită.
+
+Procesul master creează aplicația și rulează warm_up() (cataloage, indexuri,
+șabloane) o singură dată, apoi face fork pentru worker-i: aceștia pornesc cu
+cache-urile gata populate și le partajează prin copy-on-write. Fiecare
+worker e înlocuit după --max-requests cereri (+ jitter, ca să nu repornească
+toți deodată), ceea ce limitează creșterea memoriei.
+
+    python serve.py --bind 0.0.0.0:8000 --workers 4 --threads 8
+
+Semnale (către master): HUP - worker-i noi, cei vechi termină cererile în
+curs (--graceful-timeout); USR2 + QUIT către vechiul master - versiune nouă
+de cod fără întrerupere; TTIN / TTOU - un worker în plus / în minus.
+Echilibrul de încărcare poate folosi /readyz (cache-uri încălzite + baza de
+date accesibilă), iar monitorizarea /healthz.
+
+Limită: cu worker-ii gthread, fiecare conexiune SSE (/api/leaderboard/stream)
+și fiecare long-poll (/api/notifications/poll) ține ocupat un thread cât stă
+deschisă, deci un worker servește cel mult --threads astfel de clienți odată,
+iar cererile obișnuite așteaptă după ei. Cu --asgi, worker-ii sunt uvicorn
+(evented) și servesc aplicația din asgi.py / app/async_api.py: acolo
+conexiunile de durată sunt corutine, nu thread-uri; restul rutelor trec prin
+Flask, în pool-ul de thread-uri asgiref.
+
+    python serve.py --asgi --workers 4
+
+Toate opțiunile au și variantă de mediu (SERVE_BIND, SERVE_WORKERS, ...).
+Gunicorn rulează doar pe Unix; pe Windows folosește run.py.
+"""
+import argparse
+import multiprocessing
+import os
+
+from gunicorn.app.base import BaseApplication
+
+
+def _env(name, default, type=str):
+    value = os.environ.get(f'SERVE_{name}')
+    return type(value) if value is not None else default
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bind', default=_env('BIND', '0.0.0.0:8000'))
+    parser.add_argument('--workers', type=int, default=_env('WORKERS', multiprocessing.cpu_count() * 2 + 1, int))
+    parser.add_argument('--threads', type=int, default=_env('THREADS', 8, int),
+                        help='thread-uri per worker gthread (long-poll-ul și SSE-ul țin câte un thread ocupat)')
+    parser.add_argument('--asgi', action='store_true', default=_env('ASGI', '0') == '1',
+                        help='worker-i uvicorn cu aplicația ASGI (SSE și long-poll fără thread blocat)')
+    parser.add_argument('--max-requests', type=int, default=_env('MAX_REQUESTS', 2000, int),
+                        help='cereri după care un worker e reciclat (0 = niciodată)')
+    parser.add_argument('--max-requests-jitter', type=int, default=_env('MAX_REQUESTS_JITTER', 200, int))
+    parser.add_argument('--timeout', type=int, default=_env('TIMEOUT', 60, int),
+                        help='secunde fără semn de viață după care un worker e omorât')
+    parser.add_argument('--graceful-timeout', type=int, default=_env('GRACEFUL_TIMEOUT', 30, int))
+    parser.add_argument('--keep-alive', type=int, default=_env('KEEP_ALIVE', 5, int))
+    parser.add_argument('--backlog', type=int, default=_env('BACKLOG', 2048, int))
+    parser.add_argument('--log-level', default=_env('LOG_LEVEL', 'info'))
+    parser.add_argument('--no-warmup', action='store_true', help='pornește fără încălzirea cache-urilor')
+    return parser.parse_args(argv)
+
+
+def post_fork(server, worker):
+    # Pool-ul de conexiuni al master-ului nu se folosește în worker (socket-uri partajate)
+    from app.models import db
+    application = worker.app.application
+    with getattr(application, 'flask_app', application).app_context():
+        db.engine.dispose(close=False)
+
+
+class PreforkServer(BaseApplication):
+    def __init__(self, application, options):
+        self.application = application
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return self.application
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    from app import create_app
+    from app.warmup import warm_up, get_state
+
+    application = create_app()
+    if args.no_warmup:
+        # Cache-urile se construiesc la primele cereri, în fiecare worker
+        get_state(application).ready = True
+    else:
+        state = warm_up(application)
+        print(f"🔥 Cache-uri încălzite în {state.duration_ms} ms: "
+              + ', '.join(f"{name} ({step['items']})" if step['items'] is not None else name
+                          for name, step in state.steps.items()))
+        for name, error in state.errors.items():
+            print(f"   ⚠️  {name}: {error}")
+
+    if args.asgi:
+        from app.async_api import AsyncAPI
+        application = AsyncAPI(application)
+        worker_class = 'uvicorn.workers.UvicornWorker'
+    else:
+        worker_class = 'gthread' if args.threads > 1 else 'sync'
+
+    PreforkServer(application, {
+        'bind': args.bind,
+        'workers': args.workers,
+        'threads': args.threads,
+        'worker_class': worker_class,
+        'max_requests': args.max_requests,
+        'max_requests_jitter': args.max_requests_jitter,
+        'timeout': args.timeout,
+        'graceful_timeout': args.graceful_timeout,
+        'keepalive': args.keep_alive,
+        'backlog': args.backlog,
+        'loglevel': args.log_level,
+        'preload_app': True,
+        'post_fork': post_fork,
+    }).run()
+
+
+if __name__ == '__main__':
+    main()